@@ -0,0 +1,64 @@
+""" Import-time regression benchmark for mofr.
+
+Runs python -X importtime -c "import mofr" in fresh interpreters, reports the
+cumulative import time of mofr (best of --repeat runs) with the slowest
+modules it pulled in, and fails (exit code 1) when it exceeds the budget or
+when "import mofr" imports any of the heavy optional dependencies, which
+should only be imported on first use.
+
+python benchmarks/import_time.py --budget-ms 150"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+
+HEAVY=['sklearn', 'scipy', 'matplotlib', 'IPython', 'pandas']
+
+
+def importtime(statement='import mofr'):
+    """(module, self time in us, cumulative time in us) of each module imported by the statement."""
+
+    root=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env=dict(os.environ, PYTHONPATH=os.pathsep.join([root, os.environ.get('PYTHONPATH', '')]))
+    stderr=subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], env=env, capture_output=True, text=True, check=True).stderr
+
+    rows=[]
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_, cumulative, module=line[len('import time:'):].split('|')
+        rows.append((module.strip(), int(self_), int(cumulative)))
+    return rows
+
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help='number of fresh interpreters, the best run is reported')
+    parser.add_argument('--budget-ms', type=float, default=150.0, help='maximum cumulative import time of mofr')
+    parser.add_argument('--top', type=int, default=10, help='number of the slowest modules listed')
+    args=parser.parse_args(argv)
+
+    runs=[importtime() for _ in range(args.repeat)]
+    best=min(runs, key=lambda rows: dict((m, c) for m, _, c in rows).get('mofr', 0))
+    total_ms=dict((m, c) for m, _, c in best)['mofr']/1000
+    heavy=sorted({m.split('.')[0] for m, _, _ in best if m.split('.')[0] in HEAVY})
+
+    print(f'import mofr: {total_ms:.1f} ms (best of {args.repeat}, budget {args.budget_ms:.0f} ms)')
+    for module, self_, _ in sorted(best, key=lambda row: -row[1])[:args.top]:
+        print(f'  {self_/1000:8.1f} ms  {module}')
+
+    failed=False
+    if total_ms>args.budget_ms:
+        print(f'FAIL: import mofr takes {total_ms:.1f} ms, more than the budget of {args.budget_ms:.0f} ms')
+        failed=True
+    if heavy:
+        print(f'FAIL: import mofr imports {", ".join(heavy)}, these should only be imported on first use')
+        failed=True
+
+    return 1 if failed else 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
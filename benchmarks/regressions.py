@@ -0,0 +1,354 @@
+""" Regression checks for mofr.
+
+Runs the evaluators on small synthetic data and checks the cases that went
+wrong before: each check is a function raising AssertionError when the
+behaviour regresses. Prints one line per check and fails (exit code 1) when
+any of them does.
+
+python benchmarks/regressions.py"""
+
+import argparse
+import os
+import sys
+import traceback
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import mofr
+
+
+def make_data(n=4000, seed=0):
+    """Dataframe with a target, its observability flag, a score, a categorical predictor and four months."""
+
+    rng=np.random.default_rng(seed)
+    score=rng.random(n)
+    return pd.DataFrame({'target': (rng.random(n)<score).astype(int),
+                         'target_obs': (rng.random(n)>0.1).astype(int),
+                         'score': score,
+                         'categorical_predictor': rng.choice(list('ABC'), n),
+                         'month': rng.choice([202001, 202002, 202003, 202004], n)})
+
+
+def check_missing_category():
+    """Missing values of a categorical predictor are a category of their own ('nan')."""
+
+    data=make_data()
+    data['categorical_predictor']=data['categorical_predictor'].astype(object)
+    data.loc[::7, 'categorical_predictor']=np.nan
+
+    histogram=mofr.HistogramCategoricalEvaluator(data, 'categorical_predictor').compute().result
+    assert 'nan' in histogram.index, histogram
+    assert histogram['count'].sum()==len(data), histogram
+
+    stability=mofr.StabilityInTimeCategoricalEvaluator(data, 'categorical_predictor', 'month').compute().result
+    assert 'nan' in stability.columns, stability
+    np.testing.assert_allclose(stability.sum(axis=1), 1)
+
+    chunks=[data.iloc[:len(data)//2], data.iloc[len(data)//2:]]
+    chunked=mofr.StabilityInTimeCategoricalEvaluator(chunks, 'categorical_predictor', 'month').compute().result
+    pd.testing.assert_frame_equal(chunked[stability.columns], stability, check_names=False)
+
+    dataset=mofr.EvaluationDataset(data, time_column='month', categorical=['categorical_predictor'])
+    compact=mofr.StabilityInTimeCategoricalEvaluator(dataset, 'categorical_predictor', 'month').compute().result
+    pd.testing.assert_frame_equal(compact[stability.columns], stability, check_names=False)
+
+    mofr.HistogramCategoricalEvaluator(data, 'categorical_predictor').get_graph(plot=False)
+    mofr.StabilityInTimeCategoricalEvaluator(data, 'categorical_predictor', 'month').get_graph(plot=False)
+
+
+def check_binned_score_range():
+    """The binned mode works for scores outside of [0, 1], within its maximum error of the exact metric."""
+
+    data=make_data()
+    data['score_x100']=100*data['score']
+    data['logit']=np.log(data['score']/(1-data['score']))
+    for evaluator in [mofr.GiniInTimeEvaluator, mofr.KSInTimeEvaluator, mofr.LiftInTimeEvaluator]:
+        scores=['score_x100', 'logit']
+        exact=evaluator(data, [('target', 'target_obs')], scores, 'month').compute().result
+        binned=evaluator(data, [('target', 'target_obs')], scores, 'month').compute(bins=1000).result
+        for score in scores:
+            error=(binned[score]-exact[score]).abs()
+            assert (error<=binned[f'{score}_max_error']+1e-9).all(), (evaluator.__name__, score, error, binned[f'{score}_max_error'])
+
+    #the chunks are read only once, scores outside of their bins are an error rather than clipped
+    chunks=[data.iloc[:len(data)//2], data.iloc[len(data)//2:]]
+    try:
+        mofr.GiniInTimeEvaluator(chunks, [('target', 'target_obs')], scores, 'month').compute()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('Scores outside of the bins of the chunked mode were accepted')
+    edges=np.linspace(data[scores].min().min(), data[scores].max().max(), 10001)
+    chunked=mofr.GiniInTimeEvaluator(chunks, [('target', 'target_obs')], scores, 'month').compute(bins=edges).result
+    exact=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], scores, 'month').compute().result
+    for score in scores:
+        assert ((chunked[score]-exact[score]).abs()<=chunked[f'{score}_max_error']+1e-9).all(), (score, chunked, exact)
+
+
+def check_missing_score():
+    """Missing scores of the evaluated rows raise ValueError (as sklearn does) instead of
+    being sorted among the others, missing scores of the unobservable rows are fine."""
+
+    data=make_data()
+    data.loc[data.index[::20], 'score']=np.nan
+    for evaluator in [mofr.GiniInTimeEvaluator, mofr.KSInTimeEvaluator, mofr.LiftInTimeEvaluator]:
+        for kwargs in [{}, {'window': 1}]:
+            try:
+                evaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(**kwargs)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(f'{evaluator.__name__} accepted missing scores ({kwargs})')
+    try:
+        mofr.ROCCurveEvaluator(data, [('target', 'target_obs')], ['score']).compute()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('ROCCurveEvaluator accepted missing scores')
+    for strategy in ['uniform', 'quantile']:
+        try:
+            mofr.metrics.BinnedScore(data['target'], data['score'], bins=100, strategy=strategy)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f'BinnedScore accepted missing scores ({strategy})')
+
+    data['target_obs']=data['score'].notna().astype(int)
+    exact=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').compute().result
+    windowed=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(window=1).result
+    pd.testing.assert_frame_equal(exact, windowed)
+
+
+def check_lift_interval_with_ties():
+    """The bootstrap interval of the lift of a score with many ties contains its point estimate."""
+
+    data=make_data(20000)
+    data['score']=data['score'].round(1)
+    result=mofr.LiftInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(ci=0.95, n_boot=200, seed=0).result
+    assert ((result['score_lower']<=result['score'])&(result['score']<=result['score_upper'])).all(), result
+
+
+def check_single_period_windows():
+    """Windows of one period give the metrics of the periods themselves, also for tied scores
+    (the scores have fewer distinct values than the bins, so the windowed counts are exact)."""
+
+    data=make_data(8000)
+    data['tied_score']=data['score'].round(1)
+    for evaluator in [mofr.GiniInTimeEvaluator, mofr.KSInTimeEvaluator, mofr.LiftInTimeEvaluator]:
+        periods=evaluator(data, [('target', 'target_obs')], ['score', 'tied_score'], 'month').compute().result
+        windows=evaluator(data, [('target', 'target_obs')], ['score', 'tied_score'], 'month').compute(window=1).result
+        pd.testing.assert_frame_equal(periods, windows, obj=evaluator.__name__)
+
+
+def check_incremental_categories():
+    """The graph of the incremental stability in time shows the categories of the state: the ones
+    added by append and all of them after load_state without any data."""
+
+    import tempfile
+
+    data=make_data()
+    new=make_data(seed=1).assign(month=202005, categorical_predictor='D')
+    evaluator=mofr.StabilityInTimeCategoricalEvaluator(data, 'categorical_predictor', 'month').append(new)
+    labels=[text.get_text() for text in evaluator.get_graph(plot=False).axis.get_legend().get_texts()]
+    assert 'D' in labels, labels
+
+    with tempfile.TemporaryDirectory() as directory:
+        path=os.path.join(directory, 'state.pkl')
+        evaluator.save_state(path)
+        loaded=mofr.StabilityInTimeCategoricalEvaluator(None, 'categorical_predictor', 'month').load_state(path)
+        labels_loaded=[text.get_text() for text in loaded.get_graph(plot=False).axis.get_legend().get_texts()]
+    assert labels_loaded==labels, (labels_loaded, labels)
+
+
+def check_ks_threshold():
+    """The KS in time can return the threshold of each period, the same as ks_score."""
+
+    data=make_data()
+    observable=data['target_obs']==1
+    table=mofr.metrics.metric_in_time('ks', data['target'], data[['score']], data['month'], observable=observable, return_threshold=True)
+    for month, rows in data[observable].groupby('month'):
+        expected=mofr.metrics.ks_score(rows['target'], rows['score'], return_threshold=True)
+        assert np.allclose(table.loc[month, ['score', 'score_threshold']].to_numpy(dtype=float), expected), (month, table, expected)
+
+    result=mofr.KSInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(threshold=True).result
+    assert 'score_threshold' in result.columns, result
+
+
+def check_report_does_not_display():
+    """A report keeps the tables of the evaluators without displaying them."""
+
+    from unittest import mock
+
+    data=make_data()
+    report=mofr.Report(data, [mofr.CategoricalPredictorEvaluator().t([('target', 'target_obs')]).pc('categorical_predictor').tc('month'),
+                              mofr.GiniInTimeEvaluator().t([('target', 'target_obs')]).s(['score']).tc('month')])
+    with mock.patch('mofr.table._display') as display, mock.patch('mofr.complex_evaluators.CategoricalPredictor._display', display):
+        tables=report.get_table().table
+    assert not display.called, display.call_args_list
+    assert all(table is not None for table in tables), tables
+
+
+def check_cache_key():
+    """compute called positionally, by keyword or with the defaults is cached once, different bin edges are not mixed up."""
+
+    from mofr.cache import MemoryCache
+
+    data=make_data()
+    cache=MemoryCache()
+    evaluator=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').c(cache)
+    evaluator.compute()
+    evaluator.compute(None, None)
+    evaluator.compute(window=None, bins=None)
+    evaluator.get_table()
+    evaluator.get_graph(plot=False)
+    assert (len(cache), cache.misses)==(1, 1), cache
+
+    edges=np.linspace(0, 1, 10001)
+    first=evaluator.compute(bins=edges).result
+    second=evaluator.compute(bins=np.r_[edges[:3], np.linspace(edges[3], edges[-4], 5), edges[-3:]]).result #same repr
+    assert not first.equals(second), (first, second)
+
+
+def check_roc_curve():
+    """The ROC curve has the points of sklearn's roc_curve, the intermediate ones dropped."""
+
+    from sklearn.metrics import roc_curve
+
+    data=make_data()
+    for score in [data['score'], data['score'].round(2)]:
+        expected=roc_curve(data['target'], score)
+        actual=mofr.metrics.RankedScore(data['target'], score).roc_curve()
+        for a, e in zip(actual, expected):
+            np.testing.assert_allclose(a, e)
+
+
+def check_score_comparison():
+    """The confidence band of the GINI difference and its p-value come from the same normal distribution."""
+
+    data=make_data()
+    data['noisy_score']=data['score']+np.random.default_rng(2).normal(0, 0.3, len(data))
+    evaluator=mofr.ScoreComparisonEvaluator(data, [('target', 'target_obs')], ['score', 'noisy_score'], 'month')
+    result=evaluator.compute().result
+    z=mofr.metrics._normal_z(0.95)
+    np.testing.assert_allclose(mofr.metrics._normal_pvalue(z), 0.05)
+    outside=(result['noisy_score_diff'].abs()>z*result['noisy_score_se']).to_numpy()
+    assert (outside==(result['noisy_score_pvalue']<0.05).to_numpy()).all(), result
+    evaluator.get_graph(plot=False).get_table()
+
+
+
+def check_incremental_inputs():
+    """New data ends the incremental mode, and the options the state cannot answer are errors."""
+
+    data=make_data()
+    other=make_data(seed=3)
+    other['target']=1-other['target']
+    evaluator=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').append(make_data(seed=1).assign(month=202005))
+    try:
+        evaluator.compute(bins=100)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('The incremental mode accepted bins')
+    result=evaluator.d(other).compute().result
+    expected=mofr.GiniInTimeEvaluator(other, [('target', 'target_obs')], ['score'], 'month').compute().result
+    pd.testing.assert_frame_equal(result, expected)
+
+
+def check_incremental_windows():
+    """Appending one period at a time gives the metrics of the whole data, in the periods, the
+    margin and the rolling and expanding windows (the scores have fewer distinct values than the bins)."""
+
+    data=make_data(8000)
+    data['score']=data['score'].round(2)
+    months=sorted(data['month'].unique())
+    for evaluator in [mofr.GiniInTimeEvaluator, mofr.KSInTimeEvaluator, mofr.LiftInTimeEvaluator]:
+        for window in [None, 2, 'expanding']:
+            incremental=evaluator(data[data['month']==months[0]], [('target', 'target_obs')], ['score'], 'month')
+            for month in months[1:]:
+                result=incremental.append(data[data['month']==month]).compute(window=window).result
+            expected=evaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(window=window).result
+            pd.testing.assert_frame_equal(result, expected, obj=f'{evaluator.__name__} window={window}')
+
+
+def check_curve_tables():
+    """The curve evaluators have tables too, also in a report."""
+
+    data=make_data()
+    curves=[evaluator().t([('target', 'target_obs')]).s(['score']) for evaluator in [mofr.ROCCurveEvaluator, mofr.PRCurveEvaluator, mofr.LiftCurveEvaluator]]
+    tables=mofr.Report(data, curves).get_table().table
+    assert all(table is not None and len(table.data)>0 for table in tables), tables
+    assert list(tables[0].data.columns)==['fpr', 'tpr', 'threshold'], tables[0].data
+
+
+def check_no_incremental_mode():
+    """Evaluators without an incremental mode reject append with a TypeError."""
+
+    data=make_data()
+    try:
+        mofr.ROCCurveEvaluator(data, [('target', 'target_obs')], ['score']).append(data)
+    except TypeError:
+        pass
+    else:
+        raise AssertionError('ROCCurveEvaluator accepted append')
+
+
+def check_bootstrap_in_process():
+    """A few blocks of bootstrap replicates are drawn in this process, without starting a pool of workers."""
+
+    from unittest import mock
+
+    data=make_data()
+    with mock.patch('concurrent.futures.ProcessPoolExecutor') as pool:
+        mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['score'], 'month').compute(ci=0.95, n_boot=100, seed=0)
+    assert not pool.called, pool.call_args_list
+
+
+def check_parallel_scores():
+    """Scores evaluated in parallel keep their float64 values, so scores differing only beyond
+    the float32 precision give the same tables as the evaluators run on the dataframe."""
+
+    from mofr.parallel import evaluate_in_parallel
+
+    data=make_data()
+    data['fine_score']=0.5+data['score']*1e-6
+    evaluator=mofr.GiniInTimeEvaluator().t([('target', 'target_obs')]).tc('month')
+    parallel=evaluate_in_parallel(data, evaluator, ['fine_score'], max_workers=2)[0].table.data
+    serial=mofr.GiniInTimeEvaluator(data, [('target', 'target_obs')], ['fine_score'], 'month').get_table().table.data
+    pd.testing.assert_frame_equal(parallel, serial)
+
+CHECKS=[check_missing_category, check_binned_score_range, check_missing_score, check_lift_interval_with_ties,
+        check_single_period_windows, check_incremental_categories, check_ks_threshold, check_report_does_not_display,
+        check_cache_key, check_roc_curve, check_score_comparison, check_incremental_inputs,
+        check_incremental_windows, check_curve_tables, check_no_incremental_mode, check_bootstrap_in_process,
+        check_parallel_scores]
+
+
+def main(argv=None):
+    parser=argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-k', default='', help='run only the checks with this substring in their name')
+    args=parser.parse_args(argv)
+
+    import matplotlib
+    matplotlib.use('Agg')
+
+    failed=False
+    for check in CHECKS:
+        if args.k not in check.__name__:
+            continue
+        try:
+            check()
+            print(f'ok    {check.__name__}')
+        except Exception:
+            print(f'FAIL  {check.__name__}: {check.__doc__}')
+            traceback.print_exc()
+            failed=True
+
+    return 1 if failed else 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
@@ -1,2 +1,48 @@
-import mofr.metrics
-import mofr.evaluator
+""" Modelling framework - evaluation of predictive models.
+
+The submodules and the evaluator classes are imported on first use (PEP 562
+module __getattr__), so that "import mofr" stays cheap for short scripts and
+batch jobs, e.g. mofr.metrics.gini(...) or mofr.GiniInTimeEvaluator()."""
+
+import importlib
+
+
+_SUBMODULES=['metrics', 'evaluator', 'columns', 'dataset', 'periods', 'summaries', 'report', 'parallel', 'table', 'cache', 'incremental', 'screening',
+             'basic_evaluators', 'complex_evaluators']
+
+#public classes and functions, by the module they are defined in
+_ATTRIBUTES={'Evaluator': 'mofr.evaluator',
+             'EvaluationDataset': 'mofr.dataset',
+             'Report': 'mofr.report',
+             'Table': 'mofr.table',
+             'evaluate_in_parallel': 'mofr.parallel',
+             'screen_predictors': 'mofr.screening',
+             'GiniInTimeEvaluator': 'mofr.basic_evaluators.GiniInTime',
+             'KSInTimeEvaluator': 'mofr.basic_evaluators.KSInTime',
+             'LiftInTimeEvaluator': 'mofr.basic_evaluators.LiftInTime',
+             'ROCCurveEvaluator': 'mofr.basic_evaluators.ROCCurve',
+             'PRCurveEvaluator': 'mofr.basic_evaluators.PRCurve',
+             'LiftCurveEvaluator': 'mofr.basic_evaluators.LiftCurve',
+             'HistogramCategoricalEvaluator': 'mofr.basic_evaluators.HistogramCategorical',
+             'HistogramContinuousEvaluator': 'mofr.basic_evaluators.HistogramContinuous',
+             'StabilityInTimeCategoricalEvaluator': 'mofr.basic_evaluators.StabilityInTimeCategorical',
+             'StabilityInTimeContinuousEvaluator': 'mofr.basic_evaluators.StabilityInTimeContinuous',
+             'TargetAssociationCategoricalEvaluator': 'mofr.basic_evaluators.TargetAssociationCategorical',
+             'TargetAssociationContinuousEvaluator': 'mofr.basic_evaluators.TargetAssociationContinuous',
+             'CategoricalPredictorEvaluator': 'mofr.complex_evaluators.CategoricalPredictor',
+             'ContinuousPredictorEvaluator': 'mofr.complex_evaluators.ContinuousPredictor',
+             'ScoreComparisonEvaluator': 'mofr.complex_evaluators.ScoreComparison'}
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module(f'{__name__}.{name}')
+    if name in _ATTRIBUTES:
+        value=getattr(importlib.import_module(_ATTRIBUTES[name]), name)
+        globals()[name]=value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals())+_SUBMODULES+list(_ATTRIBUTES))
@@ -1,18 +1,24 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_, max_categories_
 
 
 class HistogramCategoricalEvaluator(Evaluator):
 
+    _predictor_cast='categories' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, predictor_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+      For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+      the chunks are then summarized one by one into counts of each category.
 
       predictor_column: The name of the column containing the categorical predictor.
       There should be no more than 20 unique categories for this perecdictor. Binning should be used
@@ -31,17 +37,27 @@ class HistogramCategoricalEvaluator(Evaluator):
       return self      
 
 
-    def get_graph(self, plot=True):
-
-      # setup plot details
-      rcParams.update(rcParamsDefault)
-      f, ax = plt.subplots(figsize=figsize_)
-      
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_['one']=1
-      categories=list(df_[self.predictor_column].unique())
+    @cached
+    def compute(self):
+      """
+      The shares behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result has the proportion and the count of each category.
+      """
+      if self._chunked():
+        #chunked mode, the data is an iterable of dataframes summarized chunk by chunk
+        counts_=summaries.category_counts_in_time(self.data, self.predictor_column).table().sum(axis=0)
+        n_categories=len(counts_)
+        assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
+        assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
+
+        counts_=counts_.astype(np.int64).sort_values(ascending=False, kind='mergesort').rename_axis(self.predictor_column)
+        self.result=pd.concat([(counts_/counts_.sum()).rename('proportion %'), counts_.rename('count')], axis=1)
+        return self
+
+      #set up data details (read-only casts of the needed columns, the data itself is not modified)
+      view_=self._columns()
+      predictor_=view_.as_str(self.predictor_column)
+      categories, _=view_.categories(self.predictor_column)
       n_categories=len(categories)
 
       #assert the correct number of categories
@@ -49,7 +65,24 @@ class HistogramCategoricalEvaluator(Evaluator):
       assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
 
       #  produce table of distribution/share of each category in time
-      table=df_[self.predictor_column].value_counts(dropna=False, normalize=True)
+      table1=predictor_.value_counts(dropna=False, normalize=True)
+      table2=predictor_.value_counts(dropna=False, normalize=False)
+
+      final_table=pd.concat([table1, table2], axis=1)
+      final_table.columns=[final_table.columns[0]+' %', final_table.columns[1]]
+      self.result=final_table
+
+      return self
+
+    def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
+
+      # setup plot details
+      rcParams.update(rcParamsDefault)
+      f, ax = plt.subplots(figsize=figsize_)
+      
+      #  share of each category
+      table=self.compute().result.iloc[:, 0]
 
 
       #set plotting parameters
@@ -73,24 +106,8 @@ class HistogramCategoricalEvaluator(Evaluator):
 
     def get_table(self):
 
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_['one']=1
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
-
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
-      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
-
-      #  produce table of distribution/share of each category in time
-      table1=df_[self.predictor_column].value_counts(dropna=False, normalize=True)
-      table2=df_[self.predictor_column].value_counts(dropna=False, normalize=False)
-
-      final_table=pd.concat([table1, table2], axis=1)
-      final_table.columns=[final_table.columns[0]+' %', final_table.columns[1]]
-      final_table=final_table.style.set_table_attributes("style='display:inline'").set_caption(f'Distribution of predictor "{self.predictor_column}"')  
+      self.compute()
+      final_table=self._table(self.result, f'Distribution of predictor "{self.predictor_column}"')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
@@ -1,18 +1,24 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_
 
 
 class HistogramContinuousEvaluator(Evaluator):
 
+    _predictor_cast='as_float' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, predictor_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+      For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+      the percentiles are then computed from a mergeable quantile sketch (see summaries.QuantileSketch).
 
       predictor_column: The name of the column containing the categorical predictor.
       There should be no more than 20 unique categories for this perecdictor. Binning should be used
@@ -32,17 +38,17 @@ class HistogramContinuousEvaluator(Evaluator):
 
 
     def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       # setup plot details
       rcParams.update(rcParamsDefault)
       f, ax = plt.subplots(figsize=figsize_)
       
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
+      #set up data details (read-only cast of the predictor, the data itself is not modified)
+      predictor_=self._columns().as_float(self.predictor_column)
 
       #  produce histogram
-      n, bins, patches = plt.hist(df_[self.predictor_column], bins='doane', density=False, facecolor='b', alpha=0.75, edgecolor='black')
+      n, bins, patches = plt.hist(predictor_, bins='doane', density=False, facecolor='b', alpha=0.75, edgecolor='black')
 
       plt.xlabel('Values', axes=ax)
       plt.ylabel('Number of observations', axes=ax)
@@ -60,33 +66,42 @@ class HistogramContinuousEvaluator(Evaluator):
       return self
     
 
-    def get_table(self):
-      #percentile functions for the pivot table
-      def percentile_10(x):
-          return np.percentile(x,10)
-      def percentile_25(x):
-          return np.percentile(x,25)
-      def percentile_50(x):
-          return np.percentile(x,50)
-      def percentile_75(x):
-          return np.percentile(x,75)
-      def percentile_90(x):
-          return np.percentile(x,90)
-      
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
-      df_['']=self.predictor_column
+    @cached
+    def compute(self, relative_accuracy=None):
+      """
+      The percentiles behind the table, without any styling (neither matplotlib nor IPython is needed):
+      self.result has the 10th, 25th, 50th, 75th and 90th percentile of the predictor.
+
+      relative_accuracy: see get_table.
+      """
       categories=['percentile_10', 'percentile_25', 'percentile_50', 'percentile_75', 'percentile_90']
-      n_categories=len(categories)
 
-      #  produce table of distribution/share in time
-      pt=pd.pivot_table(df_, values=self.predictor_column, index='', columns=None, aggfunc=[percentile_10,percentile_25,percentile_50, percentile_75, percentile_90], fill_value=None, margins=False, dropna=True, margins_name='All')
-      pt.columns=[pt.columns[x][0] for x in range(len(pt.columns))]
-      pt=pt.transpose()
+      if self._chunked() or relative_accuracy is not None:
+        #sketch mode, the data (or each of its chunks) is summarized into a mergeable quantile sketch
+        chunks_=self.data if self._chunked() else [self.data]
+        sketch_=summaries.quantile_sketch_in_time(chunks_, self.predictor_column, relative_accuracy=relative_accuracy or 0.01)
+        percentiles_=sketch_.quantiles([0.1, 0.25, 0.5, 0.75, 0.9]).iloc[0].values
+      else:
+        #set up data details (read-only cast of the predictor, the data itself is not modified)
+        predictor_=self._columns().as_float(self.predictor_column)
+
+        #  all the percentiles from one partition of the data
+        percentiles_=np.percentile(predictor_.dropna(), [10, 25, 50, 75, 90])
+
+      pt=pd.DataFrame({self.predictor_column: percentiles_}, index=categories).rename_axis(columns='')
 
-      #produce table of distribution/share of each category in time
-      final_table=pt.style.set_table_attributes("style='display:inline'").set_caption(f'Percentiles of predictor "{self.predictor_column}"')  
+      self.result=pt
+
+      return self
+
+    def get_table(self, relative_accuracy=None):
+      """
+      relative_accuracy: None for exact percentiles, or the relative error (e.g. 0.01) of the approximate
+      percentiles from summaries.QuantileSketch. Chunked data always use the sketch (with 0.01 by default).
+      """
+
+      self.compute(relative_accuracy)
+      final_table=self._table(self.result, f'Percentiles of predictor "{self.predictor_column}"')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_
 
 
@@ -13,6 +13,7 @@ class LiftCurveEvaluator(Evaluator):
     def __init__(self, data=None, targets=None, scores=None):
         """
         data: The pandas dataframe containing all the necessary columns.
+        It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
 
         targets: These should be the list of binary targets along with their 
         observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
@@ -36,7 +37,22 @@ class LiftCurveEvaluator(Evaluator):
           self.scores=scores
           return self      
 
+    @cached
+    def compute(self):
+        """
+        The lifts behind the graph, without any plotting (neither matplotlib nor IPython is needed):
+        self.result has the lift of each score (columns) at the depths 10%, 20%, ..., 100% (index), on the first target.
+        """
+
+        x_= [(x/10) for x in range (1,11)] #x-axis with different lifts
+        target_=self.targets[0]
+        #each score is sorted on the target-observable cases only once, for all the curves evaluated on the same data
+        self.result=pd.DataFrame({score_: self._columns().ranked_score(target_, score_).lift(x_) for score_ in self.scores}, index=pd.Index(x_, name='depth'))
+
+        return self
+
     def get_graph(self, plot=True):
+        from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
         # setup plot details
         rcParams.update(rcParamsDefault)
@@ -47,16 +63,14 @@ class LiftCurveEvaluator(Evaluator):
         labels = []
 
         n_scores=len(self.scores)
-        x_= [(x/10) for x in range (1,11)] #x-axis with different lifts
+        lifts_=self.compute().result
+        x_=list(lifts_.index) #x-axis with different lifts
         max_lift=1.1
 
         #plot each lift curve for each score
         for i, color in zip(range(n_scores), colors):
-            target_=self.targets[0]
             score_=self.scores[i]
-            df_=self.data[self.data[target_[1]]==1] #filtering for only target-observable cases
-
-            lift_curve = [metrics.liftN(df_[target_[0]], df_[score_], x) for x in x_]
+            lift_curve = lifts_[score_].to_numpy() #all the lifts from one sort of the score
             max_lift=max(max(lift_curve), max_lift)
             l, = plt.plot(x_, lift_curve, color=color, lw=2)
             lines.append(l)
@@ -89,4 +103,8 @@ class LiftCurveEvaluator(Evaluator):
         return self
 
     def get_table(self):
-        pass
\ No newline at end of file
+        """The lift of each score (columns) at the depths 10%, ..., 100% (see compute)."""
+
+        self.table=self._table(self.compute().result, f'Lifts for target "{self.targets[0][0]}"')
+
+        return self
\ No newline at end of file
@@ -1,11 +1,13 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
-from mofr.basic_evaluators.settings import figsize_, colors_
+from mofr.cache import cached
+from mofr.incremental import ScoreMetricsState
+from mofr.basic_evaluators.settings import figsize_, colors_, linestyles_
 
 
 class LiftInTimeEvaluator(Evaluator):
@@ -13,10 +15,13 @@ class LiftInTimeEvaluator(Evaluator):
       def __init__(self, data=None, targets=None, scores=None, time_column=None):
             """
             data: The pandas dataframe containing all the necessary columns.
+            It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+            For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+            the chunks are then summarized one by one into per period histograms of the scores.
 
             targets: These should be the list of binary targets along with their 
             observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
-            Only the first target will be displayed in the graph at the moment.
+            All the targets are evaluated, each of them with its own line style in the graph.
 
             scores: List of score columns as follows ['score1', 'score2', 'score3']
 
@@ -44,7 +49,56 @@ class LiftInTimeEvaluator(Evaluator):
             self.time_column=time_column
             return self 
 
-      def get_graph(self, plot=True):
+      def _new_state(self):
+            return ScoreMetricsState(self.targets, self.scores, self.time_column)
+
+      @cached
+      def compute(self, bins=None, window=None, ci=None, n_boot=1000, seed=None, max_workers=None):
+            """
+            The numbers behind the graph and the table, without any plotting or styling (neither matplotlib
+            nor IPython is needed): self.result is the LIFT of all the scores (columns) in all the periods
+            plus the 'All' margin for all the targets, indexed by (target, period).
+
+            bins, window, ci, n_boot, seed, max_workers: see get_table.
+            """
+
+            state_=self._incremental()
+            if state_ is not None and bins is not None:
+                  raise ValueError('The bins are not available in the incremental mode, the metrics are read from the exact per-period state!')
+            if state_ is not None:
+                  #incremental mode, the rows of the periods and the 'All' margin are read from the per-period state (see append)
+                  self.result=state_.metric('lift', window=window)
+                  if ci is not None:
+                        self.result=metrics.with_intervals(self.result, state_.interval('lift', window=window, n_boot=n_boot, ci=ci, seed=seed, max_workers=max_workers))
+                  return self
+
+            targets_=[target_[0] for target_ in self.targets]
+            observable_=[target_[1] for target_ in self.targets]
+
+            #LIFT of all the scores in all the periods for all the targets at once, filtering for only target-observable cases
+            if not self._chunked() and bins is None and window is None:
+                  self.result=metrics.metric_in_time('lift', self.data[targets_], self.data[self.scores], self._columns().periods(self.time_column), observable=self.data[observable_]==1, ranked=self._columns().ranked_by_period(self.scores, self.time_column))
+            elif not self._chunked() and bins is None:
+                  #windowed mode, the per period counts of the binned scores are slid along the periods
+                  self.result=metrics.metric_in_windows('lift', self.data[targets_], self.data[self.scores], self._columns().periods(self.time_column), window, observable=self.data[observable_]==1)
+            else:
+                  #binned mode, the data (or each of its chunks) is summarized into per period histograms of the scores
+                  chunks_=self.data if self._chunked() else [self.data]
+                  if not self._chunked() and np.ndim(bins)==0:
+                        #in memory the bins are the quantiles of the scores, so scores of any range are binned
+                        bins=metrics._quantile_edges(self.data[self.scores], bins)
+                  self.result=summaries.metric_in_time('lift', chunks_, self.targets, self.scores, self.time_column, bins=bins, window=window,
+                                                       ci=ci, n_boot=n_boot, seed=seed, max_workers=max_workers)
+
+            if ci is not None and not self._chunked() and bins is None:
+                  #confidence bands from the Poisson bootstrap of the binned per period counts (see metrics.bootstrap_from_counts)
+                  intervals_=metrics.metric_intervals('lift', self.data[targets_], self.data[self.scores], self._columns().periods(self.time_column), observable=self.data[observable_]==1, window=window, n_boot=n_boot, ci=ci, seed=seed, max_workers=max_workers)
+                  self.result=metrics.with_intervals(self.result, intervals_)
+
+            return self
+
+      def get_graph(self, plot=True, window=None, ci=None, n_boot=1000, seed=None, max_workers=None):
+            from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
             # setup plot details
             rcParams.update(rcParamsDefault)
@@ -60,21 +114,23 @@ class LiftInTimeEvaluator(Evaluator):
             labels = []
 
             n_scores=len(self.scores)
-
-
-            #plot each LIFT curve for each score
-            for i, color in zip(range(n_scores), colors):
-                  target_=self.targets[0]
-                  score_=self.scores[i]
-                  df_=self.data[self.data[target_[1]]==1] #filtering for only target-observable cases
-
-                  lift_by_month=df_.groupby(self.time_column).apply(lambda x: metrics.lift(x[target_[0]], x[score_]) ).to_frame('LIFT')
-                  lift_by_month.reset_index(level=0,inplace=True)
-                  _x=lift_by_month[self.time_column].apply(int)
-                  _y=lift_by_month['LIFT']
-                  l, = plt.plot(_x, _y, color=color, lw=2)
-                  lines.append(l)
-                  labels.append(f'{score_}')
+            targets_=[target_[0] for target_ in self.targets]
+
+            #LIFT of all the scores in all the periods for all the targets, without the 'All' margin
+            lift_in_time=self.compute(window=window, ci=ci, n_boot=n_boot, seed=seed, max_workers=max_workers).result.drop(index='All', level=self.time_column)
+            _x=lift_in_time.index.get_level_values(self.time_column).astype(int)
+
+            #plot each LIFT curve for each score, one line style for each target
+            for target_, linestyle in zip(targets_, cycle(linestyles_)):
+                  colors = cycle(colors_)
+                  for i, color in zip(range(n_scores), colors):
+                        score_=self.scores[i]
+                        l, = plt.plot(lift_in_time.loc[target_].index.astype(int), lift_in_time.loc[target_, score_], color=color, linestyle=linestyle, lw=2)
+                        if ci is not None:
+                              #confidence band of the score
+                              plt.fill_between(lift_in_time.loc[target_].index.astype(int), lift_in_time.loc[target_, f'{score_}_lower'], lift_in_time.loc[target_, f'{score_}_upper'], color=color, alpha=0.2)
+                        lines.append(l)
+                        labels.append(f'{score_}' if len(targets_)==1 else f'{score_} ({target_})')
 
             #set plotting parameters
             fig = plt.gcf()
@@ -85,7 +141,7 @@ class LiftInTimeEvaluator(Evaluator):
             #plt.ylim(-0.01,1.03)
             plt.xlabel(self.time_column, axes=ax)
             plt.ylabel('LIFT', axes=ax)
-            plt.title(f'LIFT (10%) in time for target "{self.targets[0][0]}"', axes=ax)
+            plt.title(f'LIFT (10%) in time for {self._targets_caption()}{self._window_caption(window)}', axes=ax)
             ax.legend(lines, labels) #, loc=(0, -.38), prop=dict(size=14)
             ax.grid(True)
 
@@ -95,11 +151,11 @@ class LiftInTimeEvaluator(Evaluator):
             self.graph=f
             self.axis=ax
 
-            plt.close()  
+            plt.close()
 
             return self
 
-      def get_table(self):        
+      def get_table(self, bins=None, window=None, ci=None, n_boot=1000, seed=None, max_workers=None):
             """
             The idea is to have a table corresponding to the data shown in graph in a following format (or similar):
                                     
@@ -113,40 +169,36 @@ class LiftInTimeEvaluator(Evaluator):
             All             2.42            ...            ...
 
 
-            Let's implement this using pandas.pivot_table since it will make it easier later to combine different
-            tables into one.
+            The table keeps the layout of pandas.pivot_table (including the 'All' margin) so that it is easy to combine
+            different tables into one. It is computed straight from the numeric columns by metrics.metric_in_time.
+
+            bins: Opt-in approximate mode; number of score bins (the quantiles of the scores) or the bin edges of the histograms
+            of the scores the metric is computed from, the table then has the maximum error the binning can cause for each score
+            in the column '<score>_max_error' (see metrics.BinnedScore). Chunked data always use the histograms, with 10000
+            uniform bins on [0, 1] by default; they are read only once, so for scores outside of [0, 1] the bin edges covering
+            them have to be given as bins (ValueError is raised otherwise).
+
+            window: Rolling or expanding windows of periods instead of each period on its own; k for the trailing k periods
+            (the first periods have shorter windows) or 'expanding' for all the periods so far, each row then holds the LIFT
+            of the window ending with its period. The per period counts of the scores (binned as in metrics.metric_in_windows)
+            are updated as the window slides rather than evaluated for each window again. The 'All' margin stays the same.
+
+            ci: Confidence level e.g. 0.95 to add the bounds of a bootstrap confidence interval of each score as the columns
+            '<score>_lower' and '<score>_upper' (drawn as shaded bands by get_graph). In memory the bounds come from the per period
+            counts of the scores binned into 10000 bins (see metrics.metric_intervals) while the point estimate without bins is exact, so
+            for a score with more distinct values than bins they are the bounds of the binned metric; in the incremental mode they
+            come from the exact counts of the state. The counts are bootstrapped with Poisson weights (see metrics.bootstrap_from_counts),
+            so no rows are resampled and the cost does not grow with the number of rows. n_boot: Number of replicates.
+            seed: Seed of the replicates for reproducible bounds. max_workers: Number of worker processes the replicates are
+            spread over, up to os.cpu_count() by default; a few blocks of replicates are drawn in this process (see metrics._bootstrap_pool).
             """
-    
-            def lift_zipped(x):
-                  """Auxilliary function for calculating Lift in pivot table."""
-                  list_=list(zip(*x))
-                  target_=list_[0]
-                  score_=list_[1]
-                  ts=pd.DataFrame(target_, columns=['target_'])
-                  ts['score_']=score_   
-                              
-                  return metrics.lift(ts['target_'], ts['score_'])
-                  
-            n_scores=len(self.scores)
-
-            tables=[]
-
-            #creating pivot table for each score
-            for i in range(n_scores):          
-                  target_=self.targets[0]
-                  score_=self.scores[i]
-                  df_=self.data[self.data[target_[1]]==1] #filtering for only target-observable cases
-
-                  df_['target_score_']=list(zip(df_[target_[0]], df_[score_]))
 
-                  pt=pd.pivot_table(df_, values=['target_score_'], index=self.time_column, columns=None, aggfunc=lift_zipped, fill_value=None, margins=True, dropna=True, margins_name='All')
-                  pt.columns=[score_]
-                  tables.append(pt)
+            targets_=[target_[0] for target_ in self.targets]
 
-            #gathering the final table together
-            from functools import reduce
-            final_table=reduce(lambda x, y: x.merge(y,left_index=True,right_index=True), tables)
-            final_table=final_table.style.set_table_attributes("style='display:inline'").set_caption(f'Lift on target "{target_[0]}"')  
+            final_table=self.compute(bins, window, ci, n_boot, seed, max_workers).result
+            if len(targets_)==1:
+                  final_table=final_table.loc[targets_[0]]
+            final_table=self._table(final_table, f'Lift on {self._targets_caption()}{self._window_caption(window)}')  
             self.table=final_table
 
             return self
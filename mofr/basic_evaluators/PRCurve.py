@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_
 
 
@@ -13,6 +13,7 @@ class PRCurveEvaluator(Evaluator):
     def __init__(self, data=None, targets=None, scores=None):
         """
         data: The pandas dataframe containing all the necessary columns.
+        It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
 
         targets: These should be the list of binary targets along with their 
         observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
@@ -36,7 +37,25 @@ class PRCurveEvaluator(Evaluator):
           self.scores=scores
           return self      
 
+    @cached
+    def compute(self):
+        """
+        The precision-recall curves behind the graph, without any plotting (neither matplotlib nor IPython
+        is needed): self.result is a dictionary with a dataframe of precision, recall and threshold for each
+        score, on the first target (the last point, recall=0 and precision=1, has no threshold).
+        """
+
+        target_=self.targets[0]
+        #each score is sorted on the target-observable cases only once, for all the curves evaluated on the same data
+        self.result={}
+        for score_ in self.scores:
+            lr_precision, lr_recall, lr_thresholds = self._columns().ranked_score(target_, score_).precision_recall_curve()
+            self.result[score_]=pd.DataFrame({'precision': lr_precision, 'recall': lr_recall, 'threshold': np.r_[lr_thresholds, np.nan]})
+
+        return self
+
     def get_graph(self, isocurves='off', plot=True):
+        from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
         # setup plot details
         rcParams.update(rcParamsDefault)
@@ -59,19 +78,21 @@ class PRCurveEvaluator(Evaluator):
             lines.append(l)
             labels.append('iso-f1 curves')
 
+        target_=self.targets[0]
+        observable_=self._columns().observable(target_[1]) #filtering for only target-observable cases, without copying the other columns
+        y_true_=self.data[target_[0]].to_numpy()[observable_]
+        curves_=self.compute().result
+
         #plot each ROC curve for each score
         for i, color in zip(range(n_scores), colors):
-            target_=self.targets[0]
             score_=self.scores[i]
-            df_=self.data[self.data[target_[1]]==1] #filtering for only target-observable cases
-
-            lr_precision, lr_recall, _ = metrics.precision_recall_curve(df_[target_[0]], df_[score_])
+            lr_precision, lr_recall = curves_[score_]['precision'].to_numpy(), curves_[score_]['recall'].to_numpy()
             l, = plt.plot(lr_recall, lr_precision, color=color, lw=2)
             lines.append(l)
             labels.append(f'{score_}')
 
         #plotting the base line
-        no_skill = len(df_[df_[target_[0]]==1]) / len(df_)
+        no_skill = np.count_nonzero(y_true_==1) / len(y_true_)
         plt.plot([0, 1], [no_skill, no_skill], linestyle='--',color='blue')
 
         #set plotting parameters
@@ -96,5 +117,9 @@ class PRCurveEvaluator(Evaluator):
         return self
 
     def get_table(self):
-        pass
+        """The points of the precision-recall curve of each score (precision, recall and threshold, see compute), one block of rows per score."""
+
+        self.table=self._table(pd.concat(self.compute().result, names=['score', None]), f'PR curves for target "{self.targets[0][0]}"')
+
+        return self
 
@@ -1,10 +1,10 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_
 
 
@@ -13,6 +13,7 @@ class ROCCurveEvaluator(Evaluator):
     def __init__(self, data=None, targets=None, scores=None):
         """
         data: The pandas dataframe containing all the necessary columns.
+        It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
 
         targets: These should be the list of binary targets along with their 
         observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
@@ -36,7 +37,24 @@ class ROCCurveEvaluator(Evaluator):
           self.scores=scores
           return self      
 
+    @cached
+    def compute(self):
+        """
+        The ROC curves behind the graph, without any plotting (neither matplotlib nor IPython is needed):
+        self.result is a dictionary with a dataframe of fpr, tpr and threshold for each score, on the first target.
+        """
+
+        target_=self.targets[0]
+        #each score is sorted on the target-observable cases only once, for all the curves evaluated on the same data
+        self.result={}
+        for score_ in self.scores:
+            _fpr, _tpr, _thresholds = self._columns().ranked_score(target_, score_).roc_curve()
+            self.result[score_]=pd.DataFrame({'fpr': _fpr, 'tpr': _tpr, 'threshold': _thresholds})
+
+        return self
+
     def get_graph(self, plot=True):
+        from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
         # setup plot details
         rcParams.update(rcParamsDefault)
@@ -49,13 +67,12 @@ class ROCCurveEvaluator(Evaluator):
         n_scores=len(self.scores)
         
 
+        curves_=self.compute().result
+
         #plot each ROC curve for each score
         for i, color in zip(range(n_scores), colors):
-            target_=self.targets[0]
             score_=self.scores[i]
-            df_=self.data[self.data[target_[1]]==1] #filtering for only target-observable cases
-
-            _fpr, _tpr, _ = metrics.roc_curve(df_[target_[0]], df_[score_]) 
+            _fpr, _tpr = curves_[score_]['fpr'].to_numpy(), curves_[score_]['tpr'].to_numpy()
             l, = plt.plot(_fpr, _tpr, color=color, lw=2)
             lines.append(l)
             labels.append(f'{score_}')
@@ -87,4 +104,8 @@ class ROCCurveEvaluator(Evaluator):
         return self
 
     def get_table(self):
-        pass
\ No newline at end of file
+        """The points of the ROC curve of each score (fpr, tpr and threshold, see compute), one block of rows per score."""
+
+        self.table=self._table(pd.concat(self.compute().result, names=['score', None]), f'ROC curves for target "{self.targets[0][0]}"')
+
+        return self
\ No newline at end of file
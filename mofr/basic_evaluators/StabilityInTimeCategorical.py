@@ -1,18 +1,26 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
+from mofr.incremental import CategorySharesState
+from mofr.periods import period_shares
 from mofr.basic_evaluators.settings import figsize_, colors_, max_categories_
 
 
 class StabilityInTimeCategoricalEvaluator(Evaluator):
 
+    _predictor_cast='categories' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, predictor_column=None, time_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+      For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+      the chunks are then summarized one by one into counts of each category.
 
       predictor_column: The name of the column containing the categorical predictor.
       There should be no more than 20 unique categories for this perecdictor. Binning should be used
@@ -38,7 +46,47 @@ class StabilityInTimeCategoricalEvaluator(Evaluator):
       self.time_column=time_column
       return self 
 
+    def _new_state(self):
+      return CategorySharesState(self.predictor_column, self.time_column)
+
+    @cached
+    def compute(self):
+      """
+      The shares behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result is the share of each category (columns) in each period.
+      """
+      state_=self._incremental()
+      if state_ is not None:
+        #incremental mode, the shares are read from the per-period counts (see append)
+        self.result=state_.shares()
+        return self
+
+      if self._chunked():
+        #chunked mode, the data is an iterable of dataframes summarized chunk by chunk
+        counts_=summaries.category_counts_in_time(self.data, self.predictor_column, self.time_column)
+        n_categories=len(counts_.table().columns)
+        assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
+        assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
+
+        self.result=counts_.shares('count').rename_axis(index=self.time_column, columns=self.predictor_column)
+        return self
+
+      #set up data details (read-only casts of the needed columns, the data itself is not modified)
+      view_=self._columns()
+      categories, codes_=view_.categories(self.predictor_column)
+      n_categories=len(categories)
+
+      #assert the correct number of categories
+      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
+      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
+
+      #produce table of distribution/share of each category in time, from the period index shared by the in-time evaluators
+      self.result=period_shares(view_.periods(self.time_column).crosstab(codes_, categories, name=self.predictor_column))
+
+      return self
+
     def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       # setup plot details
       rcParams.update(rcParamsDefault)
@@ -52,21 +100,11 @@ class StabilityInTimeCategoricalEvaluator(Evaluator):
       """
       lines = []
       labels = []
-      
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      df_['one']=1
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
 
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
-      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
-
-      #  produce table of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_['one'], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose()
+      #shares of each category in time, the categories as computed (also after append or load_state, without the data)
+      crosstab_=self.compute().result
+      categories=list(crosstab_.columns)
+      n_categories=len(categories)
 
       #plot each curve for each category
       for i, color in zip(range(n_categories), colors):
@@ -112,21 +150,9 @@ class StabilityInTimeCategoricalEvaluator(Evaluator):
       ------------------------------------------------------------
       All             0.42            ...            ...
       """
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      df_['one']=1
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
-
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
-      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
 
-      #produce table of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_['one'], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose()  
-      final_table=crosstab_.style.set_table_attributes("style='display:inline'").set_caption(f'Distribution of predictor "{self.predictor_column}" in time')  
+      self.compute()
+      final_table=self._table(self.result, f'Distribution of predictor "{self.predictor_column}" in time')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
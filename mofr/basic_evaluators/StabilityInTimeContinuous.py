@@ -1,18 +1,25 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
+from mofr.incremental import PercentilesState
 from mofr.basic_evaluators.settings import figsize_, colors_
 
 
 class StabilityInTimeContinuousEvaluator(Evaluator):
 
+    _predictor_cast='as_float' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, predictor_column=None, time_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+      For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+      the percentiles are then computed from a mergeable quantile sketch (see summaries.QuantileSketch).
 
       predictor_column: The name of the column containing the continuous predictor.
       The predictor should be in float format or at least convertible into float.
@@ -36,19 +43,52 @@ class StabilityInTimeContinuousEvaluator(Evaluator):
       self.time_column=time_column
       return self 
 
-    def get_graph(self, plot=True):
+    def _new_state(self):
+      return PercentilesState(self.predictor_column, self.time_column)
+
+    @cached
+    def compute(self, relative_accuracy=None):
+      """
+      The percentiles behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result has the percentiles (columns) of the predictor in each period.
 
-      #percentile functions for the pivot table
-      def percentile_10(x):
-          return np.percentile(x,10)
-      def percentile_25(x):
-          return np.percentile(x,25)
-      def percentile_50(x):
-          return np.percentile(x,50)
-      def percentile_75(x):
-          return np.percentile(x,75)
-      def percentile_90(x):
-          return np.percentile(x,90)
+      relative_accuracy: see get_table.
+      """
+      categories=['percentile_10', 'percentile_25', 'percentile_50', 'percentile_75', 'percentile_90']
+
+      state_=self._incremental()
+      if state_ is not None and relative_accuracy is not None:
+        raise ValueError('The relative accuracy is not available in the incremental mode, the percentiles are read from the exact per-period state!')
+      if state_ is not None:
+        #incremental mode, the percentiles of each period were computed when it was appended (see append)
+        pt=state_.percentiles()
+        pt.columns=categories
+        self.result=pt
+        return self
+
+      if self._chunked() or relative_accuracy is not None:
+        #sketch mode, the data (or each of its chunks) is summarized into a mergeable quantile sketch
+        chunks_=self.data if self._chunked() else [self.data]
+        sketch_=summaries.quantile_sketch_in_time(chunks_, self.predictor_column, self.time_column, relative_accuracy or 0.01)
+        pt=sketch_.quantiles([0.1, 0.25, 0.5, 0.75, 0.9])
+        pt.columns=categories
+        pt.index.name=self.time_column
+
+        self.result=pt
+        return self
+
+      #set up data details (read-only casts of the needed columns, the data itself is not modified)
+      view_=self._columns()
+
+      #  produce table of distribution/share in time, all the percentiles of each period from one sort
+      pt=metrics.quantiles_by_group(view_.as_float(self.predictor_column), view_.periods(self.time_column), [0.1, 0.25, 0.5, 0.75, 0.9])
+      pt.columns=categories
+      self.result=pt
+
+      return self
+
+    def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       # setup plot details
       rcParams.update(rcParamsDefault)
@@ -62,18 +102,11 @@ class StabilityInTimeContinuousEvaluator(Evaluator):
       """
       lines = []
       labels = []
-      
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      #df_['one']=1
-      categories=['percentile_10', 'percentile_25', 'percentile_50', 'percentile_75', 'percentile_90']
-      n_categories=len(categories)
 
-      #  produce table of distribution/share in time
-      pt=pd.pivot_table(df_, values=self.predictor_column, index=self.time_column, columns=None, aggfunc=[percentile_10,percentile_25,percentile_50, percentile_75, percentile_90], fill_value=None, margins=False, dropna=True, margins_name='All')
-      pt.columns=[pt.columns[x][0] for x in range(len(pt.columns))]
+      #percentiles of each period, exact
+      pt=self.compute().result
+      categories=list(pt.columns)
+      n_categories=len(categories)
 
       #plot each curve for each category
       for i, color in zip(range(n_categories), colors):
@@ -106,7 +139,7 @@ class StabilityInTimeContinuousEvaluator(Evaluator):
       return self
     
 
-    def get_table(self):
+    def get_table(self, relative_accuracy=None):
       """
       The idea is to have a table corresponding to the data shown in graph in a following format (or similar):
                               
@@ -118,33 +151,13 @@ class StabilityInTimeContinuousEvaluator(Evaluator):
       202003          0.54            ...            ...
       ------------------------------------------------------------
       All             0.42            ...            ...
-      """
-      #percentile functions for the pivot table
-      def percentile_10(x):
-          return np.percentile(x,10)
-      def percentile_25(x):
-          return np.percentile(x,25)
-      def percentile_50(x):
-          return np.percentile(x,50)
-      def percentile_75(x):
-          return np.percentile(x,75)
-      def percentile_90(x):
-          return np.percentile(x,90)
-      
-      #set up data details
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      #df_['one']=1
-      categories=['percentile_10', 'percentile_25', 'percentile_50', 'percentile_75', 'percentile_90']
-      n_categories=len(categories)
 
-      #  produce table of distribution/share in time
-      pt=pd.pivot_table(df_, values=self.predictor_column, index=self.time_column, columns=None, aggfunc=[percentile_10,percentile_25,percentile_50, percentile_75, percentile_90], fill_value=None, margins=False, dropna=True, margins_name='All')
-      pt.columns=[pt.columns[x][0] for x in range(len(pt.columns))]
+      relative_accuracy: None for exact percentiles, or the relative error (e.g. 0.01) of the approximate
+      percentiles from summaries.QuantileSketch. Chunked data always use the sketch (with 0.01 by default).
+      """
 
-      #produce table of distribution/share of each category in time
-      final_table=pt.style.set_table_attributes("style='display:inline'").set_caption(f'Distribution of predictor "{self.predictor_column}" in time')  
+      self.compute(relative_accuracy)
+      final_table=self._table(self.result, f'Distribution of predictor "{self.predictor_column}" in time')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
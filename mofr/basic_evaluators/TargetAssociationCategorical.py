@@ -1,18 +1,25 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
+import mofr.summaries as summaries
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
+from mofr.periods import period_shares
 from mofr.basic_evaluators.settings import figsize_, colors_, max_categories_
 
 
 class TargetAssociationCategoricalEvaluator(Evaluator):
 
+    _predictor_cast='categories' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, targets=None, predictor_column=None, time_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+      For get_table it can also be an iterable of dataframes (chunks) e.g. pd.read_csv(..., chunksize=...),
+      the chunks are then summarized one by one into counts of each category.
 
       targets: These should be the list of binary targets along with their 
       observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
@@ -47,7 +54,45 @@ class TargetAssociationCategoricalEvaluator(Evaluator):
       self.time_column=time_column
       return self 
 
+    @cached
+    def compute(self):
+      """
+      The numbers behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result is the share of each category (columns) in the sum of the
+      first target over the target-observable cases of each period, i.e. pd.crosstab(..., values=target,
+      aggfunc=sum, normalize='columns').transpose(), plus the 'All' margin over all the periods.
+      These are not the default rates of the categories, the shares of a period sum to 1.
+      """
+
+      if self._chunked():
+        #chunked mode, the data is an iterable of dataframes summarized chunk by chunk
+        counts_=summaries.category_counts_in_time(self.data, self.predictor_column, self.time_column, target=self.targets[0])
+        n_categories=len(counts_.table().columns)
+        assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
+        assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
+
+        self.result=counts_.shares('sum', margins=True).rename_axis(index=self.time_column, columns=self.predictor_column)
+        return self
+
+      #set up data details
+      target_=self.targets[0]
+      view_=self._columns()
+      observable_=view_.observable(target_[1]) #filtering for only target-observable cases
+      all_categories, codes_=view_.categories(self.predictor_column)
+      categories=[all_categories[code] for code in pd.unique(codes_[observable_])]
+      n_categories=len(categories)
+
+      #assert the correct number of categories
+      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
+      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
+
+      #produce table of distribution/share of each category in time, from the period index shared by the in-time evaluators
+      self.result=period_shares(view_.periods(self.time_column).crosstab(codes_, all_categories, values=self.data[target_[0]], mask=observable_, name=self.predictor_column), margins=True)
+
+      return self
+
     def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       # setup plot details
       rcParams.update(rcParamsDefault)
@@ -62,20 +107,14 @@ class TargetAssociationCategoricalEvaluator(Evaluator):
       lines = []
       labels = []
       
-      #set up data details
-      target_=self.targets[0]
-      df_=self.data[self.data[target_[1]]==1]#filtering for only target-observable cases
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
+      #default rate of each category in time, without the 'All' margin
+      crosstab_=self.compute().result.drop(index='All')
 
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
-      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
-
-      #  produce tablepd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_['one'], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose() of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_[target_[0]], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose()
+      #the categories in the order of their first appearance among the target-observable cases
+      view_=self._columns()
+      all_categories, codes_=view_.categories(self.predictor_column)
+      categories=[all_categories[code] for code in pd.unique(codes_[view_.observable(self.targets[0][1])])]
+      n_categories=len(categories)
 
       #plot each curve for each category
       for i, color in zip(range(n_categories), colors):
@@ -110,21 +149,8 @@ class TargetAssociationCategoricalEvaluator(Evaluator):
 
     def get_table(self):
 
-      #set up data details
-      target_=self.targets[0]
-      df_=self.data[self.data[target_[1]]==1]#filtering for only target-observable cases
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
-
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique categories!'
-      assert n_categories<=max_categories_, f'The predictor column specified has more than {max_categories_} unique categories!'
-
-      #produce table of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_[target_[0]], rownames=None, colnames=None, aggfunc=sum, margins=True, margins_name='All', dropna=True, normalize='columns').transpose()
-      final_table=crosstab_.style.set_table_attributes("style='display:inline'").set_caption(f'Target association (default rate) of predictor "{self.predictor_column}" in time')  
+      self.compute()
+      final_table=self._table(self.result, f'Target association (default rate) of predictor "{self.predictor_column}" in time')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
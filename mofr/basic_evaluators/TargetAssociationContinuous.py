@@ -1,18 +1,61 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
 from itertools import cycle
 
 import mofr.metrics as metrics
 from mofr.evaluator import Evaluator
+from mofr.cache import cached
 from mofr.basic_evaluators.settings import figsize_, colors_, max_categories_
 
 
+def _aggregations(periods, binned, y_true, observable, margins_name='All'):
+    """Count, sum, mean and logodds of the target for each (bin, period) of the target-observable cases,
+    in the layout of pd.pivot_table(..., margins=True) with the bins in the index and the periods in the
+    columns. Computed by bincounts over the period codes of the periods.PeriodIndex, bins or periods
+    without any observations are left out."""
+
+    #bin of each observable row, -1 for the other rows
+    codes=np.full(len(observable), -1, dtype=np.int64)
+    codes[observable]=binned.cat.codes
+    n_bins=len(binned.cat.categories)
+
+    count=periods.table(codes, n_bins).T
+    sum_=periods.table(codes, n_bins, y_true).T
+    integer=np.issubdtype(np.asarray(y_true).dtype, np.integer)
+
+    return _aggregate(count, sum_, binned.cat.categories, binned.name, periods, integer, margins_name)
+
+
+def _aggregate(count, sum_, bins, name, periods, integer=False, margins_name='All'):
+    """The aggregations of _aggregations from the counts and the sums of the target of each (bin, period),
+    arrays of shape (n_bins, n_periods), e.g. of a binning shared with other evaluators."""
+
+    rows=count.sum(axis=1)>0
+    columns=count.sum(axis=0)>0
+    count, sum_=count[rows][:, columns], sum_[rows][:, columns]
+
+    #adding the margins
+    count=np.block([[count, count.sum(axis=1, keepdims=True)], [count.sum(axis=0, keepdims=True), count.sum()]]).astype(np.int64)
+    sum_=np.block([[sum_, sum_.sum(axis=1, keepdims=True)], [sum_.sum(axis=0, keepdims=True), sum_.sum()]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean_=sum_/count
+        logodds_=np.where(mean_==1.0, -10.0, np.where(mean_==0.0, 10.0, np.log(mean_/(1-mean_))))
+    if integer:
+        sum_=sum_.astype(np.int64)
+
+    index=pd.Index(list(bins[rows])+[margins_name], dtype=object, name=name)
+    columns=pd.Index(list(periods.periods[columns])+[margins_name], dtype=object, name=periods.name)
+    return {name: pd.DataFrame(values, index=index, columns=columns) for name, values in [('count', count), ('sum', sum_), ('mean', mean_), ('logodds_', logodds_)]}
+
+
 class TargetAssociationContinuousEvaluator(Evaluator):
 
+    _predictor_cast='as_float' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, targets=None, predictor_column=None, time_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
 
       targets: These should be the list of binary targets along with their 
       observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
@@ -45,7 +88,34 @@ class TargetAssociationContinuousEvaluator(Evaluator):
       self.time_column=time_column
       return self 
 
+    @cached
+    def compute(self):
+      """
+      The aggregations behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result has the count, sum, mean and logodds_ (column groups) of the first
+      target for each bin of the predictor (rows) and each period, with the 'All' margins.
+      """
+      #set up data details
+      target_=self.targets[0]
+      view_=self._columns()
+      observable_=view_.observable(target_[1]) #filtering for only target-observable cases
+      predictor_=view_.as_float(self.predictor_column)[observable_]
+      categories=list(predictor_.unique())
+      n_categories=len(categories)
+
+      #assert the correct number of categories
+      assert n_categories>=2,  'The predictor column specified has less than 2 unique values!'
+
+      #binning the numerical predictor into 5 intervals of equal length (not equal number of observations)
+      binned_=pd.cut(predictor_, bins=5).rename(self.predictor_column+'_binned')
+
+      #  produce table of count, sum, mean and logodds, from the period index shared by the in-time evaluators
+      self.result=pd.concat(_aggregations(view_.periods(self.time_column), binned_, self.data[target_[0]].to_numpy(), observable_), axis=1)
+
+      return self
+
     def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       # setup plot details
       rcParams.update(rcParamsDefault)
@@ -61,32 +131,10 @@ class TargetAssociationContinuousEvaluator(Evaluator):
       lines = []
       labels = []
       
-      #set up data details
       target_=self.targets[0]
-      df_=self.data[self.data[target_[1]]==1]#filtering for only target-observable cases
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
-
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique values!'
-
-      #binning the numerical predictor into 5 intervals of equal length (not equal number of observations)
-      df_[self.predictor_column+'_binned']=pd.cut(df_[self.predictor_column], bins=5)
-
-      #auxilliary function for calculating logodds
-      def logodds_(x):
-        mean_=np.mean(x)
-        if mean_==1.0:
-            return -10.0
-        if mean_==0.0:
-            return 10.0
-        else:
-            return np.log(mean_/(1-mean_))
 
-      #  produce table 
-      crosstab_=pd.crosstab(index=df_[self.predictor_column+'_binned'], columns=df_[self.time_column], values=df_[target_[0]], rownames=None, colnames=None, aggfunc=logodds_, margins=True, margins_name='All', dropna=True, normalize=False).iloc[:-1]
+      #  table of logodds (-10 for mean 1, 10 for mean 0) without the 'All' row
+      crosstab_=self.compute().result['logodds_'].iloc[:-1]
 
       #plot each curve for each category
       for i, color in zip(range(len(crosstab_.columns)), colors):
@@ -120,33 +168,9 @@ class TargetAssociationContinuousEvaluator(Evaluator):
     
 
     def get_table(self):
-      #set up data details
-      target_=self.targets[0]
-      df_=self.data[self.data[target_[1]]==1]#filtering for only target-observable cases
-      df_[self.predictor_column]=df_[self.predictor_column].apply(float)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      categories=list(df_[self.predictor_column].unique())
-      n_categories=len(categories)
 
-      #assert the correct number of categories
-      assert n_categories>=2,  'The predictor column specified has less than 2 unique values!'
-
-      #binning the numerical predictor into 5 intervals of equal length (not equal number of observations)
-      df_[self.predictor_column+'_binned']=pd.cut(df_[self.predictor_column], bins=5)
-
-      #auxilliary function for calculating logodds
-      def logodds_(x):
-        mean_=np.mean(x)
-        if mean_==1.0:
-            return -10.0
-        if mean_==0.0:
-            return 10.0
-        else:
-            return np.log(mean_/(1-mean_))
-
-      #  produce table 
-      crosstab_=pd.crosstab(index=df_[self.predictor_column+'_binned'], columns=df_[self.time_column], values=df_[target_[0]], rownames=None, colnames=None, aggfunc=['count','sum','mean',logodds_], margins=True, margins_name='All', dropna=True, normalize=False)
-      final_table=crosstab_.style.set_table_attributes("style='display:inline'").set_caption(f'Different aggregations of target variable "{target_[0]}" vs. the predictor "{self.predictor_column}" values')  
+      self.compute()
+      final_table=self._table(self.result, f'Different aggregations of target variable "{self.targets[0][0]}" vs. the predictor "{self.predictor_column}" values')  
       self.table=final_table
       
-      return self
\ No newline at end of file
+      return self
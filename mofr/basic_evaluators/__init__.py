@@ -1 +1,31 @@
+"""The basic evaluators, each imported on first use e.g. mofr.basic_evaluators.GiniInTimeEvaluator
+(same as from mofr.basic_evaluators.GiniInTime import GiniInTimeEvaluator)."""
 
+import importlib
+
+
+#evaluator classes by the module they are defined in
+_EVALUATORS={'GiniInTimeEvaluator': 'GiniInTime',
+             'KSInTimeEvaluator': 'KSInTime',
+             'LiftInTimeEvaluator': 'LiftInTime',
+             'ROCCurveEvaluator': 'ROCCurve',
+             'PRCurveEvaluator': 'PRCurve',
+             'LiftCurveEvaluator': 'LiftCurve',
+             'HistogramCategoricalEvaluator': 'HistogramCategorical',
+             'HistogramContinuousEvaluator': 'HistogramContinuous',
+             'StabilityInTimeCategoricalEvaluator': 'StabilityInTimeCategorical',
+             'StabilityInTimeContinuousEvaluator': 'StabilityInTimeContinuous',
+             'TargetAssociationCategoricalEvaluator': 'TargetAssociationCategorical',
+             'TargetAssociationContinuousEvaluator': 'TargetAssociationContinuous'}
+
+
+def __getattr__(name):
+    if name in _EVALUATORS:
+        value=getattr(importlib.import_module(f'{__name__}.{_EVALUATORS[name]}'), name)
+        globals()[name]=value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals())+list(_EVALUATORS))
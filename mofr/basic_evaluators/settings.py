@@ -4,3 +4,4 @@ colors_ = ['navy', 'turquoise', 'darkorange', 'cornflowerblue', 'teal',
            'mediumblue', 'darkturquoise', 'orange', 'blue', 'darkorchid'] #['navy', 'turquoise', 'darkorange', 'cornflowerblue', 'teal']
 max_categories_=20
 big_figsize_=(7*7+2, 8*2)
+linestyles_=['-', '--', ':', '-.']
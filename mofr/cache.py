@@ -0,0 +1,267 @@
+""" Cache of the evaluator results.
+
+The same evaluators are often run again and again on unchanged data (in a
+notebook, in scheduled reports). With a cache the result of compute (and so
+of get_table and get_graph) is looked up by a key made of
+
+a fingerprint of the content of the referenced columns (targets, scores,
+time column, predictor) - a blake2b hash of their values, so a copy of the
+same data hits the cache and any change of the data misses it,
+the evaluator class and its parameters (settings and compute arguments).
+
+Two backends, both evicting the least recently used results once their size
+(in bytes) exceeds max_bytes:
+
+MemoryCache: in-memory LRU, for a notebook session.
+DiskCache: pickled results in a directory, shared by processes and runs.
+
+from mofr.cache import MemoryCache, DiskCache, set_default_cache
+set_default_cache(MemoryCache(max_bytes=256*2**20))   #all the evaluators
+GiniInTimeEvaluator().d(df).t(targets).s(scores).tc('month').c(DiskCache('/tmp/mofr')).get_table()   #one evaluator
+
+The fingerprint of the data is computed once per evaluator and kept until
+one of its inputs is set again (d, t, s, tc, pc), so the dataframe should
+not be modified in place in between. Chunked data and the incremental mode
+(see mofr.incremental) are never cached."""
+
+import copy
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import sys
+import tempfile
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from mofr.dataset import EvaluationDataset
+
+
+_default_cache=None
+
+
+def set_default_cache(cache=None):
+    """Cache used by all the evaluators without their own (see Evaluator.c), None to turn caching off."""
+
+    global _default_cache
+    _default_cache=cache
+
+
+def get_default_cache():
+    return _default_cache
+
+
+def fingerprint(data, column):
+    """Digest of the name, type and values of one column of a dataframe or EvaluationDataset."""
+
+    h=hashlib.blake2b(digest_size=16)
+    h.update(repr((column, len(data))).encode())
+    values=data._values[column] if isinstance(data, EvaluationDataset) else data[column]
+    for part in (values if isinstance(values, tuple) else (values,)):
+        if isinstance(part, pd.Series) and part.dtype.kind not in 'biufcmM':
+            #strings, categoricals etc. have no fixed size buffer, they are hashed value by value
+            part=pd.util.hash_pandas_object(part, index=False).to_numpy()
+        array=np.asarray(part)
+        if array.dtype.kind=='O':
+            array=pd.util.hash_pandas_object(pd.Series(array), index=False).to_numpy()
+        h.update(str(array.dtype).encode())
+        h.update(memoryview(np.ascontiguousarray(array)).cast('B'))
+    return h.digest()
+
+
+def _columns(evaluator):
+    """The columns of the data read by the evaluator."""
+
+    columns=[column for target_ in getattr(evaluator, 'targets', None) or [] for column in target_]
+    columns+=list(getattr(evaluator, 'scores', None) or [])
+    columns+=[getattr(evaluator, setting, None) for setting in ['time_column', 'predictor_column']]
+    return list(dict.fromkeys(column for column in columns if column is not None))
+
+
+def _parameters(evaluator):
+    return (type(evaluator).__module__, type(evaluator).__name__,
+            getattr(evaluator, 'targets', None), getattr(evaluator, 'scores', None),
+            getattr(evaluator, 'time_column', None), getattr(evaluator, 'predictor_column', None))
+
+
+def key(evaluator, args=(), kwargs=None):
+    """Cache key of the result of evaluator.compute(*args, **kwargs) on its current data."""
+
+    data_key=evaluator.__dict__.get('_data_key')
+    if data_key is None:
+        h=hashlib.blake2b(digest_size=16)
+        for column in _columns(evaluator):
+            h.update(fingerprint(evaluator.data, column))
+        data_key=evaluator.__dict__['_data_key']=h.hexdigest()
+
+    h=hashlib.blake2b(data_key.encode(), digest_size=20)
+    h.update(repr((_parameters(evaluator), tuple(map(_argument, args)), sorted((name, _argument(value)) for name, value in (kwargs or {}).items()))).encode())
+    return h.hexdigest()
+
+
+def _argument(value):
+    """An argument of compute as it goes into the key; the repr of a long array is abbreviated, so arrays
+    (e.g. bin edges) are represented by a hash of their values."""
+
+    if isinstance(value, np.ndarray):
+        return ('ndarray', str(value.dtype), value.shape, hashlib.blake2b(np.ascontiguousarray(value).tobytes(), digest_size=16).hexdigest())
+    return value
+
+
+def sizeof(value):
+    """Approximate memory taken by a result, in bytes."""
+
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(sizeof(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class MemoryCache:
+    """In-memory cache of results, the least recently used are evicted once they take more than max_bytes."""
+
+    def __init__(self, max_bytes=256*2**20):
+        self.max_bytes=max_bytes
+        self._items=OrderedDict()
+        self.nbytes=0
+        self.hits=0
+        self.misses=0
+
+    def get(self, key):
+        """Copy of the cached result (so the cached one is never modified), None if missing."""
+
+        if key not in self._items:
+            self.misses+=1
+            return None
+        self.hits+=1
+        self._items.move_to_end(key)
+        return copy.deepcopy(self._items[key][0])
+
+    def put(self, key, value):
+        size=sizeof(value)
+        if key in self._items:
+            self.nbytes-=self._items.pop(key)[1]
+        if size>self.max_bytes:
+            return
+        self._items[key]=(copy.deepcopy(value), size)
+        self.nbytes+=size
+        while self.nbytes>self.max_bytes:
+            self.nbytes-=self._items.popitem(last=False)[1][1]
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes=0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return f'MemoryCache({len(self)} results, {self.nbytes} of {self.max_bytes} bytes, {self.hits} hits, {self.misses} misses)'
+
+
+class DiskCache:
+    """Results pickled into a directory, one file per key. The least recently used files are
+    deleted once they take more than max_bytes."""
+
+    def __init__(self, directory, max_bytes=2**30):
+        self.directory=directory
+        self.max_bytes=max_bytes
+        self.hits=0
+        self.misses=0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def get(self, key):
+        path=self._path(key)
+        try:
+            with open(path, 'rb') as f:
+                value=pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            self.misses+=1
+            return None
+        os.utime(path) #the modification time marks the last use
+        self.hits+=1
+        return value
+
+    def put(self, key, value):
+        #written to a temporary file first, so other processes never read a partial result
+        fd, tmp=tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self._path(key))
+        self._evict()
+
+    def _files(self):
+        files=[]
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.pkl'):
+                try:
+                    stat=entry.stat()
+                except FileNotFoundError: #deleted by another process
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(files)
+
+    def _evict(self):
+        files=self._files()
+        nbytes=sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if nbytes<=self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            nbytes-=size
+
+    @property
+    def nbytes(self):
+        return sum(size for _, size, _ in self._files())
+
+    def clear(self):
+        for _, _, path in self._files():
+            os.remove(path)
+
+    def __len__(self):
+        return len(self._files())
+
+    def __repr__(self):
+        return f'DiskCache({self.directory!r}, {len(self)} results, {self.nbytes} of {self.max_bytes} bytes)'
+
+
+def cached(compute):
+    """Decorator of the compute methods of the evaluators: self.result is looked up in the cache of
+    the evaluator (or the default cache) before it is computed and stored there after."""
+
+    signature=inspect.signature(compute)
+
+    @functools.wraps(compute)
+    def wrapper(self, *args, **kwargs):
+        cache=self.__dict__.get('result_cache')
+        cache=_default_cache if cache is None else cache
+        if cache is None or self._chunked() or self._incremental() is not None:
+            return compute(self, *args, **kwargs)
+
+        #all the arguments by name with the defaults filled in, so positional and keyword calls share the key
+        arguments=signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        key_=key(self, kwargs=dict(list(arguments.arguments.items())[1:]))
+        result=cache.get(key_)
+        if result is not None:
+            self.result=result
+            return self
+        compute(self, *args, **kwargs)
+        cache.put(key_, self.result)
+        return self
+
+    return wrapper
@@ -0,0 +1,108 @@
+""" Read-only access to the columns of the evaluated data.
+
+The evaluators need the predictor as strings or floats, the time column as
+integers and the observability flags as boolean masks. ColumnView casts
+only the columns that are asked for, with vectorized astype, and keeps the
+results, so repeated get_graph/get_table calls on the same data do not
+convert them again. The same goes for the period index and the sorted
+scores, so evaluators sharing a view (see report.Report) share them too. The caller's dataframe is never modified and no helper
+columns are added to it."""
+
+import numpy as np
+import pandas as pd
+
+from mofr.periods import PeriodIndex
+from mofr.metrics import RankedScore, RankedScoreByGroup
+
+
+def as_str(x):
+    """The series converted to strings, missing values included ('nan', 'None').
+    astype(str) keeps them missing in recent pandas, so they would drop out of the categories.
+    Only the distinct values are converted, the rows take them by their factorized codes."""
+
+    codes, uniques=pd.factorize(x, use_na_sentinel=False)
+    return pd.Series(np.array([str(value) for value in uniques], dtype=object)[codes], index=x.index, name=x.name)
+
+
+class ColumnView:
+    """Cached, read-only casts of the columns of a dataframe.
+
+    view=ColumnView(df)
+    view.as_str('predictor'), view.as_int('month'), view.observable('target_obs')
+    categories, codes=view.categories('predictor')
+
+    The casts are cached by column name, so the view assumes that the
+    dataframe is not modified in place while it is used; evaluators create a
+    new view whenever they are given a new dataframe.
+    """
+
+    def __init__(self, data):
+        self.data=data
+        self._cache={}
+
+    def __getitem__(self, column):
+        return self.data[column]
+
+    def _cached(self, kind, column, cast):
+        key=(kind, column)
+        if key not in self._cache:
+            self._cache[key]=cast(self.data[column])
+        return self._cache[key]
+
+    def as_str(self, column):
+        """The column converted to strings (missing values become 'nan')."""
+
+        return self._cached('str', column, as_str)
+
+    def as_int(self, column):
+        """The column converted to 64-bit integers e.g. the time column."""
+
+        return self._cached('int', column, lambda x: x.astype(np.int64))
+
+    def as_float(self, column):
+        """The column converted to floats."""
+
+        return self._cached('float', column, lambda x: x.astype(np.float64))
+
+    def observable(self, column):
+        """Boolean mask of the rows with the observability flag equal to 1."""
+
+        return self._cached('observable', column, lambda x: (x==1).to_numpy())
+
+    def periods(self, column):
+        """PeriodIndex of the time column (converted to integers), shared by all the
+        in-time evaluations of the data."""
+
+        key=('periods', column)
+        if key not in self._cache:
+            self._cache[key]=PeriodIndex(self.as_int(column), name=column)
+        return self._cache[key]
+
+    def ranked_score(self, target, score):
+        """metrics.RankedScore of the score on the target-observable cases, target
+        being a (target, observability flag) pair. Shared by the ROC, PR and lift curves."""
+
+        key=('ranked_score', tuple(target), score)
+        if key not in self._cache:
+            observable=self.observable(target[1])
+            self._cache[key]=RankedScore(self.data[target[0]].to_numpy()[observable], self.data[score].to_numpy()[observable])
+        return self._cache[key]
+
+    def ranked_by_period(self, scores, time_column):
+        """metrics.RankedScoreByGroup of the scores by period (with the 'All' margin),
+        shared by the Gini, KS and lift in time of all the targets."""
+
+        key=('ranked_by_period', tuple(scores), time_column)
+        if key not in self._cache:
+            self._cache[key]=RankedScoreByGroup(self.data[list(scores)].to_numpy(), self.periods(time_column), margins=True)
+        return self._cache[key]
+
+    def categories(self, column):
+        """Distinct values of the column converted to strings, in the order of
+        their first appearance, and the integer code of each row."""
+
+        key=('categories', column)
+        if key not in self._cache:
+            codes, uniques=pd.factorize(self.as_str(column))
+            self._cache[key]=(list(uniques), codes)
+        return self._cache[key]
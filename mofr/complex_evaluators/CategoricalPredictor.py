@@ -1,13 +1,13 @@
 import pandas as pd
 import numpy as np
-from matplotlib import pyplot as plt, rcParams, rcParamsDefault
-import matplotlib
 from itertools import cycle
-from IPython.display import display
 
 
 import mofr.metrics as metrics
 from mofr.evaluator import Evaluator
+from mofr.table import _display
+from mofr.cache import cached
+from mofr.periods import period_shares
 from mofr.basic_evaluators.settings import big_figsize_,figsize_, colors_, max_categories_
 from mofr.basic_evaluators.HistogramCategorical import HistogramCategoricalEvaluator
 
@@ -15,9 +15,12 @@ from mofr.basic_evaluators.HistogramCategorical import HistogramCategoricalEvalu
 
 class CategoricalPredictorEvaluator(Evaluator):
 
+    _predictor_cast='categories' #how the predictor is read from the ColumnView
+
     def __init__(self, data=None, targets=None, predictor_column=None, time_column=None):
       """
       data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
 
       predictor_column: The name of the column containing the categorical predictor.
       There should be no more than 20 unique categories for this predictor. Binning should be used
@@ -52,7 +55,32 @@ class CategoricalPredictorEvaluator(Evaluator):
       self.time_column=time_column
       return self 
 
-    def get_graph(self):
+    def _parts(self):
+      """The histogram, stability in time and target association evaluators of the predictor,
+      sharing the casts, the period index and the result cache of this evaluator."""
+
+      from mofr.basic_evaluators.StabilityInTimeCategorical import StabilityInTimeCategoricalEvaluator
+      from mofr.basic_evaluators.TargetAssociationCategorical import TargetAssociationCategoricalEvaluator
+
+      hcae=HistogramCategoricalEvaluator().d(self.data).pc(self.predictor_column)
+      sitcae=StabilityInTimeCategoricalEvaluator().d(self.data).pc(self.predictor_column).tc(self.time_column)
+      tacae=TargetAssociationCategoricalEvaluator().d(self.data).t([(self.targets[0][0], self.targets[0][1])]).pc(self.predictor_column).tc(self.time_column)
+      return [part._share_columns(self._columns()).c(self.__dict__.get('result_cache')) for part in [hcae, sitcae, tacae]]
+
+    @cached
+    def compute(self):
+      """
+      The numbers behind the tables, without any plotting or styling (neither matplotlib nor IPython
+      is needed): self.result is the list of the results of the histogram, the stability in time and
+      the target association of the predictor (see their compute).
+      """
+
+      self.result=[part.compute().result for part in self._parts()]
+
+      return self
+
+    def get_graph(self, plot=True):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
 
       rcParams.update({'font.size': 24})
       rcParams.update({'font.weight': 'bold'})
@@ -63,11 +91,10 @@ class CategoricalPredictorEvaluator(Evaluator):
 
       #set up data details
       target_=self.targets[0]
-      df_=self.data
-      df_[self.predictor_column]=df_[self.predictor_column].apply(str)
-      df_[self.time_column]=df_[self.time_column].apply(int)
-      df_['one']=1
-      categories=list(df_[self.predictor_column].unique())
+      view_=self._columns() #read-only casts of the needed columns, the data itself is not modified
+      predictor_=view_.as_str(self.predictor_column)
+      periods_=view_.periods(self.time_column)
+      categories, codes_=view_.categories(self.predictor_column)
       n_categories=len(categories)  
 
       #assert the correct number of categories
@@ -76,7 +103,7 @@ class CategoricalPredictorEvaluator(Evaluator):
 
       # Histogram part
       #  produce table of distribution/share of each category in time
-      table=df_['categorical_predictor'].value_counts(dropna=False, normalize=True)
+      table=predictor_.value_counts(dropna=False, normalize=True)
 
 
       #set plotting parameters
@@ -89,7 +116,7 @@ class CategoricalPredictorEvaluator(Evaluator):
 
       # Stability in time part
       # produce table of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_['one'], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose()
+      crosstab_=period_shares(periods_.crosstab(codes_, categories, name=self.predictor_column))
       colors = cycle(colors_)
       lines = []
       labels = []  
@@ -115,8 +142,8 @@ class CategoricalPredictorEvaluator(Evaluator):
       ax2.grid(True)
 
       # Target Association part
-      #  produce tablepd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_['one'], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose() of distribution/share of each category in time
-      crosstab_=pd.crosstab(index=df_[self.predictor_column], columns=df_[self.time_column], values=df_[target_[0]], rownames=None, colnames=None, aggfunc=sum, margins=False, margins_name='All', dropna=True, normalize='columns').transpose()
+      #  produce table of distribution/share of each category in time
+      crosstab_=period_shares(periods_.crosstab(codes_, categories, values=self.data[target_[0]], mask=self.data[target_[0]].notna(), name=self.predictor_column))
       colors = cycle(colors_)
       lines = []
       labels = []  
@@ -139,7 +166,12 @@ class CategoricalPredictorEvaluator(Evaluator):
       ax3.legend(lines, labels) #, loc=(0, -.38), prop=dict(size=14)
       ax3.grid(True)      
 
-      plt.show()
+      if plot==True:
+        plt.show()
+
+      self.graph=fig
+      self.axis=[ax1, ax2, ax3]
+
       plt.close()
       
       rcParams.update(rcParamsDefault)
@@ -148,27 +180,19 @@ class CategoricalPredictorEvaluator(Evaluator):
       return self
     
 
-    def get_table(self):
+    def get_table(self, show=True):
+      """
+      Tables of the histogram, the stability in time and the target association of the predictor,
+      kept in self.table as a list and displayed one by one if show is True.
+      """
 
-      # Histogram part 
-      from mofr.basic_evaluators.HistogramCategorical import HistogramCategoricalEvaluator
-      hcae=HistogramCategoricalEvaluator()
-      hcae.d(self.data).pc(self.predictor_column)
-      hcae.get_table()
-      display(hcae.table)
+      parts=self._parts()
+      for part in parts:
+        part.get_table()
+        if show==True:
+          _display(part.table)
 
-      # Stability in time part
-      from mofr.basic_evaluators.StabilityInTimeCategorical import StabilityInTimeCategoricalEvaluator
-      sitcae=StabilityInTimeCategoricalEvaluator()
-      sitcae.d(self.data).pc(self.predictor_column).tc(self.time_column)
-      sitcae.get_table()
-      display(sitcae.table)
+      self.result=[part.result for part in parts]
+      self.table=[part.table for part in parts]
 
-      # Target Association part
-      from mofr.basic_evaluators.TargetAssociationCategorical import TargetAssociationCategoricalEvaluator
-      tacae=TargetAssociationCategoricalEvaluator()
-      tacae.d(self.data).t([(self.targets[0][0], self.targets[0][1])]).pc(self.predictor_column).tc(self.time_column)
-      tacae.get_table()
-      display(tacae.table)
-
-      return self
\ No newline at end of file
+      return self
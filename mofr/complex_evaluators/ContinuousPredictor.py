@@ -0,0 +1,205 @@
+import pandas as pd
+import numpy as np
+from itertools import cycle
+
+
+from mofr.evaluator import Evaluator
+from mofr.table import _display
+from mofr.cache import cached
+from mofr.periods import period_shares
+from mofr.basic_evaluators.settings import big_figsize_, colors_
+from mofr.basic_evaluators.TargetAssociationContinuous import _aggregate
+
+
+class ContinuousPredictorEvaluator(Evaluator):
+
+    _predictor_cast='as_float' #how the predictor is read from the ColumnView
+
+    def __init__(self, data=None, targets=None, predictor_column=None, time_column=None):
+      """
+      data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+
+      predictor_column: The name of the column containing the continuous predictor.
+      The predictor should be in float format or at least convertible into float.
+
+      targets: These should be the list of binary targets along with their
+      observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
+      Only the first target will be displayed in the graph at the moment.
+
+      time_column: The name of the column containing the time information. This should be an integer or at least convertible to integer
+      e.g. 2019 for year, 202110 for month, 20211001 for day etc.
+      """
+      self.data=data
+      self.targets=targets
+      self.predictor_column=predictor_column
+      self.time_column=time_column
+
+    def d(self, data=None):
+      self.data=data
+      return self
+
+    def t(self, targets=None):
+      self.targets=targets
+      return self
+
+    def pc(self, predictor_column=None):
+      self.predictor_column=predictor_column
+      return self
+
+    def tc(self, time_column=None):
+      self.time_column=time_column
+      return self
+
+    def _cube(self, bins):
+      """
+      Quantile bins of the predictor and, for each (period, bin), the number of all the observations,
+      the number of the target-observable ones and the sum of the first target over them. The predictor
+      is cast and binned only once and the histogram, the stability in time and the target association
+      are all derived from these counts.
+      """
+
+      target_=self.targets[0]
+      view_=self._columns()
+      periods_=view_.periods(self.time_column)
+      observable_=view_.observable(target_[1])
+
+      #one binning pass, bin of each row (-1 for missing values)
+      binned_=pd.qcut(view_.as_float(self.predictor_column), q=bins, duplicates='drop')
+      codes_=binned_.cat.codes.to_numpy()
+      n_bins=len(binned_.cat.categories)
+
+      #assert the correct number of bins
+      assert n_bins>=2, 'The predictor column specified has less than 2 unique values!'
+
+      y_=np.asarray(self.data[target_[0]])
+      count_=periods_.table(codes_, n_bins)
+      count_observable_=periods_.table(codes_, n_bins, mask=observable_)
+      sum_=periods_.table(codes_, n_bins, y_, mask=observable_)
+
+      return binned_.cat.categories, periods_, count_, count_observable_, sum_, np.issubdtype(y_.dtype, np.integer)
+
+    @cached
+    def compute(self, bins=10):
+      """
+      The numbers behind the graph and the tables, without any plotting or styling (neither matplotlib nor IPython
+      is needed): self.result is the list of the histogram (count and share of each quantile bin), the stability
+      in time (share of each bin in each period, plus the 'All' margin) and the target association (count, sum,
+      mean and logodds_ of the first target for each bin and period, same layout as TargetAssociationContinuousEvaluator).
+
+      bins: Number of quantile bins of the predictor (fewer if some of the quantiles are equal).
+      """
+
+      categories_, periods_, count_, count_observable_, sum_, integer_=self._cube(bins)
+      name_=self.predictor_column+'_binned'
+
+      # Histogram part, the counts of all the periods
+      total_=count_.sum(axis=0)
+      histogram_=pd.DataFrame({'count': total_.astype(np.int64), 'share': total_/total_.sum()}, index=pd.Index(categories_, dtype=object, name=name_))
+
+      # Stability in time part, the share of each bin in each period
+      crosstab_=pd.DataFrame(count_, index=periods_.periods, columns=pd.Index(categories_, dtype=object, name=name_))
+      stability_=period_shares(crosstab_.loc[count_.sum(axis=1)>0], margins=True).rename_axis(self.time_column)
+
+      # Target Association part, from the counts and target sums of the target-observable cases
+      association_=pd.concat(_aggregate(count_observable_.T, sum_.T, categories_, name_, periods_, integer_), axis=1)
+
+      self.result=[histogram_, stability_, association_]
+
+      return self
+
+    def get_graph(self, plot=True, bins=10):
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
+
+      rcParams.update({'font.size': 24})
+      rcParams.update({'font.weight': 'bold'})
+
+      fig, [ax1, ax2, ax3] = plt.subplots(1, 3, figsize=big_figsize_)
+      fig.suptitle('Continuous Predictor Evaluation', size=40)
+
+      #all the three parts from the same binning of the predictor
+      histogram_, stability_, association_=self.compute(bins).result
+      labels_=[str(bin_) for bin_ in histogram_.index]
+
+      # Histogram part
+      ax1.bar(range(len(labels_)), histogram_['count'].values, color=colors_[0])
+      ax1.set_xticks(range(len(labels_)))
+      ax1.set_xticklabels(labels_, rotation=90, fontsize=14)
+      ax1.set_xlabel(self.predictor_column+'_binned')
+      ax1.set_ylabel('Number of observations')
+      ax1.set_title(f'Histogram of predictor "{self.predictor_column}"')
+      ax1.grid(True)
+
+      # Stability in time part, without the 'All' row
+      crosstab_=stability_.iloc[:-1]
+      colors = cycle(colors_)
+      lines = []
+      labels = []
+
+      #plot each curve for each bin
+      for bin_, label_, color in zip(crosstab_.columns, labels_, colors):
+          l, = ax2.plot(crosstab_.index.astype(int), crosstab_[bin_].values, color=color, lw=2)
+          lines.append(l)
+          labels.append(label_)
+
+      #set plotting parameters
+      fig.subplots_adjust(bottom=0.25)
+      ax2.ticklabel_format(useOffset=False)
+      ax2.set_xticks(range(min(crosstab_.index), max(crosstab_.index)+1))
+      ax2.set_xlabel(self.time_column)
+      ax2.set_ylabel('Share of the given bin')
+      ax2.set_title(f'Distribution of predictor "{self.predictor_column}" in time')
+      ax2.legend(lines, labels, prop=dict(size=12))
+      ax2.grid(True)
+
+      # Target Association part, logodds (-10 for mean 1, 10 for mean 0) without the 'All' row and column
+      crosstab_=association_['logodds_'].iloc[:-1, :-1]
+      colors = cycle(colors_)
+      lines = []
+      labels = []
+
+      #plot each curve for each period
+      for period_, color in zip(crosstab_.columns, colors):
+          l, = ax3.plot(range(len(crosstab_.index)), crosstab_[period_].values, color=color, lw=2)
+          lines.append(l)
+          labels.append(f'{period_}')
+
+      #set plotting parameters
+      ax3.set_xticks(range(len(crosstab_.index)))
+      ax3.set_xticklabels([str(bin_) for bin_ in crosstab_.index], rotation=90, fontsize=14)
+      ax3.set_xlabel(self.predictor_column+'_binned')
+      ax3.set_ylabel('Logodds of the target variable')
+      ax3.set_title(f'Logodds of the target variable "{self.targets[0][0]}" vs. the predictor "{self.predictor_column}" values')
+      ax3.legend(lines, labels, prop=dict(size=12))
+      ax3.grid(True)
+
+      if plot==True:
+        plt.show()
+
+      self.graph=fig
+      self.axis=[ax1, ax2, ax3]
+
+      plt.close()
+
+      rcParams.update(rcParamsDefault)
+
+      return self
+
+    def get_table(self, show=True, bins=10):
+      """
+      Tables of the histogram, the stability in time and the target association of the predictor,
+      all from one binning of the predictor into quantile bins (see compute), kept in self.table
+      as a list and displayed one by one if show is True.
+      """
+
+      self.compute(bins)
+      captions=[f'Distribution of predictor "{self.predictor_column}" in quantile bins',
+                f'Distribution of predictor "{self.predictor_column}" in time',
+                f'Different aggregations of target variable "{self.targets[0][0]}" vs. the predictor "{self.predictor_column}" values']
+
+      self.table=[self._table(result_, caption_) for result_, caption_ in zip(self.result, captions)]
+      if show==True:
+        for table_ in self.table:
+          _display(table_)
+
+      return self
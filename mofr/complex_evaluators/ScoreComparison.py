@@ -0,0 +1,147 @@
+from itertools import cycle
+
+import mofr.metrics as metrics
+from mofr.evaluator import Evaluator
+from mofr.cache import cached
+from mofr.basic_evaluators.settings import figsize_, colors_, linestyles_
+
+
+class ScoreComparisonEvaluator(Evaluator):
+
+    def __init__(self, data=None, targets=None, scores=None, time_column=None):
+      """
+      data: The pandas dataframe containing all the necessary columns.
+      It can also be a mofr.dataset.EvaluationDataset holding only these columns in compact types.
+
+      targets: These should be the list of binary targets along with their
+      observability flags as follows. [('target1','target1_obs'),('target2', 'target2_obs)]
+      All the targets are evaluated, each of them with its own line style in the graph.
+
+      scores: List of score columns as follows ['champion', 'challenger1', 'challenger2'].
+      The first score is the champion, all the others are compared with it.
+
+      time_column: The name of the column containing the time information. This should be an integer e.g.
+      2019 for year, 202110 for month, 20211001 for day etc.
+      """
+      self.data=data
+      self.targets=targets
+      self.scores=scores
+      self.time_column=time_column
+
+    def d(self, data=None):
+      self.data=data
+      return self
+
+    def t(self, targets=None):
+      self.targets=targets
+      return self
+
+    def s(self, scores=None):
+      self.scores=scores
+      return self
+
+    def tc(self, time_column=None):
+      self.time_column=time_column
+      return self
+
+    @cached
+    def compute(self):
+      """
+      The numbers behind the graph and the table, without any plotting or styling (neither matplotlib
+      nor IPython is needed): self.result is the GINI of the champion and of each challenger in all the
+      periods plus the 'All' margin for all the targets, indexed by (target, period), with the difference
+      of each challenger from the champion, its standard error and p-value in the columns '<challenger>_diff',
+      '<challenger>_se' and '<challenger>_pvalue' (see metrics.compare_scores_in_time).
+      """
+
+      assert len(self.scores)>=2, 'There should be a champion and at least one challenger score!'
+
+      targets_=[target_[0] for target_ in self.targets]
+      observable_=[target_[1] for target_ in self.targets]
+
+      #DeLong test of all the challengers in all the periods for all the targets at once, on the ranks sorted once per score
+      self.result=metrics.compare_scores_in_time(self.data[targets_], self.data[self.scores], self._columns().periods(self.time_column), observable=self.data[observable_]==1, ranked=self._columns().ranked_by_period(self.scores, self.time_column))
+
+      return self
+
+    def get_graph(self, plot=True, ci=0.95):
+      """
+      Difference of the GINI of each challenger from the champion in time, with the ci confidence band
+      (normal approximation with the DeLong standard error). The band not crossing zero means a significant difference.
+      """
+      from matplotlib import pyplot as plt, rcParams, rcParamsDefault #only needed for the graphs, see compute for the headless mode
+
+      # setup plot details
+      rcParams.update(rcParamsDefault)
+
+      f, ax = plt.subplots(figsize=figsize_)
+
+      lines = []
+      labels = []
+
+      champion_, challengers_=self.scores[0], self.scores[1:]
+      targets_=[target_[0] for target_ in self.targets]
+      z_=metrics._normal_z(ci)
+
+      #differences of all the challengers in all the periods for all the targets, without the 'All' margin
+      comparison=self.compute().result.drop(index='All', level=self.time_column)
+      _x=comparison.index.get_level_values(self.time_column).astype(int)
+
+      #plot each difference for each challenger with its confidence band, one line style for each target
+      for target_, linestyle in zip(targets_, cycle(linestyles_)):
+          colors = cycle(colors_)
+          for challenger_, color in zip(challengers_, colors):
+              x_=comparison.loc[target_].index.astype(int)
+              diff_, se_=comparison.loc[target_, f'{challenger_}_diff'], comparison.loc[target_, f'{challenger_}_se']
+              l, = plt.plot(x_, diff_, color=color, linestyle=linestyle, lw=2)
+              plt.fill_between(x_, diff_-z_*se_, diff_+z_*se_, color=color, alpha=0.2)
+              lines.append(l)
+              labels.append(f'{challenger_}' if len(targets_)==1 else f'{challenger_} ({target_})')
+      plt.axhline(0, color='black', lw=1)
+
+      #set plotting parameters
+      fig = plt.gcf()
+      fig.subplots_adjust(bottom=0.25)
+      plt.ticklabel_format(useOffset=False)
+      plt.xticks(range(min(_x), max(_x)+1), axes=ax)
+      plt.xlabel(self.time_column, axes=ax)
+      plt.ylabel(f'GINI difference from "{champion_}"', axes=ax)
+      plt.title(f'GINI of the challengers against "{champion_}" for {self._targets_caption()}', axes=ax)
+      ax.legend(lines, labels)
+      ax.grid(True)
+
+      if plot==True:
+          plt.show()
+
+      self.graph=f
+      self.axis=ax
+
+      plt.close()
+
+      return self
+
+    def get_table(self):
+      """
+      The idea is to have a table of the comparison of the challengers with the champion in a following format:
+
+                              GINI of the challengers against "Model1" on 'name of the target column'
+      Time        Model1    Model2    Model2_diff    Model2_se    Model2_pvalue    Model3 ...
+      -------------------------------------------------------------------------------------------
+      202001      0.42      0.45      0.03           0.012        0.012            ...
+      202002      0.40      0.44      0.04           0.013        0.002            ...
+      -------------------------------------------------------------------------------------------
+      All         0.41      0.45      0.04           0.006        0.000            ...
+
+      The standard errors and the two-sided p-values of the differences are from the DeLong test of two
+      AUCs on the same observations (GINI=2*AUC-1), computed in O(n log n) from the ranks of the scores.
+      """
+
+      targets_=[target_[0] for target_ in self.targets]
+
+      final_table=self.compute().result
+      if len(targets_)==1:
+          final_table=final_table.loc[targets_[0]]
+      final_table=self._table(final_table, f'GINI of the challengers against "{self.scores[0]}" on {self._targets_caption()}')
+      self.table=final_table
+
+      return self
@@ -0,0 +1,22 @@
+"""The complex evaluators, each imported on first use e.g. mofr.complex_evaluators.CategoricalPredictorEvaluator
+(same as from mofr.complex_evaluators.CategoricalPredictor import CategoricalPredictorEvaluator)."""
+
+import importlib
+
+
+#evaluator classes by the module they are defined in
+_EVALUATORS={'CategoricalPredictorEvaluator': 'CategoricalPredictor',
+             'ContinuousPredictorEvaluator': 'ContinuousPredictor',
+             'ScoreComparisonEvaluator': 'ScoreComparison'}
+
+
+def __getattr__(name):
+    if name in _EVALUATORS:
+        value=getattr(importlib.import_module(f'{__name__}.{_EVALUATORS[name]}'), name)
+        globals()[name]=value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def __dir__():
+    return sorted(list(globals())+list(_EVALUATORS))
@@ -0,0 +1,197 @@
+""" Compact container of the columns the evaluators need.
+
+A production extract has hundreds of columns of which an evaluation uses a
+handful. EvaluationDataset keeps only the referenced columns, each in a
+compact type, and validates them once when it is built:
+
+time column: int32 codes into the sorted distinct periods,
+scores: float32 (float64 with score_dtype=np.float64, when ties created by the rounding matter),
+targets: int8 (0/1, the non-observable rows are stored as 0),
+observability flags: bit-packed boolean masks (one bit per row),
+categorical predictors: dictionary encoded i.e. integer codes into the distinct values (as strings),
+continuous predictors: float64.
+
+The evaluators accept it in place of the dataframe, e.g.
+
+ds=EvaluationDataset(df, targets=[('target','target_obs')], scores=['score1','score2'], time_column='month')
+GiniInTimeEvaluator().d(ds).t([('target','target_obs')]).s(['score1','score2']).tc('month')
+
+Indexing it by a column name (or a list of them) gives the decoded pd.Series
+(or pd.DataFrame), indexing it by a boolean mask gives the dataset of the
+selected rows. It also has the interface of columns.ColumnView, with the
+categories and observability masks read straight from the compact columns."""
+
+import numpy as np
+import pandas as pd
+
+from mofr.columns import ColumnView, as_str
+from mofr.periods import PeriodIndex
+
+
+def _smallest_int(n):
+    """Smallest signed integer type holding the codes 0..n-1 (and -1)."""
+
+    for dtype in (np.int8, np.int16, np.int32):
+        if n<=np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class EvaluationDataset(ColumnView):
+    """Column-projected, typed and compact copy of the evaluated data.
+
+    data: pandas dataframe with (at least) all the columns below.
+    targets: list of binary targets with their observability flags [('target1','target1_obs'), ...].
+    scores: list of score columns.
+    time_column: the column with the time information, convertible to integer.
+    categorical: list of categorical predictor columns.
+    continuous: list of continuous predictor columns.
+    score_dtype: type of the stored scores. float32 halves their memory, but scores differing only beyond
+    its precision become ties and the metrics can differ from those of the dataframe; np.float64 keeps them exact.
+    """
+
+    def __init__(self, data, targets=None, scores=None, time_column=None, categorical=None, continuous=None, score_dtype=np.float32):
+        ColumnView.__init__(self, self)
+        self._n=len(data)
+        self._kinds={}
+        self._values={}
+
+        if time_column is not None:
+            time_=data[time_column]
+            if time_.isna().any():
+                raise ValueError(f'The time column "{time_column}" contains missing values!')
+            codes, periods=pd.factorize(time_.astype(np.int64), sort=True)
+            self._store(time_column, 'period', (codes.astype(np.int32), np.asarray(periods)))
+
+        for target_, observable_ in targets or []:
+            mask=(data[observable_]==1).to_numpy()
+            y=data[target_].to_numpy()
+            if not np.isin(y[mask], [0, 1]).all():
+                raise ValueError(f'The target "{target_}" is not binary (0/1) on the observable rows!')
+            self._store(target_, 'target', np.where(mask, y, 0).astype(np.int8))
+            self._store(observable_, 'flag', np.packbits(mask))
+
+        for score_ in scores or []:
+            self._store(score_, 'score', data[score_].to_numpy(dtype=score_dtype))
+
+        for predictor_ in categorical or []:
+            codes, uniques=pd.factorize(as_str(data[predictor_]))
+            self._store(predictor_, 'categorical', (codes.astype(_smallest_int(len(uniques))), np.asarray(uniques, dtype=object)))
+
+        for predictor_ in continuous or []:
+            self._store(predictor_, 'continuous', data[predictor_].to_numpy(dtype=np.float64))
+
+    @classmethod
+    def read_csv(cls, path, targets=None, scores=None, time_column=None, categorical=None, continuous=None, score_dtype=np.float32, **kwargs):
+        """Build the dataset from a csv file, reading only the referenced columns."""
+
+        targets=targets or []
+        columns=[c for pair in targets for c in pair]+list(scores or [])+([time_column] if time_column is not None else [])+list(categorical or [])+list(continuous or [])
+        return cls(pd.read_csv(path, usecols=list(dict.fromkeys(columns)), **kwargs), targets, scores, time_column, categorical, continuous, score_dtype)
+
+    @classmethod
+    def _from_parts(cls, n, kinds, values):
+        """Dataset of n rows from its compact columns, kinds and values as in
+        _kinds and _values (e.g. memory-mapped arrays, see parallel)."""
+
+        dataset=object.__new__(cls)
+        ColumnView.__init__(dataset, dataset)
+        dataset._n=n
+        dataset._kinds=dict(kinds)
+        dataset._values=dict(values)
+        return dataset
+
+    def _store(self, column, kind, values):
+        if column in self._kinds and self._kinds[column]!=kind:
+            raise ValueError(f'The column "{column}" is used both as {self._kinds[column]} and as {kind}!')
+        self._kinds[column]=kind
+        self._values[column]=values
+
+    def _decode(self, column):
+        if column not in self._kinds:
+            raise KeyError(f'The column "{column}" is not in the EvaluationDataset!')
+        kind, values=self._kinds[column], self._values[column]
+        if kind=='period':
+            return pd.Series(values[1][values[0]], name=column)
+        if kind=='flag':
+            return pd.Series(np.unpackbits(values, count=self._n).astype(np.int8), name=column)
+        if kind=='categorical':
+            return pd.Series(values[1][values[0]], name=column)
+        return pd.Series(values, name=column)
+
+    def _take(self, rows):
+        """The dataset of the rows selected by a boolean mask."""
+
+        subset={}
+        for column, kind in self._kinds.items():
+            values=self._values[column]
+            if kind=='flag':
+                subset[column]=np.packbits(np.unpackbits(values, count=self._n).astype(bool)[rows])
+            elif kind=='period':
+                subset[column]=(values[0][rows], values[1])
+            elif kind=='categorical':
+                #only the categories present in the selected rows, in the order of their first appearance
+                codes, present=pd.factorize(values[0][rows])
+                subset[column]=(codes.astype(values[0].dtype), values[1][present])
+            else:
+                subset[column]=values[rows]
+        return type(self)._from_parts(int(rows.sum()), self._kinds, subset)
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self._decode(key)
+        if isinstance(key, list):
+            return pd.DataFrame({column: self._decode(column) for column in key})
+        rows=np.asarray(key)
+        if rows.dtype==bool and len(rows)==self._n:
+            return self._take(rows)
+        raise KeyError(key)
+
+    def __len__(self):
+        return self._n
+
+    def __contains__(self, column):
+        return column in self._kinds
+
+    @property
+    def columns(self):
+        return list(self._kinds)
+
+    @property
+    def nbytes(self):
+        """Memory taken by the compact columns, in bytes."""
+
+        return sum(sum(v.nbytes for v in values) if isinstance(values, tuple) else values.nbytes for values in self._values.values())
+
+    def observable(self, column):
+        """Boolean mask of the rows with the observability flag equal to 1."""
+
+        if self._kinds.get(column)!='flag':
+            return ColumnView.observable(self, column)
+        key=('observable', column)
+        if key not in self._cache:
+            self._cache[key]=np.unpackbits(self._values[column], count=self._n).astype(bool)
+        return self._cache[key]
+
+    def periods(self, column):
+        """PeriodIndex of the time column, straight from its period codes."""
+
+        if self._kinds.get(column)!='period':
+            return ColumnView.periods(self, column)
+        key=('periods', column)
+        if key not in self._cache:
+            codes, periods=self._values[column]
+            self._cache[key]=PeriodIndex.from_codes(codes, periods, name=column)
+        return self._cache[key]
+
+    def categories(self, column):
+        """Distinct values of a categorical predictor, in the order of their first
+        appearance, and the integer code of each row (straight from the dictionary encoding)."""
+
+        if self._kinds.get(column)!='categorical':
+            return ColumnView.categories(self, column)
+        codes, uniques=self._values[column]
+        return list(uniques), codes
+
+    def __repr__(self):
+        return f'EvaluationDataset({self._n} rows, {len(self._kinds)} columns, {self.nbytes} bytes)'
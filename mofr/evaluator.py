@@ -1,6 +1,13 @@
 """Implementing an abstract base class for our evaluator classes"""
 
 import abc
+import pickle
+
+import pandas as pd
+
+from mofr.columns import ColumnView
+from mofr.dataset import EvaluationDataset
+from mofr.table import Table
 
 class Evaluator(abc.ABC):
     """Implementing an abstract base class for our evaluator classes"""
@@ -16,6 +23,144 @@ class Evaluator(abc.ABC):
         """Every evaluator will need to produce a table containing numbers in the graph; ideally pd.pivot_table"""
         pass
 
+    @abc.abstractmethod
+    def compute(self):
+        """The numbers behind the graph and the table as plain pandas objects in self.result, without
+        plotting or styling, so that it runs headless (neither matplotlib nor IPython is imported)"""
+        pass
+
+    def c(self, cache=None):
+        """Cache of the results of this evaluator, a mofr.cache.MemoryCache or DiskCache
+        (None for the default cache, see mofr.cache.set_default_cache)."""
+        self.result_cache=cache
+        return self
+
+    def _new_state(self):
+        """Empty per-period state of the evaluator for the incremental mode (see mofr.incremental),
+        only the in-time evaluators have one."""
+        raise TypeError(f'{type(self).__name__} has no incremental mode, append is only available '
+                        'for the Gini, KS, lift and stability in time evaluators!')
+
+    def _incremental(self):
+        """The per-period state if the evaluator is in the incremental mode (after append or
+        load_state), None otherwise."""
+        state=self.__dict__.get('_state')
+        if state is not None:
+            for setting, value in state.settings.items():
+                current=getattr(self, setting, None)
+                if setting=='targets' and current is not None:
+                    current=[tuple(target_) for target_ in current]
+                if current!=value:
+                    raise ValueError(f'The state was built for {setting} {value}, not {current}!')
+        return state
+
+    def append(self, data):
+        """Incremental mode: add the data of new period(s) (a dataframe or EvaluationDataset) to
+        the per-period state of the evaluator and compute only their rows and the 'All' margin.
+        The first append also summarizes self.data (the history so far), if set.
+        The result of compute, get_table and get_graph is then read from the state,
+        until new data is set (d), which drops the state."""
+        state=self.__dict__.get('_state')
+        if state is None:
+            state=self._new_state()
+            if self.data is not None:
+                for chunk_ in (self.data if self._chunked() else [self.data]):
+                    state.update(chunk_)
+        self._state=state.update(data)
+        return self
+
+    def save_state(self, path):
+        """Save the per-period state (see append) to a file."""
+        with open(path, 'wb') as f:
+            pickle.dump(self._state, f, protocol=pickle.HIGHEST_PROTOCOL)
+        return self
+
+    def load_state(self, path):
+        """Continue in the incremental mode from a state saved by save_state."""
+        with open(path, 'rb') as f:
+            self._state=pickle.load(f)
+        return self
+
+    #the inputs of an evaluator, setting any of them (d, t, s, tc, pc) invalidates the cache key of its data
+    _inputs=('data', 'targets', 'scores', 'time_column', 'predictor_column')
+
+    def __setattr__(self, name, value):
+        if name in self._inputs:
+            self.__dict__.pop('_data_key', None)
+        if name=='data':
+            #new data ends the incremental mode, the state was built from the previous data
+            self.__dict__.pop('_state', None)
+        object.__setattr__(self, name, value)
+
+
+    def _targets_caption(self):
+        """Names of the evaluated targets for the titles and captions e.g. 'target "target1"'
+        or 'targets "target1", "target2"'."""
+        names=', '.join(f'"{target_[0]}"' for target_ in self.targets)
+        return f'target {names}' if len(self.targets)==1 else f'targets {names}'
+
+
+    @staticmethod
+    def _window_caption(window):
+        """Suffix of the titles and captions of the metrics in windows of periods e.g. ' (rolling 3 periods)'."""
+        if window is None:
+            return ''
+        return ' (expanding)' if window=='expanding' else f' (rolling {window} periods)'
+
+
+    def _table(self, data, caption):
+        """Table of the plain data with the caption and the settings of this evaluator as metadata,
+        styled only when it is shown."""
+        metadata={'evaluator': type(self).__name__}
+        for setting in ['targets', 'scores', 'time_column', 'predictor_column']:
+            if getattr(self, setting, None) is not None:
+                metadata[setting]=getattr(self, setting)
+        return Table(data, caption, **metadata)
+
+
+    def _chunked(self):
+        """Whether self.data is an iterable of dataframes (chunks) rather than one dataframe
+        or EvaluationDataset."""
+        return not isinstance(self.data, (pd.DataFrame, EvaluationDataset))
+
+
+    def _columns(self):
+        """Read-only ColumnView of self.data, kept (with its cached casts) as long as
+        self.data is the same dataframe. An EvaluationDataset is its own view."""
+        if isinstance(self.data, EvaluationDataset):
+            return self.data
+        view=getattr(self, '_column_view', None)
+        if view is None or view.data is not self.data:
+            view=self._column_view=ColumnView(self.data)
+        return view
+
+
+    def _share_columns(self, view):
+        """Use the given ColumnView (e.g. of a report.Report or of a complex evaluator) for self.data,
+        so that its cached casts and intermediate results are shared with the other evaluators."""
+        self._column_view=view
+        return self
+
+
+    def _shared_work(self):
+        """The intermediate results this evaluator reads from its ColumnView, as (method, arguments...)
+        tuples, so that a report.Report can compute each of them only once for all its evaluators."""
+        targets=getattr(self, 'targets', None) or []
+        scores=getattr(self, 'scores', None) or []
+        time_column=getattr(self, 'time_column', None)
+        predictor_column=getattr(self, 'predictor_column', None)
+
+        work=[('observable', target_[1]) for target_ in targets]
+        if time_column is not None:
+            work.append(('periods', time_column))
+        if scores and time_column is not None:
+            work.append(('ranked_by_period', tuple(scores), time_column))
+        elif scores and targets:
+            work+=[('ranked_score', tuple(targets[0]), score_) for score_ in scores]
+        if predictor_column is not None and getattr(self, '_predictor_cast', None) is not None:
+            work.append((self._predictor_cast, predictor_column))
+        return work
+
 
     def __repr__(self):
         return ''
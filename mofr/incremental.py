@@ -0,0 +1,232 @@
+""" Per-period state of the in-time evaluators for the incremental (period-append) mode.
+
+Monitoring reports add one period of data at a time (e.g. a month of scored
+applications) to a long history. The in-time tables only change in the row
+of the new period and in the 'All' margin, so instead of evaluating the
+whole history again the evaluators can keep a small summary of each period
+and accept the new period with append:
+
+e=GiniInTimeEvaluator().d(history).t(targets).s(scores).tc('month')
+e.append(new_month).save_state('gini.state')   #next month: ....load_state('gini.state').append(...)
+e.get_table()
+
+The summaries are exact and mergeable, so appending data of an existing
+period is also possible (except for the exact percentiles), and the metrics
+in rolling or expanding windows of periods come from the merged summaries
+of the periods in each window (compute(window=3)):
+
+ScoreMetricsState: the distinct scores of each period with the counts of 1's and 0's
+(metrics.RankedScore.from_counts), for the Gini, KS and lift in time. The metric
+of each period is computed once, the 'All' margin from the merged counts, which are
+kept up to date with one merge per append, and the windows slide over the periods
+(the entering period merged in, the leaving one removed). Being exact, the state
+grows with the number of distinct scores of each period, a continuous score keeps
+about one count per observation; a bounded summary (summaries.ScoreHistogram)
+would give up the exact metrics for the binned ones.
+CategorySharesState: the counts of each (period, category) (summaries.PeriodCounts).
+PercentilesState: the exact percentiles of each period, computed once when it is appended.
+
+The states can be pickled (see Evaluator.save_state and load_state)."""
+
+import numpy as np
+import pandas as pd
+
+from mofr.columns import ColumnView
+from mofr.dataset import EvaluationDataset
+import mofr.metrics as metrics
+from mofr.metrics import RankedScore, quantiles_by_group
+from mofr.summaries import PeriodCounts
+
+
+def _view(data):
+    return data if isinstance(data, EvaluationDataset) else ColumnView(data)
+
+
+class ScoreMetricsState:
+    """Distinct scores with the counts of 1's and 0's for each (target, score, period),
+    plus their merge over all the periods, and the metrics computed from them so far."""
+
+    def __init__(self, targets, scores, time_column):
+        self.settings={'targets': [tuple(target_) for target_ in targets], 'scores': list(scores), 'time_column': time_column}
+        self.ranked={} #(target, score) -> {period: RankedScore}
+        self.all={} #(target, score) -> RankedScore of all the periods
+        self._rows={} #(metric, arguments, window) -> {(target, period): metric of each score}
+
+    def update(self, data):
+        """Add the data of new period(s)."""
+
+        view=_view(data)
+        periods=view.periods(self.settings['time_column'])
+        for target_, flag_ in self.settings['targets']:
+            observable=view.observable(flag_)
+            y_true=np.asarray(view[target_], dtype=np.float64)
+            for score_ in self.settings['scores']:
+                y_score=np.asarray(view[score_])
+                by_period=self.ranked.setdefault((target_, score_), {})
+                for k, period in enumerate(periods.periods):
+                    rows=periods.rows(k)
+                    rows=rows[observable[rows]]
+                    if len(rows)==0:
+                        continue
+                    new=RankedScore(y_true[rows], y_score[rows])
+                    by_period[period]=by_period[period].merge(new) if period in by_period else new
+                #the margin takes the new data at once, one merge per append instead of one per period
+                if observable.any():
+                    new=RankedScore(y_true[observable], y_score[observable])
+                    self.all[(target_, score_)]=self.all[(target_, score_)].merge(new) if (target_, score_) in self.all else new
+
+        #only the rows of the updated periods (and the margin) are computed again,
+        #in the windowed mode those of all the windows which can hold an updated period
+        updated=set(periods.periods)
+        for (_, _, window), rows in self._rows.items():
+            stale=(lambda period: period in updated) if window is None else (lambda period: period>=min(updated))
+            for key in [key for key in rows if stale(key[1])]:
+                del rows[key]
+
+        return self
+
+    def _row(self, ranked, metric, kwargs):
+        return [getattr(ranked[score_], metric)(**kwargs) if score_ in ranked else np.nan for score_ in self.settings['scores']]
+
+    def _window(self, target_, periods, k, window):
+        """Merged RankedScore of each score over the window of periods ending with the k-th one."""
+
+        start=0 if window=='expanding' else max(k-window+1, 0)
+        merged={}
+        for period in periods[start:k+1]:
+            for score_ in self.settings['scores']:
+                ranked=self.ranked.get((target_, score_), {}).get(period)
+                if ranked is not None:
+                    merged[score_]=merged[score_].merge(ranked) if score_ in merged else ranked
+        return merged
+
+    def _slide(self, target_, periods, k, window, merged):
+        """Window ending with the k-th period from the one ending with the (k-1)-th (merged, updated in place):
+        the k-th period merged in and, in a rolling window, the one leaving it removed."""
+
+        for score_ in self.settings['scores']:
+            by_period=self.ranked.get((target_, score_), {})
+            entering=by_period.get(periods[k])
+            if entering is not None:
+                merged[score_]=merged[score_].merge(entering) if score_ in merged else entering
+            leaving=by_period.get(periods[k-window]) if window!='expanding' and k>=window else None
+            if leaving is not None:
+                merged[score_]=merged[score_].remove(leaving)
+                if merged[score_].n==0:
+                    del merged[score_]
+        return merged
+
+    def metric(self, metric, margins=True, margins_name='All', window=None, **kwargs):
+        """Metric ('gini', 'ks' or 'lift') of every score in every period, indexed by (target, period)
+        with one column per score, same as metrics.metric_in_time. kwargs are passed to the metric e.g. p=0.05.
+        window: k periods or 'expanding' for the metric in rolling or expanding windows of periods
+        (see metrics.metric_in_windows), exact here as the distinct scores of the periods are merged."""
+
+        if window is not None and window!='expanding' and (not isinstance(window, (int, np.integer)) or window<1):
+            raise ValueError(f'The window should be a positive number of periods or "expanding", not {window!r}!')
+        rows=self._rows.setdefault((metric, tuple(sorted(kwargs.items())), window), {})
+        targets_=[target_ for target_, _ in self.settings['targets']]
+        tables=[]
+        for target_ in targets_:
+            periods=sorted({period for score_ in self.settings['scores'] for period in self.ranked.get((target_, score_), {})})
+            values=[]
+            merged, merged_k=None, None
+            for k, period in enumerate(periods):
+                if (target_, period) not in rows and window is not None:
+                    #the first window computed again is merged, the next ones slide from it
+                    merged=self._slide(target_, periods, k, window, merged) if merged_k==k-1 else self._window(target_, periods, k, window)
+                    merged_k=k
+                    rows[(target_, period)]=self._row(merged, metric, kwargs)
+                elif (target_, period) not in rows:
+                    rows[(target_, period)]=self._row({score_: self.ranked[(target_, score_)][period] for score_ in self.settings['scores']
+                                                       if period in self.ranked.get((target_, score_), {})}, metric, kwargs)
+                values.append(rows[(target_, period)])
+            index=list(periods)
+            if margins and periods:
+                values.append(self._row({score_: self.all[(target_, score_)] for score_ in self.settings['scores'] if (target_, score_) in self.all}, metric, kwargs))
+                index.append(margins_name)
+            tables.append(pd.DataFrame(values, index=pd.Index(index, dtype=object, name=self.settings['time_column']), columns=self.settings['scores'], dtype=np.float64))
+
+        return pd.concat(tables, keys=targets_, names=['target', self.settings['time_column']])
+
+    def interval(self, metric, margins=True, margins_name='All', window=None, n_boot=1000, ci=0.95, seed=None, max_workers=None, **kwargs):
+        """Poisson bootstrap confidence intervals of the metric (see metrics.bootstrap_from_counts), drawn from
+        the counts of the distinct scores of each period, as the columns '<score>_lower' and '<score>_upper'
+        in the layout of metric."""
+
+        targets_=[target_ for target_, _ in self.settings['targets']]
+        seeds=iter((seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(len(targets_)*len(self.settings['scores'])))
+        tables=[]
+        with metrics._bootstrap_pool(max_workers, metrics._bootstrap_blocks(n_boot, len(targets_)*len(self.settings['scores']))) as pool:
+            for target_ in targets_:
+                periods=sorted({period for score_ in self.settings['scores'] for period in self.ranked.get((target_, score_), {})})
+                columns={}
+                for score_ in self.settings['scores']:
+                    seed_=next(seeds)
+                    by_period=self.ranked.get((target_, score_), {})
+                    if not by_period:
+                        columns[f'{score_}_lower']=columns[f'{score_}_upper']=np.nan
+                        continue
+                    #the counts of each period on the distinct scores of all the periods
+                    thresholds=self.all[(target_, score_)].thresholds
+                    pos=np.zeros((len(periods), len(thresholds)))
+                    neg=np.zeros((len(periods), len(thresholds)))
+                    for k, period in enumerate(periods):
+                        if period in by_period:
+                            at=np.searchsorted(thresholds, by_period[period].thresholds)
+                            pos[k, at], neg[k, at]=by_period[period].pos, by_period[period].neg
+                    columns[f'{score_}_lower'], columns[f'{score_}_upper']=metrics.bootstrap_from_counts(metric, pos, neg, n_boot, ci, seed_, window, margins, pool, **kwargs)
+                index=list(periods)+([margins_name] if margins and periods else [])
+                tables.append(pd.DataFrame(columns, index=pd.Index(index, dtype=object, name=self.settings['time_column']), dtype=np.float64))
+
+        return pd.concat(tables, keys=targets_, names=['target', self.settings['time_column']])
+
+
+class CategorySharesState:
+    """Counts of each (period, category) of a categorical predictor."""
+
+    def __init__(self, predictor_column, time_column):
+        self.settings={'predictor_column': predictor_column, 'time_column': time_column}
+        self.counts=PeriodCounts()
+
+    def update(self, data):
+        """Add the data of new period(s)."""
+
+        view=_view(data)
+        categories, codes=view.categories(self.settings['predictor_column'])
+        self.counts.update(view.as_int(self.settings['time_column']), np.asarray(categories, dtype=object)[codes])
+
+        return self
+
+    def shares(self):
+        """Share of each category (columns) in each period."""
+
+        return self.counts.shares('count').rename_axis(index=self.settings['time_column'], columns=self.settings['predictor_column'])
+
+
+class PercentilesState:
+    """Exact percentiles of a continuous predictor for each period, each computed once."""
+
+    def __init__(self, predictor_column, time_column, q=(0.1, 0.25, 0.5, 0.75, 0.9)):
+        self.settings={'predictor_column': predictor_column, 'time_column': time_column}
+        self.q=list(q)
+        self.rows=pd.DataFrame(columns=self.q, dtype=np.float64)
+
+    def update(self, data):
+        """Add the data of new period(s). The exact percentiles can not be merged, so the
+        periods already in the state can not be appended again."""
+
+        view=_view(data)
+        periods=view.periods(self.settings['time_column'])
+        existing=self.rows.index.intersection(periods.periods)
+        if len(existing)>0:
+            raise ValueError(f'The periods {list(existing)} are already in the state, exact percentiles of a period can not be updated!')
+        rows=quantiles_by_group(view.as_float(self.settings['predictor_column']), periods, self.q)
+        self.rows=pd.concat([self.rows, rows]).sort_index() if len(self.rows) else rows
+
+        return self
+
+    def percentiles(self):
+        """Percentiles (columns) in each period."""
+
+        return self.rows.rename_axis(self.settings['time_column'])
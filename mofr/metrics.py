@@ -6,20 +6,36 @@ are possitively correlated i.e. the higher scores correspond
 to observations with more density of 1 labels and the lower scores 
 correspond to observations with relatively more 0's than 1's."""
 
+import contextlib
+import importlib
+import os
+import warnings
+
 import numpy as np
 import pandas as pd
 
-from sklearn.metrics import accuracy_score
-from sklearn.metrics import precision_score
-from sklearn.metrics import recall_score
-from sklearn.metrics import f1_score
-from sklearn.metrics import confusion_matrix
+from mofr.periods import PeriodIndex
+
 
-from sklearn.metrics import roc_auc_score
-from scipy.stats import ks_2samp
+#sklearn and scipy take more than a second to import, so their metrics are imported on first use
+#(mofr.metrics.roc_auc_score etc. still work, see __getattr__)
+_LAZY={'accuracy_score': 'sklearn.metrics',
+       'precision_score': 'sklearn.metrics',
+       'recall_score': 'sklearn.metrics',
+       'f1_score': 'sklearn.metrics',
+       'confusion_matrix': 'sklearn.metrics',
+       'roc_auc_score': 'sklearn.metrics',
+       'roc_curve': 'sklearn.metrics',
+       'precision_recall_curve': 'sklearn.metrics',
+       'ks_2samp': 'scipy.stats'}
 
-from sklearn.metrics import roc_curve
-from sklearn.metrics import precision_recall_curve
+
+def __getattr__(name):
+    if name in _LAZY:
+        value=getattr(importlib.import_module(_LAZY[name]), name)
+        globals()[name]=value
+        return value
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 
@@ -30,19 +46,62 @@ def gini(y_true, y_score, *args, **kwargs):
     """GINI coefficient in this case is simply scaled
     roc_auc_score in a way that the result is between -1 and 1."""
 
+    from sklearn.metrics import roc_auc_score
+
     return 2*roc_auc_score(y_true, y_score, *args, **kwargs)-1
 
-def liftN(y_true, y_score, p):
+def liftN(y_true, y_score, p, ties='exclude'):
     """ p percent lift e.g. p=0.1 calculates 10% lift.
-    In this case 10% highest scores would be considered."""
-    
+    In this case 10% highest scores would be considered.
+
+    p can also be a list of depths e.g. [0.1, 0.2, ..., 1.0], all of them are
+    then answered from one sort of the scores (see RankedScore.lift), a single
+    depth only needs a partial sort (np.partition).
+
+    ties: what to do with the scores equal to the (1-p) quantile of the scores,
+    'exclude' them i.e. only the scores strictly above the quantile are considered,
+    'include' them i.e. the scores above or equal to the quantile are considered,
+    'average' i.e. exactly the p share of the observations with the highest scores
+    is considered, the tied observations at the boundary taken proportionally
+    (the expected lift when the ties are broken at random)."""
+
+    if np.ndim(p)>0:
+        return RankedScore(y_true, y_score).lift(p, ties)
+
     if p==1.0:
         return 1
 
-    q=1-p
-    quantile=np.quantile(y_score, q)
-    bad_rate_quant=sum(y_true[y_score>quantile])/len(y_true[y_score>quantile])
-    bad_rate_overall=sum(y_true)/len(y_true)
+    y_true=np.asarray(y_true, dtype=np.float64)
+    y_score=np.asarray(y_score)
+    n=len(y_score)
+    bad_rate_overall=y_true.sum()/n
+
+    if ties=='average':
+        k=p*n
+        if k==0:
+            return np.nan
+        boundary=np.partition(y_score, n-int(np.ceil(k)))[n-int(np.ceil(k))] #the lowest of the ceil(k) highest scores
+        above=y_score>boundary
+        tied=y_score==boundary
+        pos_taken=(k-above.sum())*y_true[tied].sum()/tied.sum()
+        return ((y_true[above].sum()+pos_taken)/k)/bad_rate_overall
+
+    #(1-p) quantile as in np.quantile, from the two order statistics around it
+    h=(n-1)*(1-p)
+    lo=int(np.floor(h))
+    hi=min(lo+1, n-1)
+    partitioned=np.partition(y_score, [lo, hi])
+    quantile=partitioned[lo]+(partitioned[hi]-partitioned[lo])*(h-lo)
+
+    if ties=='exclude':
+        selected=y_score>quantile
+    elif ties=='include':
+        selected=y_score>=quantile
+    else:
+        raise ValueError(f'Unknown tie handling "{ties}"!')
+    if not selected.any():
+        return np.nan
+    bad_rate_quant=y_true[selected].sum()/selected.sum()
 
     return bad_rate_quant/bad_rate_overall
 
@@ -52,14 +111,1016 @@ def lift(y_true, y_score):
     return liftN(y_true, y_score, 0.1)
 
 
-def ks_score(y_true, y_score):
-    """Kolmogorov smirnov statistic."""
+def ks_score(y_true, y_score, return_threshold=False):
+    """Kolmogorov smirnov statistic i.e. the maximum gap between the cumulative
+    distributions of the scores of 1's and of 0's, same as
+    ks_2samp(scores of 1's, scores of 0's).statistic but from one sort of the
+    scores. return_threshold=True also returns the score at which the gap is
+    the largest."""
+
+    return RankedScore(y_true, y_score).ks(return_threshold)
+
+
+# metrics from counts of 1's and 0's
+
+def _auc_from_counts(pos, neg):
+    """ROC AUC from counts of 1's and 0's per score value (or score bin),
+    ordered by ascending score along the last axis. Observations sharing
+    a score value count as half-ordered pairs, same as roc_auc_score."""
+
+    pos=np.asarray(pos, dtype=np.float64)
+    neg=np.asarray(neg, dtype=np.float64)
+    neg_below=np.cumsum(neg, axis=-1)-neg
+    n_pos=pos.sum(axis=-1)
+    n_neg=neg.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (pos*(neg_below+0.5*neg)).sum(axis=-1)/(n_pos*n_neg)
+
+def _ks_from_counts(pos, neg):
+    """Kolmogorov smirnov statistic from counts of 1's and 0's per score value
+    (or score bin), ordered by ascending score along the last axis."""
+
+    pos=np.asarray(pos, dtype=np.float64)
+    neg=np.asarray(neg, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cdf_pos=np.cumsum(pos, axis=-1)/pos.sum(axis=-1, keepdims=True)
+        cdf_neg=np.cumsum(neg, axis=-1)/neg.sum(axis=-1, keepdims=True)
+    return np.abs(cdf_pos-cdf_neg).max(axis=-1)
+
+def _lift_from_counts(pos, neg, p):
+    """p percent lift from counts of 1's and 0's per score bin, ordered by
+    ascending score along the last axis, with the tie rule of liftN (and of
+    RankedScoreByGroup.lift): only the observations above the (1-p) quantile
+    of the scores are taken, i.e. those in the bins above the bin holding the
+    quantile. This is exact when each bin holds one distinct score.
+    Returns the lift and the maximum error of it caused by the binning
+    (any part of the boundary bin could be above the quantile)."""
+
+    pos=np.asarray(pos, dtype=np.float64)
+    neg=np.asarray(neg, dtype=np.float64)
+    n=pos+neg
+    n_total=n.sum(axis=-1)
+    n_pos=pos.sum(axis=-1)
+
+    #bin holding the lower of the two order statistics the quantile is interpolated between
+    lo=np.floor(np.maximum(n_total-1, 0)*(1-p))
+    cum_n=np.cumsum(n, axis=-1)
+    boundary=np.argmax(cum_n>lo[..., None], axis=-1)[..., None]
+
+    n_above=n_total-np.take_along_axis(cum_n, boundary, -1)[..., 0]
+    pos_above=n_pos-np.take_along_axis(np.cumsum(pos, axis=-1), boundary, -1)[..., 0]
+    pos_b=np.take_along_axis(pos, boundary, -1)[..., 0]
+    neg_b=np.take_along_axis(neg, boundary, -1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate=pos_above/n_above
+        lift=np.where(p==1.0, np.where(n_total>0, 1.0, np.nan), rate/(n_pos/n_total))
+        #the most the rate can change by taking some of the boundary bin, all its 1's or all its 0's first
+        error=np.maximum((pos_above+pos_b)/(n_above+pos_b)-rate, rate-pos_above/(n_above+neg_b))/(n_pos/n_total)
+
+    return lift, np.where(p==1.0, 0.0, error)
+
+def _sorted_quantile(sorted_values, q):
+    """np.quantile (linear interpolation) of already sorted values."""
+
+    h=(len(sorted_values)-1)*np.asarray(q, dtype=np.float64)
+    lo=np.floor(h).astype(int)
+    hi=np.minimum(lo+1, len(sorted_values)-1)
+    return sorted_values[lo]+(sorted_values[hi]-sorted_values[lo])*(h-lo)
+
+
+class RankedScore:
+    """Binary target and score sorted once by the score.
+
+    The scores are argsorted once and collapsed into distinct score values
+    with the counts of 1's and 0's for each of them. All the metrics below
+    are then read off the cumulative counts in O(n), so evaluating several
+    metrics (or one metric at many depths) on the same score does not sort
+    the data again. Missing scores raise ValueError, as sklearn's metrics do.
+
+    rs=RankedScore(df['target'], df['score'])
+    rs.gini(), rs.ks(), rs.lift(0.05), rs.roc_curve()
+    """
+
+    def __init__(self, y_true, y_score):
+        y_true=np.asarray(y_true, dtype=np.float64)
+        y_score=np.asarray(y_score)
+        if pd.isna(y_score).any():
+            raise ValueError('The scores contain missing values!')
+
+        order=np.argsort(y_score, kind='mergesort')
+        self.sorted_score=y_score[order]
+
+        #collapse the sorted scores into runs of equal values
+        ends=np.flatnonzero(np.r_[self.sorted_score[1:]!=self.sorted_score[:-1], True])
+        cum_pos=np.cumsum(y_true[order])[ends]
+        cum_all=ends+1
+
+        self.thresholds=self.sorted_score[ends] #distinct scores, ascending
+        self.pos=np.diff(cum_pos, prepend=0)
+        self.neg=np.diff(cum_all, prepend=0)-self.pos
+        self.n_pos=cum_pos[-1] if len(ends) else 0.0
+        self.n=len(y_score)
+
+    @classmethod
+    def from_counts(cls, thresholds, pos, neg):
+        """RankedScore of distinct ascending score values with the counts of 1's and 0's
+        of each of them, e.g. a summary kept instead of the observations (see merge)."""
+
+        ranked=object.__new__(cls)
+        ranked.sorted_score=None
+        ranked.thresholds=np.asarray(thresholds)
+        ranked.pos=np.asarray(pos, dtype=np.float64)
+        ranked.neg=np.asarray(neg, dtype=np.float64)
+        ranked.n_pos=ranked.pos.sum()
+        ranked.n=int(round((ranked.pos+ranked.neg).sum()))
+        return ranked
+
+    def merge(self, other):
+        """RankedScore of the observations of both, from the counts of their distinct scores
+        only: the distinct scores of other are inserted into the sorted ones of self, so a small
+        other (e.g. a new period merged into all the history) costs a binary search per score of
+        it and one copy of self, without sorting again."""
+
+        at=np.searchsorted(self.thresholds, other.thresholds)
+        same=at<len(self.thresholds)
+        same[same]=self.thresholds[at[same]]==other.thresholds[same]
+        pos=np.array(self.pos, dtype=np.float64)
+        neg=np.array(self.neg, dtype=np.float64)
+        pos[at[same]]+=other.pos[same]
+        neg[at[same]]+=other.neg[same]
+
+        new=at[~same]
+        thresholds=np.asarray(self.thresholds, dtype=np.result_type(self.thresholds, other.thresholds))
+        return RankedScore.from_counts(np.insert(thresholds, new, other.thresholds[~same]),
+                                       np.insert(pos, new, other.pos[~same]), np.insert(neg, new, other.neg[~same]))
+
+    def remove(self, other):
+        """RankedScore without the observations of other, which were merged into it before
+        (e.g. the period leaving a rolling window), distinct scores left with no observations dropped."""
+
+        at=np.searchsorted(self.thresholds, other.thresholds)
+        pos=np.array(self.pos, dtype=np.float64)
+        neg=np.array(self.neg, dtype=np.float64)
+        pos[at]-=other.pos
+        neg[at]-=other.neg
+        keep=(pos+neg)>0
+        return RankedScore.from_counts(self.thresholds[keep], pos[keep], neg[keep])
+
+    def _quantile(self, q):
+        """np.quantile (linear interpolation) of the scores, also without the sorted scores."""
+
+        if self.sorted_score is not None:
+            return _sorted_quantile(self.sorted_score, q)
+
+        #the k-th smallest score is the distinct score of the run holding the position k
+        ends=np.cumsum(self.pos+self.neg)
+        h=(self.n-1)*np.asarray(q, dtype=np.float64)
+        lo=np.floor(h)
+        hi=np.minimum(lo+1, self.n-1)
+        at=lambda k: self.thresholds[np.minimum(np.searchsorted(ends, k, side='right'), len(ends)-1)]
+        return at(lo)+(at(hi)-at(lo))*(h-lo)
+
+    def auc(self):
+        """Area under the ROC curve, same as sklearn's roc_auc_score."""
+
+        return _auc_from_counts(self.pos, self.neg)
+
+    def gini(self):
+        """GINI coefficient i.e. 2*AUC-1."""
+
+        return 2*self.auc()-1
+
+    def ks(self, return_threshold=False):
+        """Kolmogorov smirnov statistic, same as ks_2samp(...).statistic
+        of the scores of 1's against the scores of 0's. return_threshold=True
+        also returns the score at which the gap between the cumulative
+        distributions is the largest."""
+
+        if not return_threshold:
+            return _ks_from_counts(self.pos, self.neg)
+
+        gap=np.abs(np.cumsum(self.pos)/self.pos.sum()-np.cumsum(self.neg)/self.neg.sum())
+        i=np.argmax(gap)
+        return gap[i], self.thresholds[i]
+
+    def lift(self, p=0.1, ties='exclude'):
+        """ p percent lift e.g. p=0.1 calculates 10% lift, p can also be
+        an array of depths. Same definition (and tie handling) as liftN."""
+
+        depths=np.asarray(p, dtype=np.float64)
+        n_runs=self.pos+self.neg
+        rate=self.n_pos/self.n
+
+        if ties=='average':
+            #the run holding the k-th highest score and the runs above it
+            k=depths*self.n
+            cum_top=np.cumsum(n_runs[::-1])
+            cum_pos_top=np.cumsum(self.pos[::-1])
+            j=np.minimum(np.searchsorted(cum_top, k, side='left'), len(cum_top)-1)
+            n_b=n_runs[::-1][j]
+            pos_b=self.pos[::-1][j]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                pos_taken=cum_pos_top[j]-pos_b+(k-(cum_top[j]-n_b))*pos_b/n_b
+                lifts=np.where(k>0, (pos_taken/k)/rate, np.nan)
+        else:
+            if ties=='exclude':
+                side='right' #runs with score <= quantile are left out
+            elif ties=='include':
+                side='left' #runs with score < quantile are left out
+            else:
+                raise ValueError(f'Unknown tie handling "{ties}"!')
+            quantile=self._quantile(1-depths)
+            i=np.searchsorted(self.thresholds, quantile, side=side)
+            n_above=self.n-np.r_[0, np.cumsum(n_runs)][i]
+            pos_above=self.n_pos-np.r_[0, np.cumsum(self.pos)][i]
+            with np.errstate(divide='ignore', invalid='ignore'):
+                lifts=np.where(n_above>0, (pos_above/n_above)/rate, np.nan)
+            lifts=np.where(depths==1.0, 1.0, lifts)
+
+        return lifts if np.ndim(p)>0 else lifts[()]
+
+    def roc_curve(self, drop_intermediate=True):
+        """fpr, tpr, thresholds as in sklearn's roc_curve, thresholds are decreasing.
+        drop_intermediate=True leaves out the points on a straight line between
+        their neighbours, as sklearn does by default."""
+
+        tps=np.cumsum(self.pos[::-1])
+        fps=np.cumsum(self.neg[::-1])
+        thresholds=self.thresholds[::-1]
+        if drop_intermediate and len(fps)>2:
+            optimal=np.flatnonzero(np.r_[True, (np.diff(fps, 2)!=0)|(np.diff(tps, 2)!=0), True])
+            tps, fps, thresholds=tps[optimal], fps[optimal], thresholds[optimal]
+        tps, fps, thresholds=np.r_[0, tps], np.r_[0, fps], np.r_[np.inf, thresholds]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return fps/fps[-1], tps/tps[-1], thresholds
+
+    def precision_recall_curve(self):
+        """precision, recall, thresholds as in sklearn's precision_recall_curve,
+        thresholds are increasing and the last point is (recall=0, precision=1)."""
+
+        tps=np.cumsum(self.pos[::-1])[::-1]
+        predicted=np.cumsum((self.pos+self.neg)[::-1])[::-1]
+        precision=np.r_[tps/predicted, 1.0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            recall=np.r_[tps/tps[0], 0.0]
+        return precision, recall, self.thresholds
+
+
+
+
+
+
+def _quantile_edges(y_score, bins, sample_size=1000000):
+    """Edges of about bins score bins with the same number of observations each (the quantiles of
+    at most sample_size evenly spaced values of y_score, all its columns together), from its minimum
+    to its maximum so that no score is outside of them. Missing values are left out."""
+
+    y_score=np.asarray(y_score, dtype=np.float64).ravel()
+    sample=y_score[::max(1, len(y_score)//sample_size)]
+    edges=np.unique(np.r_[np.nanmin(y_score), np.nanquantile(sample, np.linspace(0, 1, bins+1))[1:-1], np.nanmax(y_score)])
+    return edges if len(edges)>1 else np.r_[edges, edges]
+
+
+class BinnedScore:
+    """Binary target and score counted in a fixed grid of score bins.
+
+    Approximate mode for very large data: the 1's and 0's are counted per
+    score bin with np.bincount, i.e. in O(n) time and O(bins) memory, and
+    Gini, KS and lift are derived from the two count vectors. Observations
+    in the same bin are treated as ties, max_error gives the maximum error
+    this can cause. BinnedScores with the same edges can be merged, so the
+    counts can be accumulated over chunks, periods or processes.
+
+    bins: number of bins, or an array of bin edges (needed for merging).
+    strategy: 'uniform' bins between the minimum and the maximum score, or
+    'quantile' bins with about the same number of observations each
+    (estimated from at most sample_size evenly spaced observations).
+    Scores outside of the edges are counted in the first or the last bin.
+
+    bs=BinnedScore(df['target'], df['score'], bins=10000)
+    bs.gini(), bs.max_error('gini')
+    """
+
+    def __init__(self, y_true, y_score, bins=10000, strategy='uniform', sample_size=1000000):
+        y_true=np.asarray(y_true, dtype=np.float64)
+        y_score=np.asarray(y_score, dtype=np.float64)
+        if np.isnan(y_score).any():
+            raise ValueError('The scores contain missing values!')
+
+        if np.ndim(bins)>0:
+            self.edges=np.asarray(bins, dtype=np.float64)
+        elif strategy=='uniform':
+            self.edges=np.linspace(np.nanmin(y_score), np.nanmax(y_score), bins+1)
+        elif strategy=='quantile':
+            self.edges=_quantile_edges(y_score, bins, sample_size)
+        else:
+            raise ValueError(f'Unknown binning strategy "{strategy}"!')
+
+        n_bins=len(self.edges)-1
+        bin_=np.clip(np.searchsorted(self.edges, y_score, side='right')-1, 0, n_bins-1)
+        self.pos=np.bincount(bin_, y_true, minlength=n_bins)
+        self.neg=np.bincount(bin_, minlength=n_bins)-self.pos
+
+    def merge(self, other):
+        """Add the counts of another BinnedScore with the same edges."""
+
+        assert np.array_equal(self.edges, other.edges), 'Only BinnedScores with the same bins can be merged!'
+        self.pos=self.pos+other.pos
+        self.neg=self.neg+other.neg
+
+        return self
+
+    def auc(self):
+        """Area under the ROC curve, observations in the same bin counted as ties."""
+
+        return _auc_from_counts(self.pos, self.neg)
+
+    def gini(self):
+        """GINI coefficient i.e. 2*AUC-1."""
+
+        return 2*self.auc()-1
+
+    def ks(self):
+        """Kolmogorov smirnov statistic evaluated at the bin edges."""
+
+        return _ks_from_counts(self.pos, self.neg)
+
+    def lift(self, p=0.1):
+        """p percent lift of the observations in the bins above the (1-p) quantile, see liftN."""
+
+        return _lift_from_counts(self.pos, self.neg, p)[0]
+
+    def max_error(self, metric='gini', p=0.1):
+        """Maximum absolute difference between the binned metric ('auc', 'gini',
+        'ks' or 'lift') and the exact metric on the unbinned scores."""
+
+        return _max_error_from_counts(metric, self.pos, self.neg, p)
+
+
+def _max_error_from_counts(metric, pos, neg, p=0.1):
+    """Maximum error of a metric computed from counts of 1's and 0's per score bin
+    (along the last axis) caused by the binning."""
+
+    pos=np.asarray(pos, dtype=np.float64)
+    neg=np.asarray(neg, dtype=np.float64)
+    n_pos=pos.sum(axis=-1)
+    n_neg=neg.sum(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if metric in ('auc', 'gini'):
+            #pairs of 1 and 0 in the same bin are counted as 1/2, the truth is anywhere between 0 and 1
+            error=0.5*(pos*neg).sum(axis=-1)/(n_pos*n_neg)
+            return 2*error if metric=='gini' else error
+        if metric=='ks':
+            #within a bin the two distribution functions can move apart by at most the bin's share of 1's or 0's
+            return np.maximum(pos/n_pos[..., None], neg/n_neg[..., None]).max(axis=-1)
+        if metric=='lift':
+            return _lift_from_counts(pos, neg, p)[1]
+
+    raise ValueError(f'Unknown metric "{metric}"!')
+
+
+class RankedScoreByGroup:
+    """Scores sorted once within groups (e.g. time periods).
+
+    The data are lexsorted by (group, score) once and collapsed into runs of
+    equal scores within each group. The metrics are then computed for all the
+    groups at once by segmented cumulative sums over the runs, with no Python
+    code executed per group. The sort does not depend on the target, so the
+    same object can be evaluated against several targets; each of the metrics
+    takes an optional boolean mask (e.g. the target's observability flag)
+    which only filters the already sorted rows.
+
+    y_score can be a single score or a 2-D matrix with one score per column
+    (e.g. df[['score1', 'score2']]). Each column is sorted separately but all
+    the (score, group) segments are evaluated together in the same pass and
+    the metrics are returned as an array of shape (n_groups, n_scores).
+
+    margins=True adds one more group 'All' containing all the observations,
+    same as the margins of pd.pivot_table. Observations with missing group
+    are left out, same as pd.pivot_table(..., dropna=True) does. groups can
+    also be a periods.PeriodIndex, its period codes are then used as they are.
+    Missing scores raise ValueError (as sklearn's metrics do) when a metric is
+    evaluated on them, the rows left out by the mask may have them.
+
+    rsg=RankedScoreByGroup(df['score'], df['month'], margins=True)
+    pd.Series(rsg.gini(df['target']), index=rsg.groups)
+    """
+
+    def __init__(self, y_score, groups, margins=False, margins_name='All'):
+        y_score=np.asarray(y_score)
+        self._single=y_score.ndim==1
+        if self._single:
+            y_score=y_score[:, None]
+
+        if isinstance(groups, PeriodIndex):
+            codes, uniques=groups.codes, groups.periods
+        else:
+            codes, uniques=pd.factorize(np.asarray(groups), sort=True)
+            uniques=pd.Index(uniques)
+        n_groups=len(uniques)+margins
+        if margins:
+            uniques=uniques.append(pd.Index([margins_name]))
+
+        #one segment for each (score, group), ordered by (score, group, score value)
+        valid=np.flatnonzero(codes>=0)
+        orders=[]
+        segments=[]
+        for j in range(y_score.shape[1]):
+            order=valid[np.lexsort((y_score[valid, j], codes[valid]))]
+            orders.append(order)
+            segments.append(j*n_groups+codes[order])
+            if margins:
+                order_all=valid[np.argsort(y_score[valid, j], kind='mergesort')]
+                orders.append(order_all)
+                segments.append(np.full(len(order_all), j*n_groups+n_groups-1))
+
+        self.groups=uniques
+        self.margins=margins
+        self.n_groups=n_groups
+        self.n_scores=y_score.shape[1]
+        self._n_segments=n_groups*self.n_scores
+        self._order=np.concatenate(orders)
+        self._segment=np.concatenate(segments)
+        self._score=np.concatenate([y_score[order, k//(1+margins)] for k, order in enumerate(orders)])
+        missing=pd.isna(self._score)
+        self._missing=missing if missing.any() else None
+
+    def _reshape(self, values):
+        """Per segment values into an array of shape (n_groups, n_scores)."""
+
+        values=values.reshape(self.n_scores, self.n_groups).T
+        return values[:, 0] if self._single else values
+
+    def _rows(self, mask=None):
+        """Sorted rows (order, segment, score) kept by the mask. Missing scores
+        are only allowed in the rows left out by the mask."""
+
+        keep=slice(None) if mask is None else np.asarray(mask, dtype=bool)[self._order]
+        if self._missing is not None and self._missing[keep].any():
+            raise ValueError('The scores contain missing values!')
+        return self._order[keep], self._segment[keep], self._score[keep]
+
+    def _runs(self, y_true, mask=None):
+        """Segment, score and counts of 1's and 0's for each run of equal
+        scores within a segment, ordered by (segment, score)."""
+
+        order, g, s=self._rows(mask)
+        y=np.asarray(y_true, dtype=np.float64)[order]
+        ends=np.flatnonzero(np.r_[(g[1:]!=g[:-1])|(s[1:]!=s[:-1]), True])
+        cum_pos=np.cumsum(y)[ends]
+        pos=np.diff(cum_pos, prepend=0)
+        neg=np.diff(ends+1, prepend=0)-pos
+
+        return g[ends], s[ends], pos, neg
+
+    def _segment_cumsum(self, run_segment, x):
+        """Cumulative sums of x restarted at the beginning of each segment."""
+
+        totals=np.bincount(run_segment, x, minlength=self._n_segments)
+        return np.cumsum(x)-(np.cumsum(totals)-totals)[run_segment], totals
+
+    def size(self, mask=None):
+        """Number of observations in each group."""
+
+        _, segment, _=self._rows(mask)
+        return np.bincount(segment, minlength=self._n_segments)[:self.n_groups] #same for all the scores
+
+    def auc(self, y_true, mask=None):
+        """Area under the ROC curve for each group."""
+
+        run_segment, _, pos, neg=self._runs(y_true, mask)
+        cum_neg, n_neg=self._segment_cumsum(run_segment, neg)
+        n_pos=np.bincount(run_segment, pos, minlength=self._n_segments)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            auc=np.bincount(run_segment, pos*(cum_neg-0.5*neg), minlength=self._n_segments)/(n_pos*n_neg)
+        return self._reshape(auc)
+
+    def gini(self, y_true, mask=None):
+        """GINI coefficient for each group."""
+
+        return 2*self.auc(y_true, mask)-1
+
+    def ks(self, y_true, mask=None, return_threshold=False):
+        """Kolmogorov smirnov statistic for each group. return_threshold=True
+        also returns the score at which the gap is the largest in each group."""
+
+        run_segment, run_score, pos, neg=self._runs(y_true, mask)
+        cum_pos, n_pos=self._segment_cumsum(run_segment, pos)
+        cum_neg, n_neg=self._segment_cumsum(run_segment, neg)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gap=np.abs(cum_pos/n_pos[run_segment]-cum_neg/n_neg[run_segment])
+
+        ks=np.full(self._n_segments, np.nan)
+        starts=np.flatnonzero(np.r_[True, run_segment[1:]!=run_segment[:-1]])
+        ks[run_segment[starts]]=np.maximum.reduceat(gap, starts)
+        if not return_threshold:
+            return self._reshape(ks)
+
+        #the first run reaching the maximum gap in each segment
+        thresholds=np.full(self._n_segments, np.nan)
+        at_max=np.flatnonzero(gap==ks[run_segment])
+        segments, first=np.unique(run_segment[at_max], return_index=True)
+        thresholds[segments]=run_score[at_max[first]]
+        return self._reshape(ks), self._reshape(thresholds)
+
+    def lift(self, y_true, p=0.1, mask=None):
+        """p percent lift for each group, same definition as liftN."""
+
+        _, segment, score=self._rows(mask)
+        run_segment, run_score, pos, neg=self._runs(y_true, mask)
+        n_pos=np.bincount(run_segment, pos, minlength=self._n_segments)
+        n=np.bincount(segment, minlength=self._n_segments)
+
+        if p==1.0:
+            return self._reshape(np.where(n>0, 1.0, np.nan))
+
+        #(1-p) quantile of the scores in each segment, interpolated as np.quantile does
+        start=np.cumsum(n)-n
+        h=np.maximum(n-1, 0)*(1-p)
+        lo=np.floor(h).astype(np.intp)
+        hi=np.minimum(lo+1, np.maximum(n-1, 0))
+        last=max(len(score)-1, 0)
+        s_lo=score[np.minimum(start+lo, last)]
+        s_hi=score[np.minimum(start+hi, last)]
+        quantile=s_lo+(s_hi-s_lo)*(h-lo)
+
+        above=run_score>quantile[run_segment]
+        n_above=np.bincount(run_segment, (pos+neg)*above, minlength=self._n_segments)
+        pos_above=np.bincount(run_segment, pos*above, minlength=self._n_segments)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self._reshape((pos_above/n_above)/(n_pos/n))
+
+    def delong_components(self, y_true, mask=None):
+        """Structural components of the fast DeLong algorithm (Sun and Xu, 2014), read off the
+        runs of equal scores already sorted within the groups: for a 1 the share of the 0's of its
+        group below its score, for a 0 the share of the 1's of its group above it (ties count half).
+        Their means over the 1's (or the 0's) of a group are its AUC.
+
+        Returns the components of shape (n_scores, 1+margins, n) and the group of each observation of
+        shape (1+margins, n), the 'All' margin on its own row (-1 for the observations left out).
+        """
+
+        order, g, s=self._rows(mask)
+        y=np.asarray(y_true, dtype=np.float64)[order]
+        starts=np.r_[True, (g[1:]!=g[:-1])|(s[1:]!=s[:-1])] if len(g) else np.zeros(0, dtype=bool)
+        run=np.cumsum(starts)-1
+        run_segment=g[starts]
+        pos=np.bincount(run, y, minlength=len(run_segment))
+        neg=np.bincount(run, 1-y, minlength=len(run_segment))
+        cum_pos, n_pos=self._segment_cumsum(run_segment, pos)
+        cum_neg, n_neg=self._segment_cumsum(run_segment, neg)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v_pos=(cum_neg-0.5*neg)/n_neg[run_segment]
+            v_neg=(n_pos[run_segment]-cum_pos+0.5*pos)/n_pos[run_segment]
+
+        n=len(np.asarray(y_true))
+        score, group=g//self.n_groups, g%self.n_groups
+        part=(group==self.n_groups-1).astype(np.intp) if self.margins else np.zeros(len(g), dtype=np.intp)
+        components=np.full((self.n_scores, 1+self.margins, n), np.nan)
+        components[score, part, order]=np.where(y==1, v_pos[run], v_neg[run])
+        groups=np.full((1+self.margins, n), -1, dtype=np.intp)
+        groups[part, order]=group
+
+        return components, groups
+
+
+def metric_in_time(metric, y_true, y_scores, time, observable=None, margins=True, ranked=None, **kwargs):
+    """Score metric ('gini', 'ks' or 'lift') for every period and every score,
+    as one wide frame in the layout of pd.pivot_table, with the periods in the
+    index (plus the 'All' margin) and one column per score.
+
+    y_scores is a dataframe with one column per score (or a single series).
+    observable is an optional boolean mask of the target-observable cases;
+    the rows are filtered by it only once for all the scores.
+    Further keyword arguments are passed to the metric e.g. p=0.05 for lift, or
+    return_threshold=True for ks to add the score at which the gap is the largest
+    as the column '<score>_threshold' next to each score.
+
+    y_true can also be a dataframe with one column per target, observable
+    then has one column per target too. The scores are sorted only once for
+    all the targets and the result is indexed by (target, period).
+
+    time can also be a periods.PeriodIndex (e.g. ColumnView.periods) shared
+    with other evaluations of the same data, and ranked a RankedScoreByGroup
+    of y_scores by time built beforehand (e.g. ColumnView.ranked_by_period)
+    so that the scores are not sorted again.
+    """
+
+    multiple_targets=isinstance(y_true, pd.DataFrame)
+    y_true=pd.DataFrame(y_true)
+    y_scores=pd.DataFrame(y_scores)
+    if not isinstance(time, PeriodIndex):
+        time=PeriodIndex(pd.Series(time))
+    if observable is None:
+        observable=np.ones(y_true.shape, dtype=bool)
+    observable=np.asarray(observable, dtype=bool).reshape(len(y_true), -1)
+
+    if ranked is None:
+        ranked=RankedScoreByGroup(y_scores.to_numpy(), time, margins=margins, margins_name='All')
+    index=ranked.groups.rename(time.name)
+
+    tables=[]
+    for k, target in enumerate(y_true.columns):
+        values=getattr(ranked, metric)(y_true[target].to_numpy(), mask=observable[:, k], **kwargs)
+        if metric=='ks' and kwargs.get('return_threshold'):
+            #the statistic and the score at which the gap is the largest, next to each other for each score
+            values, thresholds=values
+            table=pd.concat([pd.DataFrame(values, index=index, columns=y_scores.columns),
+                             pd.DataFrame(thresholds, index=index, columns=[f'{score_}_threshold' for score_ in y_scores.columns])], axis=1)
+            table=table[[column for score_ in y_scores.columns for column in [score_, f'{score_}_threshold']]]
+        else:
+            table=pd.DataFrame(values, index=index, columns=y_scores.columns)
+        keep=ranked.size(observable[:, k])>0 #periods without observable cases are left out
+        if ranked.margins and not margins:
+            keep[-1]=False
+        tables.append(table[keep])
+
+    if not multiple_targets:
+        return tables[0]
+
+    return pd.concat(tables, keys=y_true.columns, names=['target', time.name])
+
+
+def _delong(components, groups, y, n_groups, champion=0):
+    """AUC of each score in each group and the DeLong variance of the difference of the AUC
+    of each score and of the champion, from delong_components."""
+
+    components=components.reshape(len(components), -1)
+    groups=groups.ravel()
+    y=np.tile(np.asarray(y, dtype=np.float64), len(groups)//len(y))
+
+    moments={}
+    for label, rows in [('pos', (groups>=0)&(y==1)), ('neg', (groups>=0)&(y==0))]:
+        group=groups[rows]
+        v=components[:, rows]
+        count=np.bincount(group, minlength=n_groups)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean=np.stack([np.bincount(group, v_, minlength=n_groups) for v_ in v])/count
+            #sample variance of the components of each score and covariance with the champion
+            var=(np.stack([np.bincount(group, v_*v_, minlength=n_groups) for v_ in v])-count*mean**2)/(count-1)
+            cov=(np.stack([np.bincount(group, v_*v[champion], minlength=n_groups) for v_ in v])-count*mean*mean[champion])/(count-1)
+        moments[label]=(count, mean, var, cov)
+
+    (n_pos, auc, var_pos, cov_pos), (n_neg, _, var_neg, cov_neg)=moments['pos'], moments['neg']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_diff=(var_pos+var_pos[champion]-2*cov_pos)/n_pos+(var_neg+var_neg[champion]-2*cov_neg)/n_neg
+
+    return auc, np.maximum(var_diff, 0)
+
+def _normal_pvalue(z):
+    """Two-sided p-value of the z statistics (elementwise), P(|Z|>=|z|) for a standard normal Z,
+    from the same NormalDist as _normal_z (p-values below about 1e-16 come out as 0)."""
+
+    from statistics import NormalDist #only for the comparisons, statistics is slow to import
+
+    return np.vectorize(lambda z_: 2*NormalDist().cdf(-abs(z_)), otypes=[np.float64])(np.asarray(z, dtype=np.float64))
+
+def _normal_z(ci):
+    """The z of the two-sided ci interval e.g. 1.96 for ci=0.95, i.e. _normal_pvalue(z)=1-ci."""
+
+    from statistics import NormalDist
+
+    return NormalDist().inv_cdf((1+ci)/2)
+
+def compare_scores_in_time(y_true, y_scores, time, observable=None, margins=True, ranked=None):
+    """GINI of challenger scores against a champion in every period, with the standard error of the
+    difference and its p-value from the fast DeLong algorithm (Sun and Xu, 2014): the variance of the
+    difference of two AUCs on the same observations, from their structural components, in O(n log n)
+    (see RankedScoreByGroup.delong_components) instead of a bootstrap.
+
+    y_scores: dataframe with the champion in the first column and the challengers in the others.
+    observable, margins, ranked: same as metric_in_time, so the ranks sorted once per score (e.g. by
+    ColumnView.ranked_by_period for the GINI in time) are reused.
+
+    Returns a frame in the layout of metric_in_time with the GINI of the champion and, for each
+    challenger, its GINI and the columns '<challenger>_diff' (challenger minus champion), '<challenger>_se'
+    (standard error of the difference) and '<challenger>_pvalue' (two-sided test of equal GINIs).
+    """
+
+    multiple_targets=isinstance(y_true, pd.DataFrame)
+    y_true=pd.DataFrame(y_true)
+    y_scores=pd.DataFrame(y_scores)
+    if not isinstance(time, PeriodIndex):
+        time=PeriodIndex(pd.Series(time))
+    if observable is None:
+        observable=np.ones(y_true.shape, dtype=bool)
+    observable=np.asarray(observable, dtype=bool).reshape(len(y_true), -1)
+
+    if ranked is None:
+        ranked=RankedScoreByGroup(y_scores.to_numpy(), time, margins=margins, margins_name='All')
+    index=ranked.groups.rename(time.name)
+    champion, challengers=y_scores.columns[0], list(y_scores.columns[1:])
+    columns=[champion]+[column for challenger in challengers for column in
+                        [challenger, f'{challenger}_diff', f'{challenger}_se', f'{challenger}_pvalue']]
+
+    tables=[]
+    for k, target in enumerate(y_true.columns):
+        y=y_true[target].to_numpy(dtype=np.float64)
+        components, groups=ranked.delong_components(y, mask=observable[:, k])
+        auc, var_diff=_delong(components, groups, y, ranked.n_groups)
+        gini=2*auc-1
+        #GINI is 2*AUC-1, so the difference and its standard error are twice those of the AUCs
+        diff=gini-gini[0]
+        se=2*np.sqrt(var_diff)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            pvalue=_normal_pvalue(diff/se)
+        values={champion: gini[0]}
+        for j, challenger in enumerate(challengers, start=1):
+            values.update({challenger: gini[j], f'{challenger}_diff': diff[j], f'{challenger}_se': se[j], f'{challenger}_pvalue': pvalue[j]})
+        table=pd.DataFrame(values, index=index, columns=columns)
+        keep=ranked.size(observable[:, k])>0 #periods without observable cases are left out
+        if ranked.margins and not margins:
+            keep[-1]=False
+        tables.append(table[keep])
+
+    if not multiple_targets:
+        return tables[0]
+
+    return pd.concat(tables, keys=y_true.columns, names=['target', time.name])
+
+
+
+# metrics in rolling and expanding windows of periods
+
+def _window_counts(counts, window):
+    """Counts summed over a window of periods, for counts of shape (n_periods, ...).
+    window=k sums the trailing k periods (fewer for the first ones), window='expanding'
+    all the periods so far. The window slides by adding the counts of the entering
+    period and subtracting those of the leaving one, not by summing each window again."""
+
+    if window!='expanding' and (not isinstance(window, (int, np.integer)) or window<1):
+        raise ValueError(f'The window should be a positive number of periods or "expanding", not {window!r}!')
+
+    sums=np.empty(counts.shape, dtype=np.float64)
+    current=np.zeros(counts.shape[1:], dtype=np.float64)
+    for k in range(len(counts)):
+        current+=counts[k]
+        if window!='expanding' and k>=window:
+            current-=counts[k-window]
+        sums[k]=current
+
+    return sums
+
+def _metric_from_counts(metric, pos, neg, **kwargs):
+    if metric=='gini':
+        return 2*_auc_from_counts(pos, neg)-1
+    if metric=='ks':
+        return _ks_from_counts(pos, neg)
+    if metric=='lift':
+        return _lift_from_counts(pos, neg, kwargs.get('p', 0.1))[0]
+    raise ValueError(f'Unknown metric "{metric}"!')
+
+def _score_bins(y_score, bins):
+    """Bin of each score (-1 for missing scores) and the number of bins: the rank among the
+    distinct scores if there are at most bins of them (exact), else equal-frequency bins."""
+
+    y_score=np.asarray(y_score, dtype=np.float64)
+    valid=~np.isnan(y_score)
+    distinct=np.unique(y_score[valid])
+    if len(distinct)>bins:
+        distinct=np.unique(np.quantile(y_score[valid], np.linspace(0, 1, bins+1)[1:-1]))
+        codes=np.searchsorted(distinct, y_score, side='right')
+        n_bins=len(distinct)+1
+    else:
+        codes=np.searchsorted(distinct, y_score)
+        n_bins=len(distinct)
+
+    return np.where(valid, codes, -1), max(n_bins, 1)
+
+def _binned_counts(y_true, y_scores, time, observable, bins):
+    """Counts of 1's and 0's of the observable cases of each target in each (period, score bin),
+    as (target, score, pos, neg) with pos and neg of shape (n_periods, n_bins), plus the periods
+    (a PeriodIndex) and the number of observable cases of each (target, period)."""
+
+    y_true=pd.DataFrame(y_true)
+    y_scores=pd.DataFrame(y_scores)
+    if not isinstance(time, PeriodIndex):
+        time=PeriodIndex(pd.Series(time))
+    if observable is None:
+        observable=np.ones(y_true.shape, dtype=bool)
+    observable=np.asarray(observable, dtype=bool).reshape(len(y_true), -1)
+
+    #bins of each score, computed once for all the targets
+    binned=[_score_bins(y_scores[score_].to_numpy(), bins) for score_ in y_scores.columns]
+
+    counts=[]
+    n={}
+    for k, target in enumerate(y_true.columns):
+        y=y_true[target].to_numpy(dtype=np.float64)
+        mask=observable[:, k]
+        n[target]=time.count(mask)
+        for score_, (codes, n_bins) in zip(y_scores.columns, binned):
+            if (codes[mask]<0).any():
+                raise ValueError('The scores contain missing values!') #same as the exact metrics (see RankedScoreByGroup)
+            pos=time.table(codes, n_bins, np.where(mask, y, 0.0), mask)
+            counts.append((target, score_, pos, time.table(codes, n_bins, mask=mask)-pos))
+
+    return counts, time, n
+
+def _in_time_layout(values, y_true, y_scores, time, n, window, margins, suffixes=('',)):
+    """Metric (or its bounds, one array per suffix) of each (target, score) in the layout of
+    metric_in_time. values maps (target, score) to arrays of shape (n_periods(+1),)."""
+
+    y_true=pd.DataFrame(y_true) if not isinstance(y_true, pd.DataFrame) else y_true
+    y_scores=pd.DataFrame(y_scores)
+    index=time.periods.astype(object)
+    if margins:
+        index=index.append(pd.Index(['All']))
+    columns=[f'{score_}{suffix}' for score_ in y_scores.columns for suffix in suffixes]
+
+    tables=[]
+    for target in y_true.columns:
+        table=np.column_stack([values[(target, score_)][k] for score_ in y_scores.columns for k in range(len(suffixes))])
+        n_window=n[target] if window is None else _window_counts(n[target][:, None], window)[:, 0]
+        keep=np.r_[n_window, [1]*margins]>0 #periods (windows) without observable cases are left out
+        tables.append(pd.DataFrame(table, index=index.rename(time.name), columns=columns)[keep])
+
+    return tables
+
+def metric_in_windows(metric, y_true, y_scores, time, window, observable=None, bins=10000, margins=True, **kwargs):
+    """Score metric ('gini', 'ks' or 'lift') for every window of periods and every score, in the
+    layout of metric_in_time: the windows in the index, labelled by their last period (plus the
+    'All' margin), and one column per score.
+
+    window: k for rolling windows of the trailing k periods (the first windows have fewer of them),
+    or 'expanding' for all the periods up to each one. The periods are the distinct values of
+    the time column, so a trailing 3 month window spans 3 months only if no month is missing.
+
+    The scores are counted in bins (exact for scores with at most bins distinct values, else
+    equal-frequency bins, ties within a bin as in summaries.ScoreHistogram) for each period once
+    and the counts are slid from window to window (see _window_counts). The lift leaves out the
+    observations tied at the quantile like metric_in_time, so window=1 gives the same values.
+    y_true can be a dataframe with one column per target (observable then has one column per
+    target too), the result is then indexed by (target, period). time can be a periods.PeriodIndex.
+    Further keyword arguments are passed to the metric e.g. p=0.05 for lift.
+    """
+
+    counts, time, n=_binned_counts(y_true, y_scores, time, observable, bins)
+
+    values={}
+    for target, score_, pos, neg in counts:
+        #counts of 1's and 0's for each window
+        pos_w, neg_w=_window_counts(pos, window), _window_counts(neg, window)
+        if margins:
+            pos_w=np.concatenate([pos_w, pos.sum(axis=0, keepdims=True)])
+            neg_w=np.concatenate([neg_w, neg.sum(axis=0, keepdims=True)])
+        values[(target, score_)]=(_metric_from_counts(metric, pos_w, neg_w, **kwargs),)
+
+    tables=_in_time_layout(values, y_true, y_scores, time, n, window, margins)
+    if not isinstance(y_true, pd.DataFrame):
+        return tables[0]
+
+    return pd.concat(tables, keys=y_true.columns, names=['target', time.name])
+
+
+# bootstrap confidence intervals
+
+_BOOTSTRAP_BLOCK=50 #replicates drawn from one seed, so the intervals do not depend on the number of workers
+
+def _bootstrap_block(metric, pos, neg, window, margins, kwargs, seed, size):
+    """Metric of size Poisson bootstrap replicates of the per period counts, shape (size, n_periods(+1), ...)."""
+
+    rng=np.random.default_rng(seed)
+    batch=max(1, 2**21//max(pos.size, 1)) #replicates drawn at once, bounding the memory
+    replicates=[]
+    for start in range(0, size, batch):
+        b=min(batch, size-start)
+        #each observation is drawn Poisson(1) times, so a cell of c observations Poisson(c) times (only
+        #the non-empty cells are drawn, most of the (period, bin) cells of fine bins are empty)
+        pos_b, neg_b=np.zeros((b,)+pos.shape), np.zeros((b,)+neg.shape)
+        pos_b[:, pos>0]=rng.poisson(pos[pos>0], size=(b, np.count_nonzero(pos)))
+        neg_b[:, neg>0]=rng.poisson(neg[neg>0], size=(b, np.count_nonzero(neg)))
+        total_pos, total_neg=pos_b.sum(axis=1, keepdims=True), neg_b.sum(axis=1, keepdims=True)
+        if window is not None:
+            pos_b=np.moveaxis(_window_counts(np.moveaxis(pos_b, 1, 0), window), 0, 1)
+            neg_b=np.moveaxis(_window_counts(np.moveaxis(neg_b, 1, 0), window), 0, 1)
+        if margins:
+            pos_b=np.concatenate([pos_b, total_pos], axis=1)
+            neg_b=np.concatenate([neg_b, total_neg], axis=1)
+        replicates.append(_metric_from_counts(metric, pos_b, neg_b, **kwargs))
+
+    return np.concatenate(replicates)
+
+def bootstrap_from_counts(metric, pos, neg, n_boot=1000, ci=0.95, seed=None, window=None, margins=True, pool=None, **kwargs):
+    """Poisson bootstrap confidence interval of the metric ('gini', 'ks' or 'lift') of each period.
+
+    pos, neg: counts of 1's and 0's of shape (n_periods, ..., n_bins), ordered by ascending score along
+    the last axis. Every observation gets a Poisson(1) weight in each replicate, so the counts of a cell
+    are simply drawn from Poisson(count) and no rows are resampled: the cost depends on the number of
+    (period, bin) cells, not on the number of rows. The windows (see metric_in_windows) and the 'All'
+    margin are summed from the replicated counts of the periods. The lift of a replicate has the tie rule
+    of the point estimate, the observations tied at the (1-p) quantile are left out (see _lift_from_counts).
+    seed: int, np.random.SeedSequence or None. The replicates are drawn in blocks of _BOOTSTRAP_BLOCK, each
+    from its own child seed, and spread over the pool (a concurrent.futures executor) if given.
+
+    Returns the lower and the upper bound (percentiles of the replicates), of shape (n_periods(+1), ...).
+    """
+
+    pos=np.asarray(pos, dtype=np.float64)
+    neg=np.asarray(neg, dtype=np.float64)
+    #bins empty in all the periods add nothing to the metrics, they are not drawn
+    keep=(pos+neg).reshape(-1, pos.shape[-1]).sum(axis=0)>0
+    pos, neg=pos[..., keep], neg[..., keep]
+
+    seed=seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    sizes=[min(_BOOTSTRAP_BLOCK, n_boot-start) for start in range(0, n_boot, _BOOTSTRAP_BLOCK)]
+    blocks=[(metric, pos, neg, window, margins, kwargs, child, size) for child, size in zip(seed.spawn(len(sizes)), sizes)]
+    if pool is None or len(blocks)==1:
+        replicates=[_bootstrap_block(*block) for block in blocks]
+    else:
+        replicates=list(pool.map(_bootstrap_block, *zip(*blocks)))
+
+    alpha=(1-ci)/2
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning) #periods without 1's or 0's have no metric
+        lower, upper=np.nanquantile(np.concatenate(replicates), [alpha, 1-alpha], axis=0)
+
+    return lower, upper
+
+_BLOCKS_PER_WORKER=4 #a worker process is only started for at least this many blocks of replicates
+
+def _bootstrap_blocks(n_boot, n_intervals=1):
+    """Number of blocks of replicates drawn for n_intervals bootstrap_from_counts calls of n_boot replicates."""
+
+    return n_intervals*-(-n_boot//_BOOTSTRAP_BLOCK)
+
+def _bootstrap_pool(max_workers, n_blocks):
+    """Process pool for the n_blocks blocks of replicates of the bootstrap, a no-op context (None) when
+    they are drawn in this process: for a single worker or when there are too few blocks to pay for
+    starting the workers (max_workers=None takes up to os.cpu_count(), each with _BLOCKS_PER_WORKER blocks at least)."""
+
+    workers=min(max_workers or os.cpu_count() or 1, n_blocks//_BLOCKS_PER_WORKER)
+    if workers<=1:
+        return contextlib.nullcontext()
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(workers)
+
+def metric_intervals(metric, y_true, y_scores, time, observable=None, bins=10000, window=None, margins=True,
+                     n_boot=1000, ci=0.95, seed=None, max_workers=None, **kwargs):
+    """Bootstrap confidence intervals of the score metric ('gini', 'ks' or 'lift') in time, in the layout
+    of metric_in_time (or metric_in_windows with a window) with the columns '<score>_lower' and '<score>_upper'.
+
+    The scores are binned as in metric_in_windows and the per period counts of the bins are bootstrapped
+    (see bootstrap_from_counts): n_boot replicates, ci the confidence level, seed for reproducible intervals.
+    max_workers: Number of worker processes the replicates are spread over, up to os.cpu_count() by default;
+    a few blocks of replicates (e.g. a small n_boot) are drawn in this process, see _bootstrap_pool.
+    Further keyword arguments are passed to the metric e.g. p=0.05 for lift.
+    """
+
+    counts, time, n=_binned_counts(y_true, y_scores, time, observable, bins)
+
+    values={}
+    seeds=(seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(len(counts))
+    with _bootstrap_pool(max_workers, _bootstrap_blocks(n_boot, len(counts))) as pool:
+        for (target, score_, pos, neg), seed_ in zip(counts, seeds):
+            values[(target, score_)]=bootstrap_from_counts(metric, pos, neg, n_boot, ci, seed_, window, margins, pool, **kwargs)
+
+    tables=_in_time_layout(values, y_true, y_scores, time, n, window, margins, suffixes=('_lower', '_upper'))
+    if not isinstance(y_true, pd.DataFrame):
+        return tables[0]
+
+    return pd.concat(tables, keys=y_true.columns, names=['target', time.name])
+
+def with_intervals(table, intervals):
+    """The metric table with the bounds of each score (see metric_intervals) next to its column,
+    the other columns of the table (e.g. '<score>_threshold') are kept after them."""
+
+    columns=[column for column_ in table.columns for column in
+             ([column_, f'{column_}_lower', f'{column_}_upper'] if f'{column_}_lower' in intervals.columns else [column_])]
+    return pd.concat([table, intervals], axis=1)[columns]
+
+
+# quantiles
 
-    df=pd.DataFrame(zip(y_true, y_score))
-    
-    return ks_2samp(df[df[0]==1][1], df[df[0]==0][1]).statistic
+def quantiles_by_group(values, groups, q):
+    """Quantiles q of values (same as np.quantile with linear interpolation)
+    for each group, all of them from one lexsort by (group, value) instead of
+    a separate sort for each group and each quantile. Missing values and
+    missing groups are left out. groups can also be a periods.PeriodIndex.
 
+    Returns a dataframe with the groups in the index and one column per quantile.
+    """
 
+    values=np.asarray(values, dtype=np.float64)
+    q=np.atleast_1d(np.asarray(q, dtype=np.float64))
+    if isinstance(groups, PeriodIndex):
+        codes, uniques=groups.codes, groups.periods
+    else:
+        codes, uniques=pd.factorize(np.asarray(groups), sort=True)
 
+    keep=np.flatnonzero((codes>=0)&~np.isnan(values))
+    order=keep[np.lexsort((values[keep], codes[keep]))]
+    sorted_values=values[order]
+    n=np.bincount(codes[order], minlength=len(uniques))
 
+    #positions of the quantiles within each group, interpolated as np.quantile does
+    start=(np.cumsum(n)-n)[:, None]
+    h=np.maximum(n-1, 0)[:, None]*q[None, :]
+    lo=np.floor(h).astype(np.intp)
+    hi=np.minimum(lo+1, np.maximum(n-1, 0)[:, None])
+    last=max(len(sorted_values)-1, 0)
+    v_lo=sorted_values[np.minimum(start+lo, last)] if len(sorted_values) else np.full(h.shape, np.nan)
+    v_hi=sorted_values[np.minimum(start+hi, last)] if len(sorted_values) else np.full(h.shape, np.nan)
+    quantiles=np.where(n[:, None]>0, v_lo+(v_hi-v_lo)*(h-lo), np.nan)
 
+    return pd.DataFrame(quantiles, index=pd.Index(uniques, name=getattr(groups, 'name', None)), columns=q)
@@ -0,0 +1,139 @@
+""" Evaluating many predictors (or scores) in parallel.
+
+Screening hundreds of candidate predictors with e.g. CategoricalPredictorEvaluator
+or TargetAssociationContinuousEvaluator is embarrassingly parallel: the same
+evaluator is run for each column. evaluate_in_parallel spreads these
+(evaluator, column) jobs over a concurrent.futures process pool.
+
+The dataframe is not pickled to the workers. The needed columns are projected
+into a dataset.EvaluationDataset once, its compact arrays are saved to
+temporary .npy files and every worker maps them into memory (np.load with
+mmap_mode='r') once, when it starts, so all the workers read the same pages
+of the operating system's file cache. Only the (small) evaluator settings go
+to the workers and only the tables and graphs come back, in the order of the
+jobs regardless of which worker finished first.
+
+results=evaluate_in_parallel(df, TargetAssociationContinuousEvaluator().t(targets).tc('month'), predictors)
+results[0].table, results[0].graph"""
+
+import copy
+import inspect
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from mofr.dataset import EvaluationDataset
+
+
+_dataset=None #the data of a worker process, mapped by _attach when the worker starts
+
+
+def _projected(data, evaluators, columns):
+    """EvaluationDataset with only the columns read by the evaluators, the scores kept in float64
+    so the tables are the same as those of the evaluators run on the dataframe."""
+
+    if isinstance(data, EvaluationDataset):
+        return data
+
+    targets=list(dict.fromkeys(tuple(target_) for evaluator in evaluators for target_ in getattr(evaluator, 'targets', None) or []))
+    time_columns={evaluator.time_column for evaluator in evaluators if getattr(evaluator, 'time_column', None) is not None}
+    if len(time_columns)>1:
+        raise ValueError(f'The evaluators should all use the same time column, not {sorted(time_columns)}!')
+    casts={_setter(evaluator)[1] for evaluator in evaluators}
+
+    return EvaluationDataset(data, targets=targets, time_column=time_columns.pop() if time_columns else None,
+                             scores=columns if 'score' in casts else None,
+                             categorical=columns if 'categories' in casts else None,
+                             continuous=columns if 'as_float' in casts else None, score_dtype=np.float64)
+
+
+def _setter(evaluator):
+    """How the column of a job is given to the evaluator and how it is read."""
+
+    if hasattr(evaluator, 'predictor_column'):
+        return 'pc', getattr(evaluator, '_predictor_cast', None)
+    return 's', 'score'
+
+
+def _dump(dataset, directory):
+    """Save the compact columns of the dataset as .npy files, returns the arguments
+    of _attach for mapping them back in the workers."""
+
+    parts={}
+    for k, (column, values) in enumerate(dataset._values.items()):
+        array, extra=values if isinstance(values, tuple) else (values, None)
+        path=os.path.join(directory, f'{k}.npy')
+        np.save(path, array)
+        parts[column]=(path, extra) #the dictionaries of the codes are small, they are pickled
+
+    return len(dataset), dataset._kinds, parts
+
+
+def _attach(n, kinds, parts):
+    global _dataset
+
+    values={}
+    for column, (path, extra) in parts.items():
+        array=np.load(path, mmap_mode='r')
+        values[column]=array if extra is None else (array, extra)
+    _dataset=EvaluationDataset._from_parts(n, kinds, values)
+
+
+def _evaluate(job):
+    evaluator, column, tables, graphs=job
+
+    setter, _=_setter(evaluator)
+    getattr(evaluator, setter)(column if setter=='pc' else [column])
+    evaluator.d(_dataset)
+    if tables:
+        #complex evaluators display their tables unless told not to
+        if 'show' in inspect.signature(evaluator.get_table).parameters:
+            evaluator.get_table(show=False)
+        else:
+            evaluator.get_table()
+    if graphs:
+        evaluator.get_graph(plot=False)
+
+    evaluator.data=None
+    evaluator.__dict__.pop('_column_view', None)
+
+    return evaluator
+
+
+def evaluate_in_parallel(data, evaluators, columns, max_workers=None, tables=True, graphs=False):
+    """Run the evaluator(s) for each of the columns in a process pool.
+
+    data: The pandas dataframe (or dataset.EvaluationDataset) with all the necessary columns.
+    evaluators: One configured evaluator or a list of them (targets, time column etc. set).
+    The column of each job is set as the predictor column (.pc) of the predictor evaluators
+    and as the only score (.s) of the score evaluators.
+    columns: List of the predictor (or score) columns.
+    max_workers: Number of worker processes, os.cpu_count() by default.
+    tables, graphs: Whether to compute the tables and/or the graphs (graphs are not plotted).
+
+    Returns a list of evaluators, one for each column in the order of the columns, with their
+    table/graph filled in (for a list of evaluators a list of such lists).
+    """
+
+    single=not isinstance(evaluators, (list, tuple))
+    evaluators=[evaluators] if single else list(evaluators)
+
+    #the settings of the evaluators without their data, copied to the workers
+    templates=[]
+    for evaluator in evaluators:
+        template=copy.copy(evaluator)
+        template.data=None
+        template.__dict__.pop('_column_view', None)
+        templates.append(template)
+
+    dataset=_projected(data, templates, list(columns))
+    jobs=[(copy.copy(template), column, tables, graphs) for template in templates for column in columns]
+
+    with tempfile.TemporaryDirectory() as directory:
+        with ProcessPoolExecutor(max_workers, initializer=_attach, initargs=_dump(dataset, directory)) as pool:
+            results=list(pool.map(_evaluate, jobs)) #in the order of the jobs
+
+    results=[results[k*len(columns):(k+1)*len(columns)] for k in range(len(evaluators))]
+    return results[0] if single else results
@@ -0,0 +1,117 @@
+""" Rows of the evaluated data grouped by time period.
+
+All the in-time evaluators group the same rows by the same time column.
+PeriodIndex factorizes the time column once into integer period codes, so
+every per-period reduction is a bincount over the codes instead of a hash
+groupby, crosstab or pivot_table. The rows of each period (rows(k), e.g. for
+the per-period summaries of the incremental mode) come from the rows sorted
+by period, sorted only when they are first asked for. It is built once per dataset (see columns.ColumnView.periods)
+and shared by all the evaluators of that dataset."""
+
+import numpy as np
+import pandas as pd
+
+
+class PeriodIndex:
+    """Factorized periods of the rows of a dataset.
+
+    codes: period code of each row (-1 for a missing period).
+    periods: the distinct periods, sorted, as a pd.Index named by the time column.
+    offsets: the rows of the k-th period are order[offsets[k]:offsets[k+1]].
+    order: the rows sorted by period (stable, rows with a missing period left out), on first use.
+
+    pi=PeriodIndex(df['month'])
+    pi.count(), pi.sum(df['target']), pi.crosstab(codes, categories)
+    """
+
+    def __init__(self, periods, name=None):
+        codes, uniques=pd.factorize(np.asarray(periods), sort=True)
+        self._build(codes, uniques, name if name is not None else getattr(periods, 'name', None))
+
+    @classmethod
+    def from_codes(cls, codes, periods, name=None):
+        """PeriodIndex of rows already encoded as codes into the sorted distinct periods."""
+
+        index=object.__new__(cls)
+        index._build(np.asarray(codes), periods, name)
+        return index
+
+    def _build(self, codes, periods, name):
+        self.codes=codes.astype(np.int32, copy=False)
+        self.periods=pd.Index(periods, name=name)
+        self.name=name
+        self.n_periods=len(self.periods)
+
+        valid=self.codes>=0
+        self.sizes=np.bincount(self.codes[valid], minlength=self.n_periods)
+        self.offsets=np.r_[0, np.cumsum(self.sizes)]
+        self._order=None
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def order(self):
+        if self._order is None:
+            self._order=np.argsort(np.where(self.codes>=0, self.codes, self.n_periods), kind='stable')[:self.offsets[-1]]
+        return self._order
+
+    def rows(self, k):
+        """Rows of the k-th period."""
+
+        return self.order[self.offsets[k]:self.offsets[k+1]]
+
+    def _keep(self, mask=None):
+        keep=self.codes>=0
+        if mask is not None:
+            keep=keep&np.asarray(mask, dtype=bool)
+        return keep
+
+    def count(self, mask=None):
+        """Number of rows (kept by the mask) in each period."""
+
+        if mask is None:
+            return self.sizes
+        return np.bincount(self.codes[self._keep(mask)], minlength=self.n_periods)
+
+    def sum(self, values, mask=None):
+        """Sum of values over the rows (kept by the mask) in each period."""
+
+        keep=self._keep(mask)
+        return np.bincount(self.codes[keep], np.asarray(values, dtype=np.float64)[keep], minlength=self.n_periods)
+
+    def table(self, codes, n_categories, values=None, mask=None):
+        """Counts (or sums of values) for each (period, category) as an array of
+        shape (n_periods, n_categories), codes being the category of each row
+        (-1 for rows left out)."""
+
+        codes=np.asarray(codes)
+        keep=self._keep(mask)&(codes>=0)
+        cells=self.codes[keep].astype(np.int64)*n_categories+codes[keep]
+        weights=None if values is None else np.asarray(values, dtype=np.float64)[keep]
+        return np.bincount(cells, weights, minlength=self.n_periods*n_categories).reshape(self.n_periods, n_categories)
+
+    def crosstab(self, codes, categories, values=None, mask=None, name=None):
+        """Counts (or sums of values) with the periods in the index and the categories
+        (sorted) in the columns, same as pd.crosstab(index=category, columns=period,
+        values=values, aggfunc=sum).transpose(). Periods and categories without
+        any rows are left out."""
+
+        counts=self.table(codes, len(categories), mask=mask)
+        table=counts if values is None else self.table(codes, len(categories), values, mask)
+        table=pd.DataFrame(table, index=self.periods, columns=pd.Index(categories, name=name))
+        table=table.loc[counts.sum(axis=1)>0, counts.sum(axis=0)>0]
+
+        return table.sort_index(axis=1)
+
+
+def period_shares(table, margins=False, margins_name='All'):
+    """Share of each category (column) of a table of counts or sums within each period
+    (row), same as pd.crosstab(..., normalize='columns').transpose(). margins=True
+    adds the shares over all the periods as the last row."""
+
+    result=table.div(table.sum(axis=1), axis=0)
+    if margins:
+        result.loc[margins_name]=table.sum(axis=0)/table.values.sum()
+
+    return result
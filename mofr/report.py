@@ -0,0 +1,103 @@
+""" Running a whole suite of evaluators on the same data.
+
+The same battery of evaluators (ROC, PR and lift curves, Gini/KS/Lift in
+time, the predictor evaluators) is usually run on every model. Run one by
+one, each of them would filter the observable cases, sort the scores, group
+the rows by period and encode the predictor again. A Report gives all its
+evaluators one shared columns.ColumnView of the data, plans the shared work
+(the union of what the evaluators read from the view), computes each piece
+of it once and then fans the results out to each evaluator's get_table and
+get_graph.
+
+report=Report(df, [ROCCurveEvaluator().t(targets).s(scores),
+                   GiniInTimeEvaluator().t(targets).s(scores).tc('month'),
+                   StabilityInTimeCategoricalEvaluator().pc('predictor').tc('month')])
+report.get_table().table  #list with the table of each evaluator"""
+
+import inspect
+
+from mofr.evaluator import Evaluator
+
+
+class Report(Evaluator):
+
+    def __init__(self, data=None, evaluators=None):
+        """
+        data: The pandas dataframe (or mofr.dataset.EvaluationDataset) all the evaluators are run on.
+
+        evaluators: List of configured evaluators (targets, scores, columns etc. set), their data
+        is set to the data of the report.
+        """
+        self.data=data
+        self.evaluators=list(evaluators or [])
+
+    def d(self, data=None):
+        self.data=data
+        return self
+
+    def e(self, evaluators=None):
+        self.evaluators=list(evaluators or [])
+        return self
+
+    def add(self, evaluator):
+        self.evaluators.append(evaluator)
+        return self
+
+    def plan(self):
+        """The shared work of all the evaluators, each piece only once, as (ColumnView method,
+        arguments...) tuples in the order it is computed."""
+
+        return list(dict.fromkeys(work for evaluator in self.evaluators for work in evaluator._shared_work()))
+
+    def _prepare(self):
+        """Give all the evaluators the data and one shared view and compute the shared work."""
+
+        if self._chunked():
+            raise ValueError('A Report needs one dataframe or EvaluationDataset, chunked data can only be evaluated evaluator by evaluator!')
+
+        view=self._columns()
+        for evaluator in self.evaluators:
+            evaluator.d(self.data)._share_columns(view)
+        for work in self.plan():
+            getattr(view, work[0])(*work[1:])
+
+    def run(self, tables=True, graphs=True, plot=False):
+        """Compute the shared work once and then the tables and/or graphs of all the evaluators."""
+
+        self._prepare()
+        for evaluator in self.evaluators:
+            if tables:
+                #the tables are kept in evaluator.table, the evaluators displaying them by default are told not to
+                if 'show' in inspect.signature(evaluator.get_table).parameters:
+                    evaluator.get_table(show=False)
+                else:
+                    evaluator.get_table()
+            if graphs:
+                evaluator.get_graph(plot=plot)
+
+        return self
+
+    def compute(self):
+        """Results of all the evaluators (see Evaluator.compute), as a list in the order of the evaluators.
+        Nothing is plotted or styled, so a report can run headless e.g. in a batch job."""
+
+        self._prepare()
+        self.result=[evaluator.compute().result for evaluator in self.evaluators]
+
+        return self
+
+    def get_graph(self, plot=True):
+        """Graphs of all the evaluators, as a list in the order of the evaluators."""
+
+        self.run(tables=False, graphs=True, plot=plot)
+        self.graph=[getattr(evaluator, 'graph', None) for evaluator in self.evaluators]
+
+        return self
+
+    def get_table(self):
+        """Tables of all the evaluators, as a list in the order of the evaluators."""
+
+        self.run(tables=True, graphs=False)
+        self.table=[getattr(evaluator, 'table', None) for evaluator in self.evaluators]
+
+        return self
@@ -0,0 +1,200 @@
+""" Screening of many candidate predictors at once.
+
+Running TargetAssociationContinuousEvaluator or TargetAssociationCategoricalEvaluator
+for each of hundreds of candidate predictors reads, casts and bins one column at
+a time and draws graphs nobody looks at. screen_predictors summarizes all of
+them into one ranked frame instead:
+
+summary=screen_predictors(df, ('target', 'target_obs'), predictors, time_column='month')
+summary.head(20)   #the strongest predictors first
+
+The predictors are processed in batches of columns. The numeric columns of a
+batch are binned into quantile bins together (one np.nanquantile over the
+batch matrix), the other columns are factorized into their categories, and
+the counts of all the rows, of the target-observable rows and of the 1's of
+each (predictor, period, bin) come from one bincount over the whole batch.
+All the statistics are read off these counts:
+
+iv: information value of the bins (0.5 added to the counts of 1's and 0's of each bin).
+auc, gini: univariate AUC of the predictor and its GINI in absolute value, from the
+bins of a numeric predictor in their natural order (its missing values left out) or
+from the categories ordered by their target rate.
+missing: share of the rows with a missing value.
+psi: population stability index of each period (psi_<period>) against the first
+period and its maximum over the periods (psi), from the shares of the bins of all
+the rows (0.5 added to the counts).
+
+The batches are spread over a concurrent.futures process pool. The target, the
+observability flag and the period codes go to every worker once, when it starts,
+and only a bounded number of batches is queued at a time, so the memory taken
+depends on max_bytes and max_workers, not on the number of predictors."""
+
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+import pandas as pd
+
+from mofr.columns import ColumnView
+from mofr.metrics import _auc_from_counts
+
+
+_context=None #the target, observability and periods of a worker process, set by _attach when the worker starts
+
+
+def _attach(context):
+    global _context
+    _context=context
+
+
+def _numeric_codes(values, bins, missing):
+    """Quantile bin of each value of the columns of a matrix (n, k), same bins as
+    pd.qcut(..., duplicates='drop'), the missing values in the bin number missing."""
+
+    with np.errstate(invalid='ignore'):
+        edges=np.nanquantile(values, np.linspace(0, 1, bins+1), axis=0) #all the columns of the batch at once
+    codes=np.empty(values.shape, dtype=np.int64)
+    for j in range(values.shape[1]):
+        interior=np.unique(edges[1:-1, j])
+        interior=interior[~np.isnan(interior)]
+        codes[:, j]=np.searchsorted(interior, values[:, j], side='left')
+    codes[np.isnan(values)]=missing
+    return codes
+
+
+def _categorical_codes(values, max_categories, missing):
+    """Category of each value (the most frequent max_categories-1 categories, all the others
+    together in one more category), the missing values in the bin number missing."""
+
+    codes, _=pd.factorize(values)
+    nan=codes<0
+    counts=np.bincount(codes[~nan])
+    if len(counts)>max_categories:
+        rank=np.empty(len(counts), dtype=np.int64)
+        rank[np.argsort(-counts, kind='stable')]=np.arange(len(counts))
+        codes=np.where(nan, -1, np.minimum(rank[codes], max_categories-1))
+    codes[nan]=missing
+    return codes
+
+
+def _statistics(count, n, pos, numeric, periods):
+    """The statistics of each predictor of a batch from its counts of all the rows (count), of the
+    target-observable rows (n) and of their 1's (pos), arrays of shape (k, n_periods, n_bins)."""
+
+    n_bins=count.shape[-1]
+    missing=count[..., -1].sum(axis=1)/count.sum(axis=(1, 2))
+
+    #information value, over the bins with observable cases
+    pos_b, neg_b=pos.sum(axis=1), (n-pos).sum(axis=1)
+    used=(pos_b+neg_b)>0
+    dist_pos=np.where(used, pos_b+0.5, 0)/np.where(used, pos_b+0.5, 0).sum(axis=1, keepdims=True)
+    dist_neg=np.where(used, neg_b+0.5, 0)/np.where(used, neg_b+0.5, 0).sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        iv=np.where(used, (dist_pos-dist_neg)*np.log(dist_pos/dist_neg), 0).sum(axis=1)
+
+    #univariate AUC: numeric bins in their natural order without the missing ones, categories by their target rate
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate=np.where(used, pos_b/(pos_b+neg_b), -1)
+    order=np.where(numeric[:, None], np.arange(n_bins)[None, :], np.argsort(rate, axis=1, kind='stable'))
+    keep=~(numeric[:, None]&(np.arange(n_bins)[None, :]==n_bins-1))
+    auc=_auc_from_counts(np.take_along_axis(pos_b*keep, order, 1), np.take_along_axis(neg_b*keep, order, 1))
+
+    table={'kind': np.where(numeric, 'numeric', 'categorical'), 'bins': (count.sum(axis=1)[:, :-1]>0).sum(axis=1),
+           'missing': missing, 'iv': iv, 'auc': auc, 'gini': np.abs(2*auc-1)}
+
+    #population stability index of each period against the first one, over the bins used in any period
+    if periods is not None:
+        present=count.sum(axis=(0, 2))>0
+        count=count[:, present]
+        used=count.sum(axis=1)>0
+        share=np.where(used[:, None, :], count+0.5, 0)
+        share=share/share.sum(axis=2, keepdims=True)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            psi=np.where(used[:, None, :], (share-share[:, :1])*np.log(share/share[:, :1]), 0).sum(axis=2)
+        table['psi']=psi.max(axis=1)
+        table.update({f'psi_{period}': psi[:, t] for t, period in enumerate(np.asarray(periods)[present])})
+
+    return table
+
+
+def _screen_batch(columns, context=None):
+    """Statistics of a batch of predictors, columns being a dict of their values."""
+
+    y, observable, period_codes, periods, bins, max_categories=context if context is not None else _context
+    n_bins=max(bins, max_categories)+1 #the last bin holds the missing values
+    n_periods=1 if periods is None else len(periods)
+
+    names=list(columns)
+    numeric=np.array([np.asarray(values).dtype.kind in 'biuf' for values in columns.values()])
+    codes=np.empty((len(y), len(names)), dtype=np.int64)
+    if numeric.any():
+        batch=np.column_stack([np.asarray(columns[name], dtype=np.float64) for name, numeric_ in zip(names, numeric) if numeric_])
+        codes[:, numeric]=_numeric_codes(batch, bins, n_bins-1)
+        del batch
+    for j in np.flatnonzero(~numeric):
+        codes[:, j]=_categorical_codes(columns[names[j]], max_categories, n_bins-1)
+
+    #one bincount over all the (predictor, period, bin) cells of the batch
+    valid=period_codes>=0
+    cells=((np.arange(len(names))[None, :]*n_periods+period_codes[:, None])*n_bins+codes)[valid]
+    size=len(names)*n_periods*n_bins
+    count=np.bincount(cells.ravel(), minlength=size).reshape(len(names), n_periods, n_bins)
+    cells=cells[observable[valid]]
+    n=np.bincount(cells.ravel(), minlength=size).reshape(len(names), n_periods, n_bins)
+    pos=np.bincount(cells.ravel(), np.repeat(y[valid][observable[valid]], len(names)), minlength=size).reshape(len(names), n_periods, n_bins)
+
+    return pd.DataFrame(_statistics(count, n, pos, numeric, periods), index=pd.Index(names, name='predictor'))
+
+
+def screen_predictors(data, target, predictors, time_column=None, bins=10, max_categories=20, sort_by='gini',
+                      max_workers=None, max_bytes=2**28):
+    """Ranked summary of many candidate predictors (see the module docstring for the statistics).
+
+    data: The pandas dataframe containing all the necessary columns.
+    target: The binary target with its observability flag as follows ('target1', 'target1_obs').
+    predictors: List of the predictor columns, numeric ones are binned into quantile bins and
+    the others (strings, categoricals, objects) are taken by their categories.
+    time_column: The name of the column containing the time information, for the stability in time (psi).
+    bins: Number of quantile bins of the numeric predictors (fewer if some of the quantiles are equal).
+    max_categories: Number of categories kept for the other predictors, the least frequent ones are
+    counted together as one category.
+    sort_by: The statistic the predictors are ranked by, descending e.g. 'gini' or 'iv'.
+    max_workers: Number of worker processes, os.cpu_count() by default, 1 to run in this process.
+    max_bytes: Approximate memory for the columns of one batch, it sets the number of columns per batch.
+
+    Returns a dataframe with one row per predictor, the strongest first.
+    """
+
+    view=ColumnView(data)
+    y=np.nan_to_num(view.as_float(target[0]).to_numpy())
+    observable=view.observable(target[1])
+    if time_column is not None:
+        periods_=view.periods(time_column)
+        period_codes, periods=periods_.codes, list(periods_.periods)
+    else:
+        period_codes, periods=np.zeros(len(y), dtype=np.int32), None
+    context=(y, observable, period_codes, periods, bins, max_categories)
+
+    #a batch holds the values, bins and cells of its columns (about 24 bytes per value)
+    batch_size=max(1, max_bytes//(24*max(len(y), 1)))
+    batches=[list(predictors[start:start+batch_size]) for start in range(0, len(predictors), batch_size)]
+    columns=lambda batch: {name: data[name].to_numpy() for name in batch}
+
+    if max_workers==1 or len(batches)<=1:
+        results=[_screen_batch(columns(batch), context) for batch in batches]
+    else:
+        max_workers=max_workers or os.cpu_count()
+        results=[None]*len(batches)
+        with ProcessPoolExecutor(max_workers, initializer=_attach, initargs=(context,)) as pool:
+            #at most two batches per worker are queued, so only their columns are held in memory at once
+            pending={}
+            for k, batch in enumerate(batches):
+                if len(pending)>=2*max_workers:
+                    done, _=wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[pending.pop(future)]=future.result()
+                pending[pool.submit(_screen_batch, columns(batch))]=k
+            for future in list(pending):
+                results[pending.pop(future)]=future.result()
+
+    return pd.concat(results).sort_values(sort_by, ascending=False, kind='stable')
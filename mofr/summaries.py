@@ -0,0 +1,351 @@
+""" Mergeable summaries of the data for evaluating datasets chunk by chunk.
+
+The summaries are updated with one chunk of data at a time, e.g. from
+pd.read_csv(..., chunksize=...) or from parquet row groups, so the whole
+dataset never needs to be in memory. Two summaries of the same kind can be
+merged, so the chunks can also be summarized separately (e.g. in different
+processes) and combined afterwards."""
+
+import numpy as np
+import pandas as pd
+
+import mofr.metrics as metrics
+from mofr.columns import as_str
+from mofr.periods import PeriodIndex, period_shares
+
+
+class PeriodCounts:
+    """Number of observations and sum of a value (e.g. the target)
+    for each (period, category)."""
+
+    def __init__(self):
+        self.count=pd.Series(dtype=np.float64)
+        self.sum=pd.Series(dtype=np.float64)
+
+    def update(self, periods, categories, values=None):
+        """Add one chunk of data."""
+
+        index=PeriodIndex(periods)
+        codes, uniques=pd.factorize(np.asarray(categories))
+        count=index.table(codes, len(uniques)).ravel()
+        sum_=count if values is None else index.table(codes, len(uniques), values).ravel()
+        cells=pd.MultiIndex.from_product([index.periods, uniques])[count>0]
+        self.count=self.count.add(pd.Series(count[count>0], index=cells), fill_value=0)
+        self.sum=self.sum.add(pd.Series(sum_[count>0], index=cells), fill_value=0)
+
+        return self
+
+    def merge(self, other):
+        """Add the counts and sums of another PeriodCounts."""
+
+        self.count=self.count.add(other.count, fill_value=0)
+        self.sum=self.sum.add(other.sum, fill_value=0)
+
+        return self
+
+    def table(self, what='count'):
+        """Counts (what='count') or sums (what='sum') with the periods in the index
+        and the categories in the columns."""
+
+        series=self.count if what=='count' else self.sum
+
+        return series.unstack(fill_value=0).sort_index().sort_index(axis=1)
+
+    def shares(self, what='count', margins=False, margins_name='All'):
+        """Share of each category in the counts or sums within each period,
+        same as pd.crosstab(..., normalize='columns').transpose(). margins=True
+        adds the shares over all the periods as the last row."""
+
+        return period_shares(self.table(what), margins, margins_name)
+
+
+class ScoreHistogram:
+    """Counts of 1's and 0's in a fixed grid of score bins for each period.
+
+    The same grid is used for all the chunks, so the counts can simply be
+    added up. Gini, KS and lift are then computed from the counts, with the
+    observations in the same bin treated as ties (see metrics.BinnedScore),
+    and max_error gives the maximum error this can cause.
+
+    bins: number of uniform bins on score_range, or an array of bin edges.
+    The bins have to cover all the scores, update raises ValueError for a score
+    outside of them. Missing scores are left out.
+
+    y_score can be a single score or a matrix with one score per column,
+    the metrics then return one column per score.
+    """
+
+    def __init__(self, bins=10000, score_range=(0.0, 1.0)):
+        if np.ndim(bins)==0:
+            self.edges=np.linspace(score_range[0], score_range[1], bins+1)
+        else:
+            self.edges=np.asarray(bins, dtype=np.float64)
+        self.n_bins=len(self.edges)-1
+        self.counts={} #period -> array of shape (2, n_scores, n_bins) with counts of 0's and 1's
+
+    def update(self, y_true, y_score, periods, mask=None):
+        """Add one chunk of data, optionally only the rows kept by the mask."""
+
+        y_true=np.asarray(y_true, dtype=np.float64)
+        y_score=np.asarray(y_score, dtype=np.float64)
+        y_score=y_score.reshape(len(y_score), -1)
+        periods=np.asarray(periods)
+        if mask is not None:
+            mask=np.asarray(mask, dtype=bool)
+            y_true, y_score, periods=y_true[mask], y_score[mask], periods[mask]
+
+        codes, uniques=pd.factorize(periods)
+        n_periods=len(uniques)
+        n_scores=y_score.shape[1]
+        valid=~np.isnan(y_score)
+        if ((y_score[valid]<self.edges[0])|(y_score[valid]>self.edges[-1])).any():
+            raise ValueError(f'There are scores outside of the bins [{self.edges[0]}, {self.edges[-1]}], '
+                             'pass the score range or the bin edges covering all the scores!')
+        bins=np.clip(np.searchsorted(self.edges, y_score, side='right')-1, 0, self.n_bins-1)
+
+        #one bincount over all the (period, score, bin) cells
+        keep=(codes>=0)[:, None]&valid
+        cell=((codes[:, None]*n_scores+np.arange(n_scores))*self.n_bins+bins)[keep]
+        weights=np.broadcast_to(y_true[:, None], keep.shape)[keep]
+        size=n_periods*n_scores*self.n_bins
+        pos=np.bincount(cell, weights, minlength=size).reshape(n_periods, n_scores, self.n_bins)
+        all_=np.bincount(cell, minlength=size).reshape(n_periods, n_scores, self.n_bins)
+
+        for i, period in enumerate(uniques):
+            counts=np.stack([all_[i]-pos[i], pos[i]])
+            self.counts[period]=self.counts[period]+counts if period in self.counts else counts
+
+        return self
+
+    def merge(self, other):
+        """Add the counts of another ScoreHistogram with the same bins."""
+
+        assert np.array_equal(self.edges, other.edges), 'Only histograms with the same bins can be merged!'
+        for period, counts in other.counts.items():
+            self.counts[period]=self.counts[period]+counts if period in self.counts else counts.copy()
+
+        return self
+
+    def _counts(self, margins=True, margins_name='All', window=None):
+        """Periods (plus the margin) and the counts of 0's and 1's of shape
+        (n_periods, n_scores, n_bins) each. With a window (k periods or 'expanding', see
+        metrics.metric_in_windows) the counts of each period are those of its window,
+        the margin still has the counts of all the periods."""
+
+        periods=sorted(self.counts)
+        neg=np.stack([self.counts[period][0] for period in periods])
+        pos=np.stack([self.counts[period][1] for period in periods])
+        index=pd.Index(periods)
+        total_neg, total_pos=neg.sum(axis=0, keepdims=True), pos.sum(axis=0, keepdims=True)
+        if window is not None:
+            neg, pos=metrics._window_counts(neg, window), metrics._window_counts(pos, window)
+        if margins:
+            neg=np.concatenate([neg, total_neg])
+            pos=np.concatenate([pos, total_pos])
+            index=index.append(pd.Index([margins_name]))
+
+        return index, neg, pos
+
+    def auc(self, margins=True, window=None):
+        """Area under the ROC curve for each period (or window of periods, see _counts) (rows) and score (columns)."""
+
+        index, neg, pos=self._counts(margins, window=window)
+        return pd.DataFrame(metrics._auc_from_counts(pos, neg), index=index)
+
+    def gini(self, margins=True, window=None):
+        """GINI coefficient for each period (or window of periods) (rows) and score (columns)."""
+
+        return 2*self.auc(margins, window)-1
+
+    def ks(self, margins=True, window=None):
+        """Kolmogorov smirnov statistic for each period (or window of periods) (rows) and score (columns)."""
+
+        index, neg, pos=self._counts(margins, window=window)
+        return pd.DataFrame(metrics._ks_from_counts(pos, neg), index=index)
+
+    def lift(self, p=0.1, margins=True, window=None):
+        """p percent lift for each period (or window of periods) (rows) and score (columns)."""
+
+        index, neg, pos=self._counts(margins, window=window)
+        return pd.DataFrame(metrics._lift_from_counts(pos, neg, p)[0], index=index)
+
+    def max_error(self, metric='gini', p=0.1, margins=True, window=None):
+        """Maximum error of the metric ('auc', 'gini', 'ks' or 'lift') caused by the binning
+        for each period (or window of periods) (rows) and score (columns)."""
+
+        index, neg, pos=self._counts(margins, window=window)
+        return pd.DataFrame(metrics._max_error_from_counts(metric, pos, neg, p), index=index)
+
+    def interval(self, metric='gini', n_boot=1000, ci=0.95, seed=None, margins=True, window=None, pool=None, **kwargs):
+        """Poisson bootstrap confidence interval of the metric ('gini', 'ks' or 'lift') from the counts
+        (see metrics.bootstrap_from_counts), the lower and the upper bound for each period (rows) and score (columns)."""
+
+        index, neg, pos=self._counts(margins=False)
+        lower, upper=metrics.bootstrap_from_counts(metric, pos, neg, n_boot, ci, seed, window, margins, pool, **kwargs)
+        if margins:
+            index=index.append(pd.Index(['All']))
+        return pd.DataFrame(lower, index=index), pd.DataFrame(upper, index=index)
+
+
+class QuantileSketch:
+    """Mergeable sketch of the distribution of a variable for each period,
+    for approximate quantiles with a relative error guarantee (DDSketch).
+
+    The values are counted in logarithmic buckets: every quantile returned
+    is within relative_accuracy (e.g. 0.01 i.e. 1%) of the exact value of
+    the same rank. The memory needed grows only with the logarithm of the
+    range of the values, not with the number of observations. Values
+    closer to zero than min_value are counted as zeros.
+    """
+
+    def __init__(self, relative_accuracy=0.01, min_value=1e-9):
+        self.relative_accuracy=relative_accuracy
+        self.min_value=min_value
+        self._log_gamma=np.log((1+relative_accuracy)/(1-relative_accuracy))
+        self._min_index=np.ceil(np.log(min_value)/self._log_gamma)
+        self.buckets={} #period -> (sorted bucket keys, counts)
+
+    def _keys(self, values):
+        """Bucket keys, ordered the same way as the values; 0 is the bucket of zeros."""
+
+        magnitude=np.abs(values)
+        large=magnitude>=self.min_value
+        keys=np.zeros(len(values), dtype=np.int64)
+        keys[large]=(np.ceil(np.log(magnitude[large])/self._log_gamma)-self._min_index+1).astype(np.int64)
+        return np.where(values<0, -keys, keys)
+
+    def _values(self, keys):
+        """Representative value of the buckets, within relative_accuracy of all the values in them."""
+
+        gamma=np.exp(self._log_gamma)
+        magnitude=2*np.exp((np.abs(keys)-1+self._min_index)*self._log_gamma)/(gamma+1)
+        return np.where(keys==0, 0.0, np.sign(keys)*magnitude)
+
+    def _add(self, period, keys, counts):
+        if period in self.buckets:
+            keys=np.r_[self.buckets[period][0], keys]
+            counts=np.r_[self.buckets[period][1], counts]
+        keys, inverse=np.unique(keys, return_inverse=True)
+        self.buckets[period]=(keys, np.bincount(inverse, counts, minlength=len(keys)))
+
+    def update(self, values, periods=None):
+        """Add one chunk of data. Missing values are left out, without periods
+        all the observations fall into one period."""
+
+        values=np.asarray(values, dtype=np.float64)
+        periods=np.zeros(len(values), dtype=np.int64) if periods is None else np.asarray(periods)
+        keep=~np.isnan(values)
+        codes, uniques=pd.factorize(periods[keep])
+        cells, counts=np.unique(np.c_[codes, self._keys(values[keep])], axis=0, return_counts=True)
+        for i, period in enumerate(uniques):
+            in_period=cells[:, 0]==i
+            self._add(period, cells[in_period, 1], counts[in_period])
+
+        return self
+
+    def merge(self, other):
+        """Add the counts of another QuantileSketch with the same relative_accuracy."""
+
+        assert self.relative_accuracy==other.relative_accuracy and self.min_value==other.min_value, 'Only sketches with the same accuracy can be merged!'
+        for period, (keys, counts) in other.buckets.items():
+            self._add(period, keys, counts)
+
+        return self
+
+    def quantiles(self, q, margins=False, margins_name='All'):
+        """Approximate quantiles q for each period (rows) and quantile (columns)."""
+
+        q=np.atleast_1d(np.asarray(q, dtype=np.float64))
+        periods=sorted(self.buckets)
+        buckets=[self.buckets[period] for period in periods]
+        index=pd.Index(periods)
+        if margins:
+            all_=QuantileSketch(self.relative_accuracy, self.min_value)
+            for keys, counts in buckets:
+                all_._add(margins_name, keys, counts)
+            buckets.append(all_.buckets[margins_name])
+            index=index.append(pd.Index([margins_name]))
+
+        quantiles=[]
+        for keys, counts in buckets:
+            cumulative=np.cumsum(counts)
+            ranks=q*(cumulative[-1]-1)
+            quantiles.append(self._values(keys[np.searchsorted(cumulative, ranks, side='right')]))
+
+        return pd.DataFrame(quantiles, index=index, columns=q)
+
+
+def quantile_sketch_in_time(chunks, predictor_column, time_column=None, relative_accuracy=0.01):
+    """QuantileSketch of a continuous predictor accumulated over an iterable of dataframes.
+    The predictor is converted to float and the time column to integer. Without time_column
+    all the observations fall into one period."""
+
+    sketch=QuantileSketch(relative_accuracy)
+    for chunk_ in chunks:
+        sketch.update(chunk_[predictor_column].astype(float), None if time_column is None else chunk_[time_column].astype(int))
+
+    return sketch
+
+
+def category_counts_in_time(chunks, predictor_column, time_column=None, target=None):
+    """PeriodCounts of a categorical predictor accumulated over an iterable of dataframes.
+
+    The predictor is converted to string and the time column to integer. Without
+    time_column all the observations fall into one period. If target (the pair
+    of the target and its observability flag) is given, only the target-observable
+    cases are counted and the target is summed.
+    """
+
+    counts=PeriodCounts()
+    for chunk_ in chunks:
+        if target is not None:
+            chunk_=chunk_[chunk_[target[1]]==1]
+        periods=np.zeros(len(chunk_), dtype=np.int64) if time_column is None else chunk_[time_column].astype(int)
+        counts.update(periods, as_str(chunk_[predictor_column]), None if target is None else chunk_[target[0]])
+
+    return counts
+
+
+def metric_in_time(metric, chunks, targets, scores, time_column, bins=None, margins=True, window=None,
+                   ci=None, n_boot=1000, seed=None, max_workers=None, score_range=(0.0, 1.0), **kwargs):
+    """Chunked counterpart of metrics.metric_in_time.
+
+    Score metric ('gini', 'ks' or 'lift') for every target, period and score, computed
+    from ScoreHistogram summaries accumulated over an iterable of dataframes.
+    targets is the list of (target, observability flag) column pairs. The
+    result is indexed by (target, period) with one column per score.
+    bins and score_range are passed to ScoreHistogram (10000 uniform bins on [0, 1] by default), the
+    chunks are read only once so the bins cannot be set from the scores: ValueError is raised for a
+    score outside of them. The maximum error the binning can cause (see ScoreHistogram.max_error) is
+    in the column '<score>_max_error'.
+    window: k periods or 'expanding' for the metric in rolling or expanding windows
+    of periods (see metrics.metric_in_windows), None for each period on its own.
+    ci: Confidence level e.g. 0.95 to add the bootstrap bounds of each score as the columns
+    '<score>_lower' and '<score>_upper' (see metrics.metric_intervals for n_boot, seed and max_workers),
+    drawn from the same histograms so the chunks are read only once.
+    Further keyword arguments are passed to the metric e.g. p=0.05 for lift.
+    """
+
+    histograms=[ScoreHistogram(10000 if bins is None else bins, score_range) for target_ in targets]
+    for chunk_ in chunks:
+        for target_, histogram in zip(targets, histograms):
+            histogram.update(chunk_[target_[0]], chunk_[scores], chunk_[time_column], mask=chunk_[target_[1]]==1)
+
+    tables=[]
+    seeds=(seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)).spawn(len(histograms))
+    with metrics._bootstrap_pool(1 if ci is None else max_workers, metrics._bootstrap_blocks(n_boot, len(histograms))) as pool:
+        for histogram, seed_ in zip(histograms, seeds):
+            table=getattr(histogram, metric)(margins=margins, window=window, **kwargs)
+            table.columns=scores
+            if ci is not None:
+                lower, upper=histogram.interval(metric, n_boot, ci, seed_, margins, window, pool, **kwargs)
+                lower.columns, upper.columns=[f'{score_}_lower' for score_ in scores], [f'{score_}_upper' for score_ in scores]
+                table=metrics.with_intervals(table, pd.concat([lower, upper], axis=1))
+            #the maximum error the binning can cause, next to the columns of each score
+            errors=histogram.max_error(metric, margins=margins, window=window, **kwargs)
+            errors.columns=[f'{score_}_max_error' for score_ in scores]
+            table=pd.concat([table, errors], axis=1)
+            suffixes=['', '_lower', '_upper', '_max_error'] if ci is not None else ['', '_max_error']
+            tables.append(table[[f'{score_}{suffix}' for score_ in scores for suffix in suffixes]])
+
+    return pd.concat(tables, keys=[target_[0] for target_ in targets], names=['target', time_column])
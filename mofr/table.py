@@ -0,0 +1,72 @@
+""" Tables of the evaluators, styled only on demand.
+
+get_table used to build a pandas Styler right away, although most tables
+are only aggregated, compared or saved and never shown. A Table keeps the
+plain dataframe with its caption and metadata (evaluator, targets, scores,
+time column, predictor) and builds the Styler only when the table is shown
+(in a notebook through _repr_html_) or asked for (Table.style, to_html).
+Unlike a Styler it can be pickled, e.g. sent back from a worker process.
+
+e=GiniInTimeEvaluator(df, targets, scores, 'month').get_table()
+e.table.data            #the plain dataframe
+e.table.metadata        #{'evaluator': 'GiniInTimeEvaluator', 'targets': [...], ...}
+e.table.style           #the Styler, built on first use
+e.table                 #displayed in a notebook as before"""
+
+
+class Table:
+    """Plain result of get_table with its caption and metadata.
+
+    data: pd.DataFrame with the numbers of the table.
+    caption: Caption of the styled table.
+    table_attributes: HTML attributes of the styled table.
+    metadata: Anything describing the table e.g. evaluator, targets, scores, time_column.
+    """
+
+    def __init__(self, data, caption=None, table_attributes="style='display:inline'", **metadata):
+        self.data=data
+        self.caption=caption
+        self.table_attributes=table_attributes
+        self.metadata=metadata
+        self._styler=None
+
+    @property
+    def style(self):
+        """pandas Styler of the table, built on first use."""
+
+        if self._styler is None:
+            styler=self.data.style
+            if self.table_attributes is not None:
+                styler=styler.set_table_attributes(self.table_attributes)
+            self._styler=styler.set_caption(self.caption) if self.caption is not None else styler
+        return self._styler
+
+    def to_html(self, **kwargs):
+        return self.style.to_html(**kwargs)
+
+    def _repr_html_(self):
+        return self.to_html()
+
+    def to_dict(self):
+        """The table as plain python objects e.g. for json, the data as in DataFrame.to_dict('split')."""
+
+        return {'caption': self.caption, 'metadata': dict(self.metadata), 'data': self.data.to_dict('split')}
+
+    def __getstate__(self):
+        state=self.__dict__.copy()
+        state['_styler']=None #Stylers can not be pickled, it is built again on demand
+        return state
+
+    def __repr__(self):
+        return f'{self.caption}\n{self.data!r}' if self.caption is not None else repr(self.data)
+
+
+def _display(table):
+    """Display a table in the notebook, or print it where IPython is not installed."""
+
+    try:
+        from IPython.display import display
+    except ImportError:
+        print(table)
+    else:
+        display(table)